@@ -0,0 +1,276 @@
+from benchmark.maps_stub import CenarioMaps
+from functions.src import google_map
+from urllib.parse import unquote_plus, urlparse
+import asyncio
+import inspect
+import itertools
+import time
+
+class FakeWebAutomation:
+    """
+    Substituto do WebAutomation em Python puro, sem navegador, com o mesmo comportamento do servidor local:
+    a lista de resultados aparece depois de latencia_busca, carrega lotes de cartões ao ser rolada e a janela
+    de cada estabelecimento abre depois de latencia_painel.
+
+    Implementa só os métodos usados pelo google_map.py e pelo worker_pool.py.
+    """
+
+    POLL_FREQUENCY = 0.01
+
+    def __init__(self, cenario=None):
+        self.cenario = cenario or CenarioMaps()
+        self.__url = ""
+        self.__lugares = []
+        self.__feed_em = None
+        self.__buscas = 0
+        self.__carregados = 0
+        self.__proximo_lote_em = None
+        self.__painel = None # (lugar, hora em que fica pronto)
+        self.__abas = {}
+        self.__aba_atual = "principal"
+        self.__ids_abas = itertools.count(1)
+        self.__paginas = 0
+        self.__inicio_sessao = time.monotonic()
+
+    # ========================
+    # NAVEGAÇÃO
+    # ========================
+
+    def startWebDriver(self, **kwargs):
+        return self
+
+    def closer_chrome(self):
+        self.__abas = {}
+
+    def restart_browser(self):
+        self.__init__(self.cenario)
+        return self
+
+    def open_url(self, url, wait_load=True, timeout=30):
+        self.__paginas += 1
+        if self.__aba_atual != "principal":
+            self.__abas[self.__aba_atual] = self.__carregar_lugar(url)
+            return
+        self.__url = url
+        self.__painel = None
+        caminho = unquote_plus(urlparse(url).path)
+        if "/search/" in caminho:
+            termo = caminho.split("/search/", 1)[1].split("/")[0]
+            self.__lugares = self.cenario.lugares(termo)
+            self.__feed_em = time.monotonic() + self.cenario.latencia_busca
+            self.__buscas += 1
+            self.__carregados = 0
+            self.__proximo_lote_em = None
+        else:
+            self.__lugares = []
+            self.__feed_em = None
+
+    def wait_page_load(self, timeout=30):
+        return True
+
+    def execute_script(self, script, *args):
+        if script is google_map._SCROLL_FEED_JS:
+            return self.__rolar_feed(args[2])
+        if script is google_map._HARVEST_CARDS_JS:
+            return [{"name": lugar["nome"], "text": lugar["card_text"], "url": "http://maps.local" + lugar["url"]}
+                    for lugar in self.__lugares[args[1]:min(args[2], self.__carregados)]]
+        if script is google_map._CARD_ELEMENTS_JS:
+            # Os elementos dos cartões são representados pela posição do lugar na lista da busca atual
+            return [("cartao", self.__buscas, posicao) for posicao in range(args[1], min(args[2], self.__carregados))]
+        return None
+
+    def page_transfer_bytes(self):
+        return 0
+
+    def current_tab(self):
+        return "principal"
+
+    def open_tab(self, url):
+        aba = f"aba-{next(self.__ids_abas)}"
+        self.__paginas += 1
+        self.__abas[aba] = self.__carregar_lugar(url)
+        return aba
+
+    def switch_to_tab(self, handle):
+        self.__aba_atual = handle
+
+    def navigate_tab(self, url):
+        self.__paginas += 1
+        self.__abas[self.__aba_atual] = self.__carregar_lugar(url)
+
+    def close_tab(self, handle):
+        self.__abas.pop(handle, None)
+
+    def get_current_url(self):
+        return self.__url
+
+    # ========================
+    # ELEMENTOS
+    # ========================
+
+    def click_on_element(self, by=None, value=None, element=None, simulate_click=True, timeout=30, seletor=None):
+        if seletor is not None and seletor.nome == google_map.CLOSE_BUTTON.nome:
+            self.__painel = None
+            return
+        lugar = self.__lugar_do_cartao(element)
+        if lugar is not None:
+            self.__painel = (lugar, time.monotonic() + self.cenario.latencia_painel)
+
+    def type_into(self, by=None, value=None, element=None, txt=None, limpar=True, timeout=30, send_enter=False,
+                  time_sleep_enter=0, seletor=None):
+        if send_enter:
+            self.open_url(google_map.montar_url_busca(txt))
+
+    def scroll_to_element(self, by=None, value=None, element=None, timeout=30, seletor=None):
+        return None
+
+    def get_text(self, by=None, value=None, element=None, seletor=None):
+        lugar = self.__lugar_do_cartao(element)
+        return lugar["card_text"] if lugar else ""
+
+    def extract_fields(self, selector_map, registrar=True):
+        if self.__aba_atual != "principal":
+            pronto = self.__abas.get(self.__aba_atual)
+        else:
+            pronto = self.__painel
+        lugar = pronto[0] if pronto and time.monotonic() >= pronto[1] else None
+        return {nome: lugar.get(nome, "") if lugar else "" for nome in selector_map}
+
+    # ========================
+    # ESPERAS
+    # ========================
+
+    def wait_element(self, by=None, value=None, timeout=30, seletor=None):
+        nome = seletor.nome if seletor is not None else None
+        if nome == google_map.RESULTS_FEED.nome:
+            return self.wait_condition(lambda: self.__feed_em is not None and time.monotonic() >= self.__feed_em,
+                                       timeout) or None
+        if nome == google_map.ESTABLISHMENT_ADDRESS.nome:
+            return bool(self.extract_fields({"establishment_address": None})["establishment_address"]) or None
+        return None
+
+    def wait_condition(self, condicao, timeout=30):
+        limite = time.monotonic() + timeout
+        while True:
+            resultado = condicao()
+            if resultado:
+                return resultado
+            if time.monotonic() >= limite:
+                return False
+            time.sleep(self.POLL_FREQUENCY)
+
+    def find_selector(self, seletor):
+        if seletor.nome == google_map.RESULTS_FEED.nome and self.__feed_em is not None and time.monotonic() >= self.__feed_em:
+            return f"feed-{self.__buscas}"
+        return None
+
+    def is_stale(self, element):
+        return element != self.find_selector(google_map.RESULTS_FEED)
+
+    def wait_element_gone(self, by=None, value=None, timeout=30, seletor=None):
+        return True
+
+    # ========================
+    # RECURSOS
+    # ========================
+
+    def resource_usage(self):
+        return {"rss_mb": None, "paginas": self.__paginas, "idade_minutos": (time.monotonic() - self.__inicio_sessao) / 60}
+
+    def recycle_reason(self, max_rss_mb=0, max_paginas=0, max_idade_minutos=0):
+        return None
+
+    def __rolar_feed(self, alvo):
+        agora = time.monotonic()
+        if self.__feed_em is None or agora < self.__feed_em:
+            return {"count": -1, "fim": False}
+        if self.__carregados == 0:
+            self.__carregados = min(len(self.__lugares), self.cenario.lote)
+        if self.__proximo_lote_em is not None and agora >= self.__proximo_lote_em:
+            self.__carregados = min(len(self.__lugares), self.__carregados + self.cenario.lote)
+            self.__proximo_lote_em = None
+        fim = self.__carregados >= len(self.__lugares)
+        if self.__carregados < alvo and not fim and self.__proximo_lote_em is None:
+            self.__proximo_lote_em = agora + self.cenario.latencia_lote
+        return {"count": self.__carregados, "fim": fim}
+
+    def __lugar_do_cartao(self, elemento):
+        # Um elemento de outra busca não está mais na página
+        if not isinstance(elemento, tuple) or elemento[:2] != ("cartao", self.__buscas):
+            return None
+        posicao = elemento[2]
+        return self.__lugares[posicao] if 0 <= posicao < self.__carregados else None
+
+    def __carregar_lugar(self, url):
+        lugar = self.cenario.lugar_por_url(url)
+        return (lugar, time.monotonic() + self.cenario.latencia_painel) if lugar else None
+
+class FakeAsyncWebAutomation:
+    """
+    Substituto do AsyncWebAutomation (backend "cdp") em Python puro. Cada página é um FakeWebAutomation próprio,
+    então várias páginas carregam ao mesmo tempo; as páginas de lugares se comportam como as abas do FakeWebAutomation.
+
+    Implementa só os métodos usados pelo google_map_async.py e pelo async_pool.py.
+    """
+
+    POLL_FREQUENCY = 0.01
+
+    def __init__(self, cenario=None):
+        self.cenario = cenario or CenarioMaps()
+        self.__fake = FakeWebAutomation(self.cenario)
+
+    async def startWebDriver(self, **kwargs):
+        return self
+
+    async def new_page(self):
+        return FakeAsyncWebAutomation(self.cenario)
+
+    async def close_page(self):
+        self.__fake.closer_chrome()
+
+    async def closer_chrome(self):
+        self.__fake.closer_chrome()
+
+    async def restart_browser(self):
+        self.__fake.restart_browser()
+        return self
+
+    async def open_url(self, url, wait_load=True, timeout=30):
+        if "/search/" in unquote_plus(urlparse(url).path):
+            self.__fake.switch_to_tab("principal")
+            self.__fake.open_url(url, wait_load, timeout)
+        else:
+            self.__fake.switch_to_tab(self.__fake.open_tab(url))
+
+    async def execute_script(self, script, *args):
+        return self.__fake.execute_script(script, *args)
+
+    async def page_transfer_bytes(self):
+        return 0
+
+    async def get_current_url(self):
+        return self.__fake.get_current_url()
+
+    async def extract_fields(self, selector_map, registrar=True):
+        return self.__fake.extract_fields(selector_map, registrar)
+
+    async def get_text(self, by=None, value=None, seletor=None):
+        return self.__fake.get_text(by, value, seletor=seletor)
+
+    async def wait_element(self, by=None, value=None, timeout=30, seletor=None):
+        return await self.wait_condition(lambda: self.__fake.wait_element(by, value, 0, seletor), timeout) or None
+
+    async def wait_condition(self, condicao, timeout=30):
+        limite = time.monotonic() + timeout
+        while True:
+            resultado = condicao()
+            if inspect.isawaitable(resultado):
+                resultado = await resultado
+            if resultado:
+                return resultado
+            if time.monotonic() >= limite:
+                return False
+            await asyncio.sleep(self.POLL_FREQUENCY)
+
+    def resource_usage(self):
+        return self.__fake.resource_usage()
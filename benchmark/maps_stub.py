@@ -0,0 +1,334 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import quote_plus, unquote_plus, urlparse
+import hashlib
+import html
+import json
+import random
+import re
+import threading
+
+# Vocabulário usado para gerar os estabelecimentos sintéticos
+_PREFIXOS = ["Casa", "Cantinho", "Empório", "Espaço", "Ponto", "Recanto", "Estação", "Vila"]
+_RUAS = ["Av. Paulista", "Rua Augusta", "Av. Mutinga", "Rua da Consolação", "Av. Rebouças", "Rua Oscar Freire"]
+_BAIRROS = ["Bela Vista", "Consolação", "Jardim Santo Elias", "Pinheiros", "Jardins", "Vila Mariana"]
+
+# Caminhos dos elementos da janela do estabelecimento, relativos ao #QA0Szd, iguais aos XPaths do google_map.py
+_CAMINHO_PAINEL = "div/div/div[1]/div[3]/div/div[1]/div/div"
+_CAMPOS_PAINEL = {
+    "p-tipo": _CAMINHO_PAINEL + "/div[2]/div[2]/div/div[1]/div[2]/div/div[2]/span/span/button",
+    "p-nota": _CAMINHO_PAINEL + "/div[2]/div[2]/div/div[1]/div[2]/div/div[1]/div[2]/span[1]/span[1]",
+    "p-avaliacoes": _CAMINHO_PAINEL + "/div[2]/div[2]/div/div[1]/div[2]/div/div[1]/div[2]/span[2]/span/span",
+    "p-fechar": _CAMINHO_PAINEL + "/div[1]/div/div/div[3]/span/button",
+}
+# Container da lista de resultados, no mesmo caminho do layout do Google Maps
+_CAMINHO_FEED = "div[1]/div[2]/div[9]/div[8]/div/div/div[1]/div[2]/div/div[1]/div/div/div[1]/div[1]"
+
+class CenarioMaps:
+    """
+    Parâmetros do Google Maps simulado e estabelecimentos gerados para cada busca.
+    Os mesmos parâmetros valem para o servidor local e para o FakeWebAutomation.
+    """
+
+    def __init__(self, resultados=120, lote=7, latencia_busca=0.3, latencia_lote=0.2, latencia_painel=0.4,
+                 sobreposicao=0.0, semente=0):
+        """
+        Args:
+            resultados (int): Quantidade de estabelecimentos que cada busca encontra.
+            lote (int): Cartões carregados a cada rolagem da lista.
+            latencia_busca (float): Segundos até a lista de resultados aparecer.
+            latencia_lote (float): Segundos para carregar cada lote de cartões.
+            latencia_painel (float): Segundos para a janela (ou página) de um estabelecimento carregar.
+            sobreposicao (float): Fração dos resultados que vem de um conjunto comum a todas as buscas,
+                                  para simular o mesmo lugar em várias categorias.
+            semente (int): Semente dos dados gerados.
+        """
+        self.resultados = int(resultados)
+        self.lote = max(1, int(lote))
+        self.latencia_busca = float(latencia_busca)
+        self.latencia_lote = float(latencia_lote)
+        self.latencia_painel = float(latencia_painel)
+        self.sobreposicao = float(sobreposicao)
+        self.semente = semente
+        self.__trava = threading.Lock()
+        self.__buscas = {}
+        self.__por_id = {}
+
+    def lugares(self, termo):
+        """
+        Estabelecimentos encontrados por uma busca, sempre os mesmos para o mesmo termo.
+
+        Returns:
+            list: dicionários com "id", "url", "nome", "card_text" e os campos da janela do estabelecimento.
+        """
+        chave = " ".join(str(termo).lower().split())
+        with self.__trava:
+            if chave not in self.__buscas:
+                gerador = random.Random(f"{self.semente}:{chave}")
+                lista = []
+                for i in range(self.resultados):
+                    if self.sobreposicao and gerador.random() < self.sobreposicao:
+                        lugar = self.__gerar_lugar("compartilhado", gerador.randrange(self.resultados))
+                    else:
+                        lugar = self.__gerar_lugar(chave, i)
+                    lista.append(lugar)
+                    self.__por_id[lugar["id"]] = lugar
+                self.__buscas[chave] = lista
+            return self.__buscas[chave]
+
+    def lugar_por_url(self, url):
+        """
+        Estabelecimento de um link "/maps/place/...!1s<id>...", ou None.
+        """
+        encontrado = re.search(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", url or "")
+        with self.__trava:
+            return self.__por_id.get(encontrado.group(1)) if encontrado else None
+
+    def __gerar_lugar(self, grupo, i):
+        gerador = random.Random(f"{self.semente}:{grupo}:{i}")
+        digest = hashlib.md5(f"{grupo}:{i}".encode("utf-8")).hexdigest()
+        nome = f"{gerador.choice(_PREFIXOS)} {grupo.title()} {i + 1}"
+        tipo = grupo.split()[0].capitalize() if grupo != "compartilhado" else "Comércio"
+        rua = f"{gerador.choice(_RUAS)}, {gerador.randint(1, 4000)}"
+        endereco = f"{rua} - {gerador.choice(_BAIRROS)}, São Paulo - SP, {gerador.randint(1000, 9999):05d}-{gerador.randint(0, 999):03d}"
+        nota = f"{gerador.uniform(3, 5):.1f}".replace(".", ",")
+        avaliacoes = f"({gerador.randint(1, 25000):,})".replace(",", ".")
+        place_id = f"0x{digest[:16]}:0x{digest[16:]}"
+        return {
+            "id": place_id,
+            "url": f"/maps/place/{quote_plus(nome)}/data=!4m7!3m6!1s{place_id}!8m2",
+            "nome": nome,
+            "card_text": f"{nome}\n{nota}{avaliacoes}\n{tipo} · $$ · {rua}\nAberto ⋅ Fecha às 22:00",
+            "establishment_name": nome,
+            "establishment_type": tipo,
+            "establishment_rate": nota,
+            "establishment_avaliation_count": avaliacoes,
+            "establishment_address": endereco,
+        }
+
+# ========================
+# Páginas
+# ========================
+
+def _no(tag, **attrs):
+    return {"tag": tag, "attrs": attrs, "filhos": [], "texto": ""}
+
+def _garantir(raiz, caminho):
+    """
+    Cria (se preciso) os elementos de um caminho no estilo XPath ("div/div[3]/span") e retorna o último.
+    Os índices contam só irmãos com a mesma tag, como no XPath, então irmãos vazios são criados antes.
+    """
+    atual = raiz
+    for passo in caminho.strip("/").split("/"):
+        tag, _, indice = passo.partition("[")
+        indice = int(indice.rstrip("]")) if indice else 1
+        mesmos = [filho for filho in atual["filhos"] if filho["tag"] == tag]
+        while len(mesmos) < indice:
+            novo = _no(tag)
+            atual["filhos"].append(novo)
+            mesmos.append(novo)
+        atual = mesmos[indice - 1]
+    return atual
+
+def _renderizar(no):
+    attrs = "".join(f' {nome.replace("_", "-")}="{html.escape(str(valor))}"' for nome, valor in no["attrs"].items())
+    filhos = "".join(_renderizar(filho) for filho in no["filhos"])
+    return f"<{no['tag']}{attrs}>{html.escape(no['texto'])}{filhos}</{no['tag']}>"
+
+def _painel(visivel):
+    """
+    Janela do estabelecimento, com os campos nas mesmas posições dos XPaths usados pela automação.
+    """
+    painel = _no("section", id="QA0Szd", style="" if visivel else "display:none")
+    for id_campo, caminho in _CAMPOS_PAINEL.items():
+        _garantir(painel, caminho)["attrs"]["id"] = id_campo
+    _garantir(painel, _CAMINHO_PAINEL + "/div[2]/div[1]/h1").update(attrs={"class": "DUwDvf lfPIob", "id": "p-nome"})
+    endereco = _garantir(painel, _CAMINHO_PAINEL + "/div[2]/div[3]/button")
+    endereco["attrs"]["data-item-id"] = "address"
+    _garantir(endereco, "div/div[2]/div[1]")["attrs"]["id"] = "p-endereco"
+    _garantir(painel, _CAMPOS_PAINEL["p-fechar"])["texto"] = "Fechar"
+    return painel
+
+_SCRIPT_PAGINA = """
+const CENARIO = %(cenario)s;
+const LUGARES = %(lugares)s;
+const feed = document.getElementById("feed");
+const painel = document.getElementById("QA0Szd");
+let carregados = 0, carregando = false;
+
+function preencherPainel(lugar) {
+    document.getElementById("p-nome").textContent = lugar.establishment_name;
+    document.getElementById("p-tipo").textContent = lugar.establishment_type;
+    document.getElementById("p-nota").textContent = lugar.establishment_rate;
+    document.getElementById("p-avaliacoes").textContent = lugar.establishment_avaliation_count;
+    document.getElementById("p-endereco").textContent = lugar.establishment_address;
+    painel.style.display = "";
+}
+
+function fecharPainel() {
+    painel.style.display = "none";
+    document.getElementById("p-nome").textContent = "";
+}
+
+function carregarLote() {
+    const fim = Math.min(LUGARES.length, carregados + CENARIO.lote);
+    for (; carregados < fim; carregados++) {
+        const lugar = LUGARES[carregados];
+        const container = document.createElement("div");
+        container.style.height = "96px";
+        const card = document.createElement("div");
+        card.setAttribute("role", "article");
+        card.setAttribute("aria-label", lugar.nome);
+        const link = document.createElement("a");
+        link.href = lugar.url;
+        card.appendChild(link);
+        for (const linha of lugar.card_text.split("\\n")) {
+            const div = document.createElement("div");
+            div.textContent = linha;
+            card.appendChild(div);
+        }
+        container.appendChild(card);
+        container.addEventListener("click", () => {
+            fecharPainel();
+            setTimeout(() => preencherPainel(lugar), CENARIO.latencia_painel * 1000);
+        });
+        feed.appendChild(container);
+        feed.appendChild(document.createElement("div"));
+    }
+    if (carregados >= LUGARES.length) {
+        const marcador = document.createElement("div");
+        marcador.innerHTML = '<span class="HlvSq">Você chegou ao final da lista.</span>';
+        feed.appendChild(marcador);
+    }
+}
+
+if (feed) {
+    setTimeout(() => {
+        feed.setAttribute("role", "feed");
+        carregarLote();
+        // Carregamento preguiçoso: um novo lote chega depois de latencia_lote sempre que a lista é rolada até o fim
+        setInterval(() => {
+            if (carregando || carregados >= LUGARES.length) { return; }
+            if (feed.scrollTop + feed.clientHeight < feed.scrollHeight - 10) { return; }
+            carregando = true;
+            setTimeout(() => { carregarLote(); carregando = false; }, CENARIO.latencia_lote * 1000);
+        }, 50);
+    }, CENARIO.latencia_busca * 1000);
+}
+document.getElementById("p-fechar").addEventListener("click", fecharPainel);
+if (%(lugar)s) {
+    setTimeout(() => preencherPainel(%(lugar)s), CENARIO.latencia_painel * 1000);
+}
+"""
+
+def pagina_busca(cenario, termo):
+    """
+    Página de resultados de uma busca: a lista de cartões (carregada aos poucos) e a janela do estabelecimento.
+    """
+    body = _no("body")
+    feed = _garantir(body, _CAMINHO_FEED)
+    feed["attrs"].update(id="feed", style="height:480px;overflow-y:auto")
+    # Os dois primeiros filhos da lista não são cartões, o primeiro cartão fica na posição 3
+    _garantir(feed, "div[2]")
+    body["filhos"].append(_painel(visivel=False))
+    lugares = [{chave: lugar[chave] for chave in ("url", "nome", "card_text", "establishment_name", "establishment_type",
+                                                  "establishment_rate", "establishment_avaliation_count",
+                                                  "establishment_address")}
+               for lugar in cenario.lugares(termo)]
+    return _documento(body, cenario, lugares, None)
+
+def pagina_lugar(cenario, lugar):
+    """
+    Página de um estabelecimento, aberta pelo link do cartão (modo "tabs").
+    """
+    body = _no("body")
+    body["filhos"].append(_painel(visivel=False))
+    return _documento(body, cenario, [], lugar)
+
+def pagina_inicial():
+    """
+    Página inicial, com o campo de busca usado quando busca_direta = false.
+    """
+    return ("<!DOCTYPE html><html><body><input class=\"searchboxinput\" id=\"busca\">"
+            "<script>document.getElementById('busca').addEventListener('keydown', e => {"
+            " if (e.key === 'Enter') { location.href = location.pathname.replace(/\\/$/, '') + '/search/' +"
+            " encodeURIComponent(e.target.value) + '/'; } });</script></body></html>")
+
+def _documento(body, cenario, lugares, lugar):
+    script = _SCRIPT_PAGINA % {
+        "cenario": json.dumps({"lote": cenario.lote, "latencia_busca": cenario.latencia_busca,
+                               "latencia_lote": cenario.latencia_lote, "latencia_painel": cenario.latencia_painel}),
+        "lugares": json.dumps(lugares, ensure_ascii=False),
+        "lugar": json.dumps(lugar, ensure_ascii=False) if lugar else "null",
+    }
+    # O script entra no fim do body, sem escape
+    corpo = _renderizar(body)[:-len("</body>")]
+    return f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head>{corpo}<script>{script}</script></body></html>"
+
+# ========================
+# Servidor
+# ========================
+
+class ServidorMaps:
+    """
+    Servidor HTTP local que imita as páginas do Google Maps usadas pela automação.
+
+    Exemplo:
+        with ServidorMaps(CenarioMaps(resultados=50)) as servidor:
+            collect_data(driver, "restaurante", 20, url_base=servidor.url)
+    """
+
+    def __init__(self, cenario=None, host="127.0.0.1", porta=0):
+        self.cenario = cenario or CenarioMaps()
+        cenario_atual = self.cenario
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                caminho = unquote_plus(urlparse(self.path).path)
+                if caminho.startswith("/maps/search/"):
+                    corpo = pagina_busca(cenario_atual, caminho[len("/maps/search/"):].split("/")[0])
+                elif caminho.startswith("/maps/place/"):
+                    lugar = cenario_atual.lugar_por_url(self.path)
+                    if lugar is None:
+                        self.send_error(404)
+                        return
+                    corpo = pagina_lugar(cenario_atual, lugar)
+                elif caminho.rstrip("/") == "/maps":
+                    corpo = pagina_inicial()
+                else:
+                    self.send_error(404)
+                    return
+                dados = corpo.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.__servidor = ThreadingHTTPServer((host, porta), Handler)
+        self.__thread = None
+
+    @property
+    def url(self):
+        """
+        Endereço equivalente a "https://www.google.com/maps" no servidor local.
+        """
+        host, porta = self.__servidor.server_address[:2]
+        return f"http://{host}:{porta}/maps"
+
+    def iniciar(self):
+        self.__thread = threading.Thread(target=self.__servidor.serve_forever, name="servidor-maps", daemon=True)
+        self.__thread.start()
+        return self
+
+    def parar(self):
+        self.__servidor.shutdown()
+        self.__servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.parar()
@@ -0,0 +1,262 @@
+"""
+Benchmark offline da coleta, sem acessar o Google.
+
+A coleta roda contra um Google Maps simulado: um servidor HTTP local (com o Chrome) ou o FakeWebAutomation
+(Python puro, sem navegador). No fim é mostrado o relatório com itens/s, a distribuição da latência por
+estabelecimento, os tempos de cada fase e a memória usada.
+
+Exemplos:
+    python -m benchmark.run --driver fake --modo detail --termos restaurante padaria --qtd 50
+    python -m benchmark.run --driver chrome --modo tabs --qtd 30 --latencia-painel 0.2
+    python -m benchmark.run --main --driver fake --workers 2 --sobreposicao 0.3 --saida bench.json
+    python -m benchmark.run --backend cdp --driver chrome --modo tabs --qtd 30
+"""
+from benchmark.maps_stub import CenarioMaps, ServidorMaps
+from benchmark.fake_driver import FakeAsyncWebAutomation, FakeWebAutomation
+from functions.src import worker_pool
+from functions.src.google_map import collect_data
+from functions.src.google_map_async import collect_data_async
+from functions.utils import selenium_web
+from functions.utils.metrics import configurar_metricas, registrar_duracao, resumo
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def ler_argumentos(argv=None):
+    """
+    Lê os argumentos da linha de comando
+    @param argv: lista de argumentos (None usa sys.argv)
+    @return: argumentos
+    """
+    parser = argparse.ArgumentParser(description="Benchmark offline da coleta de estabelecimentos")
+    parser.add_argument("--driver", choices=["fake", "chrome"], default="fake",
+                        help="fake: FakeWebAutomation em Python puro; chrome: Chrome contra o servidor local")
+    parser.add_argument("--backend", choices=["selenium", "cdp"], default="selenium",
+                        help="selenium: WebAutomation e collect_data; cdp: AsyncWebAutomation e collect_data_async")
+    parser.add_argument("--main", action="store_true",
+                        help="Roda o main.main() completo (planilha, workers, arquivos) em vez de só o collect_data")
+    parser.add_argument("--modo", choices=["detail", "list", "tabs"], default="detail", help="mode do collect_data")
+    parser.add_argument("--termos", nargs="+", default=["restaurante", "padaria", "farmacia"], help="Buscas a coletar")
+    parser.add_argument("--qtd", type=int, default=30, help="Quantidade de resultados por busca")
+    parser.add_argument("--workers", type=int, default=1, help="Workers no --main")
+    parser.add_argument("--prefetch", type=int, default=5, help="Cartões carregados à frente no modo detail")
+    parser.add_argument("--abas", type=int, default=4, help="Abas simultâneas no modo tabs")
+    parser.add_argument("--resultados", type=int, default=120, help="Estabelecimentos que cada busca encontra")
+    parser.add_argument("--lote", type=int, default=7, help="Cartões carregados a cada rolagem da lista")
+    parser.add_argument("--latencia-busca", type=float, default=0.3, help="Segundos até a lista aparecer")
+    parser.add_argument("--latencia-lote", type=float, default=0.2, help="Segundos para carregar cada lote de cartões")
+    parser.add_argument("--latencia-painel", type=float, default=0.4, help="Segundos para a janela de um lugar abrir")
+    parser.add_argument("--sobreposicao", type=float, default=0.0, help="Fração de lugares repetidos entre as buscas")
+    parser.add_argument("--janela", action="store_true", help="Mostra a janela do Chrome (padrão: headless)")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON onde o relatório é salvo")
+    return parser.parse_args(argv)
+
+def _iniciar_driver(args, cenario):
+    if args.driver == "fake":
+        return FakeWebAutomation(cenario)
+    driver = selenium_web.WebAutomation()
+    driver.startWebDriver(mostra_janela_chrome=args.janela)
+    return driver
+
+async def _iniciar_driver_async(args, cenario):
+    if args.driver == "fake":
+        return FakeAsyncWebAutomation(cenario)
+    from functions.utils.cdp_web import AsyncWebAutomation
+    return await AsyncWebAutomation().startWebDriver(mostra_janela_chrome=args.janela)
+
+def _memoria(driver=None):
+    """
+    Memória usada: pico das alocações Python (tracemalloc), pico do processo e do navegador.
+    """
+    memoria = {"python_pico_mb": tracemalloc.get_traced_memory()[1] / (1024 * 1024)}
+    if resource is not None:
+        # ru_maxrss vem em KB no Linux
+        memoria["processo_pico_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if driver is not None and hasattr(driver, "resource_usage"):
+        memoria["navegador_mb"] = driver.resource_usage()["rss_mb"]
+    return memoria
+
+def benchmark_collect(args, cenario, url_base):
+    """
+    Roda o collect_data para cada termo em um único driver e mede cada estabelecimento coletado.
+
+    Returns:
+        dict: relatório do benchmark
+    """
+    if args.backend == "cdp":
+        return asyncio.run(_benchmark_collect_async(args, cenario, url_base))
+    driver = _iniciar_driver(args, cenario)
+    itens = 0
+    inicio = time.perf_counter()
+    try:
+        for termo in args.termos:
+            ultimo = [time.perf_counter()]
+
+            def on_item(indice, dados):
+                agora = time.perf_counter()
+                registrar_duracao("bench_item", agora - ultimo[0])
+                ultimo[0] = agora
+
+            itens += len(collect_data(driver, termo, args.qtd, on_item=on_item, mode=args.modo, janela_abas=args.abas,
+                                      prefetch=args.prefetch, url_base=url_base))
+        segundos = time.perf_counter() - inicio
+        return _relatorio(args, itens, segundos, _memoria(driver))
+    finally:
+        driver.closer_chrome()
+
+async def _benchmark_collect_async(args, cenario, url_base):
+    """
+    Mesmo que o benchmark_collect, com o collect_data_async em uma página do AsyncWebAutomation.
+    """
+    navegador = await _iniciar_driver_async(args, cenario)
+    itens = 0
+    inicio = time.perf_counter()
+    try:
+        pagina = await navegador.new_page()
+        for termo in args.termos:
+            ultimo = [time.perf_counter()]
+
+            def on_item(indice, dados):
+                agora = time.perf_counter()
+                registrar_duracao("bench_item", agora - ultimo[0])
+                ultimo[0] = agora
+
+            itens += len(await collect_data_async(pagina, termo, args.qtd, on_item=on_item, mode=args.modo,
+                                                  janela_abas=args.abas, url_base=url_base))
+        segundos = time.perf_counter() - inicio
+        return _relatorio(args, itens, segundos, _memoria(navegador))
+    finally:
+        await navegador.closer_chrome()
+
+_CONFIG_MAIN = """
+[base]
+tentativas_maximas = 3
+workers = {workers}
+backend = "{backend}"
+mode = "{modo}"
+abas_simultaneas = {abas}
+cartoes_prefetch = {prefetch}
+url_google_maps = "{url_base}"
+cache_ttl_horas = 0
+pasta_perfis = "|Diretorio_atual|/profiles"
+
+[log]
+nivel = "WARNING"
+
+[arquivos]
+resultados_json = "|Diretorio_atual|/results/resultados.json"
+resultados_excel = "|Diretorio_atual|/results/resultados.xlsx"
+journal = "|Diretorio_atual|/results/journal.jsonl"
+metricas = "|Diretorio_atual|/results/metricas.json"
+cache = "|Diretorio_atual|/cache.sqlite"
+
+[planilha_atuacao]
+caminho_planilha = "|Diretorio_atual|/data.xlsx"
+nome_aba = "Plan1"
+coluna_estabeleciomento = "Estabelecimento"
+coluna_qtd = "Quantidade"
+"""
+
+def benchmark_main(args, cenario, url_base):
+    """
+    Roda o main.main() completo em uma pasta temporária, com a planilha montada a partir dos termos.
+
+    Returns:
+        dict: relatório do benchmark
+    """
+    import main
+    from openpyxl import Workbook
+
+    pasta_original = os.getcwd()
+    from functions.src import async_pool
+    web_automation_original = worker_pool.selenium_web.WebAutomation
+    async_web_automation_original = async_pool.cdp_web.AsyncWebAutomation
+    with tempfile.TemporaryDirectory() as pasta:
+        planilha = Workbook()
+        aba = planilha.active
+        aba.title = "Plan1"
+        aba.append(["Estabelecimento", "Quantidade"])
+        for termo in args.termos:
+            aba.append([termo, args.qtd])
+        planilha.save(os.path.join(pasta, "data.xlsx"))
+        with open(os.path.join(pasta, "config.toml"), "w", encoding="utf-8") as f:
+            f.write(_CONFIG_MAIN.format(workers=args.workers, backend=args.backend, modo=args.modo, abas=args.abas, prefetch=args.prefetch,
+                                        url_base=url_base))
+        try:
+            os.chdir(pasta)
+            if args.driver == "fake":
+                worker_pool.selenium_web.WebAutomation = lambda: FakeWebAutomation(cenario)
+                async_pool.cdp_web.AsyncWebAutomation = lambda: FakeAsyncWebAutomation(cenario)
+            inicio = time.perf_counter()
+            main.main(["--refresh"])
+            segundos = time.perf_counter() - inicio
+            with open(os.path.join(pasta, "results", "metricas.json"), encoding="utf-8") as f:
+                itens = json.load(f)["itens_coletados"]
+        finally:
+            worker_pool.selenium_web.WebAutomation = web_automation_original
+            async_pool.cdp_web.AsyncWebAutomation = async_web_automation_original
+            os.chdir(pasta_original)
+    return _relatorio(args, itens, segundos, _memoria())
+
+def _relatorio(args, itens, segundos, memoria):
+    fases = resumo()
+    # Latência por estabelecimento: intervalo entre itens no collect_data, ou abertura da janela/aba no main
+    latencia = fases.get("bench_item") or fases.get("card_open") or fases.get("tab_fetch") or {}
+    return {
+        "driver": args.driver,
+        "backend": args.backend,
+        "alvo": "main" if args.main else "collect_data",
+        "modo": args.modo,
+        "termos": len(args.termos),
+        "itens": itens,
+        "segundos": segundos,
+        "itens_por_segundo": itens / segundos if segundos else 0.0,
+        "latencia_item": {chave: latencia.get(chave, 0.0) for chave in ("p50", "p95", "max")},
+        "memoria": memoria,
+        "fases": fases,
+    }
+
+def _imprimir(relatorio):
+    print(f"Benchmark {relatorio['alvo']} ({relatorio['driver']}, backend {relatorio['backend']}, modo {relatorio['modo']})")
+    print(f"  itens: {relatorio['itens']} em {relatorio['segundos']:.2f}s -> {relatorio['itens_por_segundo']:.2f} itens/s")
+    latencia = relatorio["latencia_item"]
+    print(f"  latência por item: p50={latencia['p50']:.3f}s p95={latencia['p95']:.3f}s max={latencia['max']:.3f}s")
+    for nome, valor in relatorio["memoria"].items():
+        print(f"  {nome}: " + ("?" if valor is None else f"{valor:.1f}"))
+    for fase, estatisticas in sorted(relatorio["fases"].items()):
+        print(f"  {fase}: n={estatisticas['count']} p50={estatisticas['p50']:.3f}s p95={estatisticas['p95']:.3f}s "
+              f"max={estatisticas['max']:.3f}s")
+
+def main(argv=None):
+    args = ler_argumentos(argv)
+    cenario = CenarioMaps(resultados=args.resultados, lote=args.lote, latencia_busca=args.latencia_busca,
+                          latencia_lote=args.latencia_lote, latencia_painel=args.latencia_painel,
+                          sobreposicao=args.sobreposicao)
+    configurar_metricas()
+    tracemalloc.start()
+    servidor = ServidorMaps(cenario).iniciar() if args.driver == "chrome" else None
+    try:
+        url_base = servidor.url if servidor else "http://maps.local/maps"
+        relatorio = benchmark_main(args, cenario, url_base) if args.main else benchmark_collect(args, cenario, url_base)
+    finally:
+        if servidor:
+            servidor.parar()
+        tracemalloc.stop()
+
+    _imprimir(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=4, ensure_ascii=False)
+    return relatorio
+
+if __name__ == "__main__":
+    main()
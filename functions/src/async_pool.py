@@ -0,0 +1,164 @@
+from functions.utils import cdp_web
+from functions.src.google_map_async import collect_data_async
+from functions.src.worker_pool import _opcoes_coleta
+from functions.utils.logger import log_info, log_error, log_debug
+from functions.utils.metrics import medir, contar_item
+import asyncio
+import os
+
+async def coletar_categoria_async(navegador, pagina, establishment_type, qtd_results, tentativas_maximas, url_google_maps,
+                                  journal=None, cache=None, opcoes_coleta=None):
+    """
+    Versão assíncrona do coletar_categoria: coleta uma categoria, tentando de novo em caso de erro
+    e continuando do estabelecimento que falhou.
+
+    Como o navegador é compartilhado entre os workers, a recuperação nunca reinicia o navegador: na primeira falha
+    a página recarrega o Google Maps e nas seguintes o worker troca a página por uma nova.
+
+    Args:
+        navegador: AsyncWebAutomation principal, usado para abrir a página nova
+        pagina: página do worker
+        establishment_type: tipo de estabelecimento a ser buscado
+        qtd_results: quantidade de resultados a serem coletados
+        tentativas_maximas: número máximo de tentativas de coleta
+        url_google_maps: url aberta na recuperação
+        journal: diário em disco onde cada estabelecimento é gravado assim que é coletado
+        cache: cache de buscas onde o resultado completo da categoria é salvo
+        opcoes_coleta: argumentos extras repassados ao collect_data_async
+    Returns:
+        tupla (página em uso, dicionário com os dados coletados ou None caso todas as tentativas falhem)
+    """
+    tentativas = 0
+    parciais = {}
+    ja_coletados = journal.indices_coletados(establishment_type) if journal is not None else set()
+
+    async def on_item(indice, dados):
+        parciais[indice] = dados
+        contar_item()
+        # As gravações em disco (fsync do diário, sqlite do cache) rodam em uma thread para não travar o event loop
+        if journal is not None:
+            await asyncio.to_thread(journal.registrar_item, establishment_type, indice, dados)
+
+    while tentativas < tentativas_maximas:
+        try:
+            with medir("category"):
+                result_research = await collect_data_async(pagina, establishment_type, qtd_results,
+                                                           skip_indices=ja_coletados | set(parciais), on_item=on_item,
+                                                           **(opcoes_coleta or {}))
+            if journal is not None:
+                await asyncio.to_thread(journal.concluir_categoria, establishment_type)
+            result_research = dict(sorted({**parciais, **result_research}.items()))
+            if cache is not None and not ja_coletados:
+                await asyncio.to_thread(cache.salvar, establishment_type, qtd_results, result_research)
+            log_info("Dados coletados para o estabelecimento do tipo: %s", establishment_type)
+            log_debug("Dados coletados: %s", result_research)
+            return pagina, result_research
+        except Exception as e:
+            log_error("Erro ao coletar dados: %s", e)
+            tentativas += 1
+            log_info("%s estabelecimento(s) já coletados nesta categoria serão mantidos", len(parciais))
+            pagina = await _recuperar(navegador, pagina, tentativas, url_google_maps)
+    log_error("Número máximo de tentativas atingido para o estabelecimento do tipo: %s", establishment_type)
+    return pagina, None
+
+async def _recuperar(navegador, pagina, tentativas, url_google_maps):
+    """
+    Recupera a página do worker depois de uma falha: recarrega o Google Maps na primeira falha
+    e troca a página por uma nova nas seguintes.
+
+    Returns:
+        a página que o worker deve usar daqui em diante
+    """
+    if tentativas == 1:
+        try:
+            log_info("Recarregando o Google Maps para refazer a busca")
+            with medir("open_url"):
+                await pagina.open_url(url_google_maps)
+            return pagina
+        except Exception as e:
+            log_error("Erro ao recarregar o Google Maps: %s", e)
+    log_info("Trocando a página do worker por uma nova")
+    with medir("browser_restart"):
+        try:
+            await pagina.close_page()
+        except Exception as e:
+            log_error("Erro ao fechar a página do worker: %s", e)
+        pagina = await navegador.new_page()
+    with medir("open_url"):
+        await pagina.open_url(url_google_maps)
+    return pagina
+
+async def _worker(numero, navegador, fila, resultados, config, url_google_maps, journal=None, cache=None, place_index=None,
+                  controlador=None, anteriores=None):
+    """
+    Worker assíncrono: abre a sua própria página no navegador compartilhado e consome categorias da fila até ela esvaziar.
+    """
+    try:
+        pagina = await navegador.new_page()
+        with medir("open_url"):
+            await pagina.open_url(url_google_maps)
+    except Exception as e:
+        log_error("Erro ao abrir a página do worker %s: %s", numero, e)
+        return
+
+    try:
+        while True:
+            tarefa = fila.proxima()
+            if tarefa is None:
+                break
+            posicao, establishment_type, qtd_results = tarefa
+            result_research = None
+            try:
+                pagina, result_research = await coletar_categoria_async(
+                    navegador, pagina, establishment_type, qtd_results, config["base"]["tentativas_maximas"],
+                    url_google_maps, journal, cache, _opcoes_coleta(config, place_index, controlador, anteriores))
+            except Exception as e:
+                log_error("Erro fatal no worker ao coletar %s: %s", establishment_type, e)
+                break
+            finally:
+                fila.finalizar(tarefa, result_research)
+            if result_research is not None:
+                resultados[posicao] = (establishment_type, result_research)
+    finally:
+        await pagina.close_page()
+
+async def _rodar(qtd_workers, fila, config, url_google_maps, journal, cache, place_index, controlador, anteriores):
+    resultados = {}
+    pasta_perfis = config["base"].get("pasta_perfis")
+    navegador = cdp_web.AsyncWebAutomation()
+    log_info("Iniciando o navegador (backend cdp)")
+    with medir("driver_start"):
+        await navegador.startWebDriver(user_data_dir=os.path.join(pasta_perfis, "cdp") if pasta_perfis else None,
+                                       lean_mode=config["base"].get("lean_mode", False),
+                                       debugger_address=config["base"].get("debugger_address") or None,
+                                       caminho_chrome=config["base"].get("caminho_chrome") or None)
+    try:
+        await asyncio.gather(*(_worker(numero, navegador, fila, resultados, config, url_google_maps, journal, cache,
+                                       place_index, controlador, anteriores)
+                               for numero in range(1, qtd_workers + 1)))
+    finally:
+        log_info("Fechando o navegador")
+        await navegador.closer_chrome()
+    return resultados
+
+def executar_workers_async(qtd_workers, fila, config, url_google_maps, journal=None, cache=None, place_index=None,
+                           controlador=None, anteriores=None):
+    """
+    Roda os workers como corrotinas de um único event loop, sobre um único Chrome controlado pelo DevTools Protocol:
+    cada worker usa a sua própria página e todas as páginas compartilham a mesma conexão websocket.
+
+    Args:
+        qtd_workers: quantidade de workers (categorias coletadas ao mesmo tempo)
+        fila: fila local com as tarefas (posicao, establishment_type, qtd_results)
+        config: configuração carregada do config.toml
+        url_google_maps: url inicial das páginas
+        journal: diário em disco onde cada estabelecimento é gravado
+        cache: cache de buscas
+        place_index: índice de lugares compartilhado entre os workers
+        controlador: controlador de vazão compartilhado entre os workers
+        anteriores: resultados da execução anterior, na atualização incremental
+    Returns:
+        dicionário {posicao: (establishment_type, resultado)} das categorias coletadas
+    """
+    return asyncio.run(_rodar(qtd_workers, fila, config, url_google_maps, journal, cache, place_index, controlador,
+                              anteriores))
@@ -1,16 +1,517 @@
-from selenium.webdriver.common.by import By
-from functions.utils.logger import log_info, log_error
+from functions.utils.logger import log_info, log_error, log_debug
+from functions.utils.metrics import medir, registrar_bytes, registrar_duracao
+from functions.utils.selector_registry import SELETORES, XPATH, CSS_SELECTOR, registrar_extracao
+from functions.src.place_index import identidade_lugar
+from contextlib import nullcontext
+from urllib.parse import quote_plus, urlencode
+import re
 import time
 
-def collect_data(driver, establishment_type_search, qtd_results = 10):
+# Endereço base das buscas feitas direto pela URL
+GOOGLE_MAPS_URL = "https://www.google.com/maps"
+
+# XPaths dos elementos da página
+SEARCH_INPUT_XPATH = "//input[contains(@class ,'searchboxinput')]"
+ESTABLISHMENT_NAME_XPATH = "//h1[contains(@class ,'DUwDvf lfPIob')]"
+ESTABLISHMENT_TYPE_XPATH = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[2]/div[2]/div/div[1]/div[2]/div/div[2]/span/span/button"
+ESTABLISHMENT_RATE_XPATH = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[2]/div[2]/div/div[1]/div[2]/div/div[1]/div[2]/span[1]/span[1]"
+ESTABLISHMENT_AVALIATION_COUNT_XPATH = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[2]/div[2]/div/div[1]/div[2]/div/div[1]/div[2]/span[2]/span/span"
+ESTABLISHMENT_ADDRESS_XPATH = "//*[contains(@data-item-id ,'address')]/div/div[2]/div[1]"
+CLOSE_BUTTON_XPATH = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[1]/div/div/div[3]/span/button"
+
+# Seletores CSS da lista de resultados, usados no modo "list"
+RESULTS_FEED_CSS = "div[role='feed']"
+RESULT_ARTICLE_CSS = "div[role='feed'] div[role='article']"
+# Marcador "Você chegou ao final da lista." que aparece no fim da lista de resultados
+RESULTS_END_CSS = "div[role='feed'] span.HlvSq"
+
+# Seletores do registro: cada campo tenta primeiro os seletores CSS/aria curtos e, se o layout mudar, os XPaths acima.
+# Os obrigatórios interrompem a coleta quando nenhuma variante é encontrada em várias buscas seguidas
+SEARCH_INPUT = SELETORES.registrar("search_input", (CSS_SELECTOR, "input#searchboxinput"),
+                                   (XPATH, SEARCH_INPUT_XPATH), obrigatorio=True)
+RESULTS_FEED = SELETORES.registrar("results_feed", (CSS_SELECTOR, RESULTS_FEED_CSS))
+CLOSE_BUTTON = SELETORES.registrar("close_button", (CSS_SELECTOR, "div[role='main'] button[aria-label='Fechar'], div[role='main'] button[aria-label='Close']"),
+                                   (XPATH, CLOSE_BUTTON_XPATH), obrigatorio=True)
+ESTABLISHMENT_NAME = SELETORES.registrar("establishment_name", (CSS_SELECTOR, "h1.DUwDvf"),
+                                         (XPATH, ESTABLISHMENT_NAME_XPATH), obrigatorio=True)
+ESTABLISHMENT_TYPE = SELETORES.registrar("establishment_type", (CSS_SELECTOR, "button.DkEaL"),
+                                         (XPATH, ESTABLISHMENT_TYPE_XPATH))
+ESTABLISHMENT_RATE = SELETORES.registrar("establishment_rate", (CSS_SELECTOR, "div.F7nice > span > span[aria-hidden='true']"),
+                                         (XPATH, ESTABLISHMENT_RATE_XPATH))
+ESTABLISHMENT_AVALIATION_COUNT = SELETORES.registrar("establishment_avaliation_count",
+                                                     (CSS_SELECTOR, "div.F7nice span[aria-label*='avalia'], div.F7nice span[aria-label*='review']"),
+                                                     (XPATH, ESTABLISHMENT_AVALIATION_COUNT_XPATH))
+ESTABLISHMENT_ADDRESS = SELETORES.registrar("establishment_address", (CSS_SELECTOR, "button[data-item-id='address'] div.Io6YTe"),
+                                            (XPATH, ESTABLISHMENT_ADDRESS_XPATH))
+
+# Campos da janela do estabelecimento, lidos todos juntos em uma única chamada ao navegador
+DETAIL_SELECTORS = {
+    "establishment_name": ESTABLISHMENT_NAME,
+    "establishment_type": ESTABLISHMENT_TYPE,
+    "establishment_rate": ESTABLISHMENT_RATE,
+    "establishment_avaliation_count": ESTABLISHMENT_AVALIATION_COUNT,
+    "establishment_address": ESTABLISHMENT_ADDRESS,
+}
+
+# Script que rola a lista de resultados até o fim enquanto faltam cartões
+# e devolve quantos cartões já estão carregados e se o fim da lista apareceu
+_SCROLL_FEED_JS = """
+    const feed = document.querySelector(arguments[0]);
+    if (!feed) { return {count: -1, fim: false}; }
+    const count = document.querySelectorAll(arguments[1]).length;
+    const ultimo = feed.lastElementChild ? (feed.lastElementChild.innerText || "") : "";
+    const fim = !!document.querySelector(arguments[3]) || /final da lista|end of the list/i.test(ultimo);
+    if (count < arguments[2] && !fim) { feed.scrollTop = feed.scrollHeight; }
+    return {count: count, fim: fim};
+"""
+
+# Script que identifica páginas de bloqueio do Google: captcha ("/sorry/", reCAPTCHA) ou tela de consentimento de cookies
+_BLOQUEIO_JS = """
+    if (location.href.includes("/sorry/") || document.querySelector("iframe[src*='recaptcha'], #captcha-form")) { return "captcha"; }
+    if (location.hostname.startsWith("consent.") || document.querySelector("form[action*='consent.google']")) { return "consentimento"; }
+    return null;
+"""
+
+# Script que lê o texto, o nome (aria-label) e o link da página dos cartões [inicio, fim) da lista de uma vez
+_HARVEST_CARDS_JS = """
+    return Array.from(document.querySelectorAll(arguments[0])).slice(arguments[1], arguments[2]).map(card => {
+        const link = card.querySelector("a[href*='/maps/place/']");
+        return {
+            name: card.getAttribute("aria-label") || "",
+            text: (card.innerText || "").trim(),
+            url: link ? link.href : "",
+        };
+    });
+"""
+
+# Script que devolve os elementos dos cartões [inicio, fim) da lista, para o modo "detail" clicar no próprio cartão lido
+_CARD_ELEMENTS_JS = """
+    return Array.from(document.querySelectorAll(arguments[0])).slice(arguments[1], arguments[2]);
+"""
+
+# Nota e quantidade de avaliações como aparecem no cartão, ex: "4,5(1.234)"
+_RATE_COUNT_RE = re.compile(r"^(\d,\d)\s*(\([\d.]+\))")
+
+def _painel_carregado(campos, card_text):
+    """
+        Verifica se a janela do estabelecimento aberta corresponde ao cartão clicado.
+
+        Args:
+            campos: dicionário retornado pelo extract_fields da janela
+            card_text: texto do cartão clicado na lista de resultados
+        Returns:
+            os campos, caso o nome da janela esteja no texto do cartão, ou False
+    """
+    establishment_name = campos.get("establishment_name", "")
+    if establishment_name and establishment_name in card_text:
+        return campos
+    return False
+
+def parse_card_text(card_text, card_name = ""):
+    """
+        Extrai os dados de um estabelecimento a partir do texto do cartão da lista de resultados.
+        O cartão vem no formato:
+            Nome
+            4,5(1.234)
+            Restaurante · $$ · Av. Exemplo, 123
+            Aberto ⋅ Fecha às 23:00
+
+        Args:
+            card_text: texto do cartão
+            card_name: nome do estabelecimento (aria-label do cartão), usado quando disponível
+        Returns:
+            dicionário no mesmo formato dos dados coletados pela janela do estabelecimento.
+            Campos não encontrados no cartão voltam como "".
+    """
+    linhas = [linha.strip() for linha in card_text.splitlines() if linha.strip()]
+    dados = {
+        "establishment_name": card_name or (linhas[0] if linhas else ""),
+        "establishment_type": "",
+        "establishment_rate": "",
+        "establishment_avaliation_count": "",
+        "establishment_address": "",
+    }
+    for posicao, linha in enumerate(linhas):
+        rate_count = _RATE_COUNT_RE.match(linha)
+        if not rate_count:
+            continue
+        dados["establishment_rate"] = rate_count.group(1)
+        dados["establishment_avaliation_count"] = rate_count.group(2)
+        # A linha seguinte à nota traz o tipo e o endereço separados por "·"; o meio pode ser a faixa de preço
+        if posicao + 1 < len(linhas):
+            partes = [parte.strip() for parte in linhas[posicao + 1].split("·") if parte.strip()]
+            if partes:
+                dados["establishment_type"] = partes[0]
+            if len(partes) > 1 and any(c.isdigit() for c in partes[-1]):
+                dados["establishment_address"] = partes[-1]
+        break
+    return dados
+
+def _identidade_cartao(card_text, card_name = "", card_url = ""):
+    """
+        Calcula a identidade do lugar a partir do cartão da lista de resultados (link, ou nome e endereço do cartão).
+    """
+    dados = parse_card_text(card_text, card_name)
+    return identidade_lugar(dados["establishment_name"], dados["establishment_address"], card_url)
+
+def detectar_bloqueio(driver):
+    """
+        Verifica se o navegador está em uma página de bloqueio do Google (captcha ou consentimento de cookies).
+
+        Args:
+            driver: driver do navegador
+        Returns:
+            "captcha", "consentimento" ou None
+    """
+    try:
+        return driver.execute_script(_BLOQUEIO_JS)
+    except Exception:
+        return None
+
+def _tipo_falha(driver, erro):
+    """
+        Classifica a falha de uma página (busca, janela ou aba) para o controlador de vazão.
+
+        Args:
+            driver: driver do navegador
+            erro: exceção levantada ao carregar a página
+        Returns:
+            "bloqueio" se o navegador está em uma página de captcha/consentimento, "timeout" ou "erro"
+    """
+    if detectar_bloqueio(driver):
+        return "bloqueio"
+    if isinstance(erro, TimeoutError) or type(erro).__name__ == "TimeoutException" or str(erro).startswith("Timeout"):
+        return "timeout"
+    return "erro"
+
+def _medir_bytes_pagina(driver, pagina, descricao):
+    """
+        Registra nas métricas quantos bytes a página atual do driver transferiu pela rede.
+
+        Args:
+            driver: driver do navegador, já na aba da página
+            pagina: tipo da página nas métricas ("busca" ou "estabelecimento")
+            descricao: identificação da página nos logs (termo buscado ou posição do estabelecimento)
+    """
+    try:
+        transferidos = driver.page_transfer_bytes()
+    except Exception as e:
+        log_error("Erro ao medir os bytes transferidos pela página de %s %s: %s", pagina, descricao, e)
+        return
+    registrar_bytes(pagina, transferidos)
+    log_debug("Bytes transferidos pela página de %s %s: %s", pagina, descricao, transferidos)
+
+def montar_url_busca(termo, idioma = None, viewport = None, url_base = GOOGLE_MAPS_URL):
+    """
+        Monta a URL de busca do Google Maps para um termo, para abrir a busca direto sem digitar no campo de pesquisa.
+
+        Args:
+            termo: texto da busca (ex: "restaurante")
+            idioma: idioma da página (ex: "pt-BR"), opcional
+            viewport: centro e zoom do mapa no formato "latitude,longitude,zoomz" (ex: "-23.5505,-46.6333,12z"), opcional
+            url_base: endereço do Google Maps
+        Returns:
+            a URL da busca, ex: "https://www.google.com/maps/search/restaurante/@-23.5505,-46.6333,12z?hl=pt-BR"
+    """
+    url = f"{url_base.rstrip('/')}/search/{quote_plus(str(termo).strip())}/"
+    if viewport:
+        url += viewport if viewport.startswith("@") else f"@{viewport}"
+    if idioma:
+        url += "?" + urlencode({"hl": idioma})
+    return url
+
+def _carregar_feed(driver, alvo, timeout = 30):
+    """
+        Rola a lista de resultados até ter pelo menos "alvo" cartões carregados ou a lista acabar.
+        A lista só é considerada no fim quando o marcador de fim do Google Maps aparece; se o tempo acabar antes,
+        quem chamou recebe menos cartões que o alvo sem o fim da lista.
+
+        Args:
+            driver: driver do navegador
+            alvo: quantidade de cartões que precisam estar carregados
+            timeout: tempo máximo (segundos) esperando a lista carregar mais cartões
+        Returns:
+            tupla (quantidade de cartões carregados, se a lista chegou ao fim)
+    """
+    estado = {"count": 0, "fim": False}
+
+    def carregado():
+        resultado = driver.execute_script(_SCROLL_FEED_JS, RESULTS_FEED_CSS, RESULT_ARTICLE_CSS, alvo, RESULTS_END_CSS)
+        estado["count"], estado["fim"] = resultado["count"], resultado["fim"]
+        return estado["count"] >= alvo or estado["fim"]
+
+    with medir("feed_load"):
+        driver.wait_condition(carregado, timeout=timeout)
+    return max(estado["count"], 0), estado["fim"]
+
+def iter_feed_cards(driver, qtd_results, prefetch = 5, timeout = 30, elementos = False):
+    """
+        Percorre os cartões da lista de resultados, rolando a lista à frente de quem consome o gerador
+        para que sempre existam "prefetch" cartões já carregados além do atual.
+        Os cartões são lidos em lotes, uma chamada ao navegador por lote.
+
+        Args:
+            driver: driver do navegador
+            qtd_results: quantidade de cartões desejada
+            prefetch: quantidade de cartões carregados à frente do atual
+            timeout: tempo máximo (segundos) esperando a lista carregar cada lote
+            elementos: se True cada cartão traz também o elemento da página ("elemento"), para ser clicado
+        Returns:
+            Generator de (indice, {"name", "text", "url"}). Termina antes de qtd_results só se a lista acabar.
+        Raises:
+            ValueError: caso a lista pare de carregar cartões sem o marcador de fim da lista
+    """
+    lote = []
+    inicio_lote = 0
+    carregados = 0
+    fim = False
+    for i in range(qtd_results):
+        # Quando restam poucos cartões carregados à frente, a lista é rolada até o atual + prefetch (sem passar do pedido)
+        if not fim and carregados < qtd_results and carregados <= i + prefetch // 2:
+            carregados, fim = _carregar_feed(driver, min(qtd_results, i + 1 + prefetch), timeout)
+        if i >= inicio_lote + len(lote):
+            # Os cartões carregados e ainda não lidos são lidos de uma vez
+            if i >= carregados:
+                if not fim:
+                    # Sem o marcador de fim a lista pode só estar lenta: a categoria falha e é tentada de novo
+                    raise ValueError(f"Timeout ao carregar a lista de resultados: {carregados} de {qtd_results} cartões carregados")
+                log_info("A lista de resultados terminou com %s estabelecimentos", carregados)
+                return
+            inicio_lote = i
+            lote = driver.execute_script(_HARVEST_CARDS_JS, RESULT_ARTICLE_CSS, i, min(qtd_results, carregados)) or []
+            if elementos:
+                for card, elemento in zip(lote, driver.execute_script(_CARD_ELEMENTS_JS, RESULT_ARTICLE_CSS, i, i + len(lote)) or []):
+                    card["elemento"] = elemento
+            if not lote:
+                raise ValueError(f"Não foi possível ler os cartões da lista de resultados a partir do {i+1}")
+        yield i, lote[i - inicio_lote]
+
+def harvest_cards(driver, qtd_results, timeout = 30, elementos = False):
+    """
+        Rola a lista de resultados até ter a quantidade de cartões pedida (ou a lista acabar)
+        e lê todos os cartões em uma única chamada ao navegador.
+
+        Args:
+            driver: driver do navegador
+            qtd_results: quantidade de cartões desejada
+            timeout: tempo máximo (segundos) esperando a lista carregar mais cartões
+            elementos: se True cada cartão traz também o elemento da página ("elemento")
+        Returns:
+            lista com {"name", "text", "url"} de cada cartão, na ordem da lista
+    """
+    return [card for _, card in iter_feed_cards(driver, qtd_results, prefetch=qtd_results, timeout=timeout, elementos=elementos)]
+
+def _coletar_em_abas(driver, pendentes, janela_abas, window_timeout, on_done, controlador = None, ja_coletado = None):
+    """
+        Abre as páginas dos estabelecimentos em várias abas ao mesmo tempo e lê cada uma assim que carrega.
+        Quando uma aba termina ela é reaproveitada para o próximo estabelecimento da fila.
+
+        Args:
+            driver: driver do navegador
+            pendentes: lista de (indice, cartao) com os cartões vindos do harvest_cards
+            janela_abas: quantidade máxima de abas carregando ao mesmo tempo
+            window_timeout: tempo máximo (segundos) para a página de um estabelecimento carregar
+            on_done: função chamada com (indice, dados) para cada estabelecimento lido
+            controlador: controlador de vazão consultado antes de abrir cada página; cada aba carregando ocupa uma vaga
+                         de concorrência e o resultado de cada aba (sucesso e latência, ou falha) é informado a ele
+            ja_coletado: função chamada com (indice, cartao) logo antes de abrir cada aba; se ela retornar True
+                         o estabelecimento já foi resolvido (ex: coletado em outra categoria) e a aba não é aberta
+        Raises:
+            ValueError: caso algum cartão não tenha link ou alguma página não carregue a tempo
+    """
+    fila = list(pendentes)
+    sem_link = [indice + 1 for indice, cartao in fila if not cartao.get("url")]
+    if sem_link:
+        raise ValueError(f"Cartões sem link para a página do estabelecimento: {sem_link}")
+
+    def proximo():
+        # Próximo estabelecimento da fila que ainda precisa ser aberto, já com a vaga de concorrência reservada,
+        # ou None se a fila acabou ou não há vaga. Os já coletados saem da fila sem ocupar vaga. A vaga é pedida
+        # sem esperar porque as abas já abertas por este worker seguram vagas: esperar aqui poderia travar os
+        # workers uns nos outros
+        while fila:
+            if ja_coletado is not None and ja_coletado(*fila[0]):
+                fila.pop(0)
+                continue
+            if controlador is not None and not controlador.tentar_vaga():
+                return None
+            return fila.pop(0)
+        return None
+
+    aba_principal = driver.current_tab()
+    em_andamento = {} # aba -> (indice, cartao, hora de início); cada aba segura uma vaga do controlador
+    try:
+        while fila or em_andamento:
+            # Completa a janela de abas carregando
+            while fila and len(em_andamento) < janela_abas:
+                seguinte = proximo()
+                if seguinte is None:
+                    break
+                indice, cartao = seguinte
+                try:
+                    if controlador is not None:
+                        controlador.aguardar()
+                    log_info("Abrindo aba do estabelecimento: %s", indice+1)
+                    driver.switch_to_tab(aba_principal)
+                    em_andamento[driver.open_tab(cartao["url"])] = (indice, cartao, time.monotonic())
+                except Exception:
+                    if controlador is not None:
+                        controlador.liberar_vaga()
+                    raise
+
+            # Passa pelas abas lendo as que já carregaram
+            for aba, (indice, cartao, inicio) in list(em_andamento.items()):
+                driver.switch_to_tab(aba)
+                # A leitura só entra nas estatísticas dos seletores quando a aba termina de carregar ou estoura o tempo
+                leitura = driver.extract_fields(DETAIL_SELECTORS, registrar=False)
+                campos = _painel_carregado(leitura, cartao["text"])
+                if not campos:
+                    if time.monotonic() - inicio > window_timeout:
+                        registrar_extracao(DETAIL_SELECTORS, leitura)
+                        erro = ValueError(f"Timeout ao carregar a página do estabelecimento: {indice+1}")
+                        if controlador is not None:
+                            controlador.registrar_falha(_tipo_falha(driver, erro))
+                        raise erro
+                    continue
+                registrar_extracao(DETAIL_SELECTORS, campos)
+                registrar_duracao("tab_fetch", time.monotonic() - inicio)
+                _medir_bytes_pagina(driver, "estabelecimento", indice+1)
+                if controlador is not None:
+                    controlador.registrar_sucesso(time.monotonic() - inicio)
+                on_done(indice, {
+                    "establishment_name": campos["establishment_name"],
+                    "establishment_type": campos["establishment_type"],
+                    "establishment_rate": campos["establishment_rate"],
+                    "establishment_avaliation_count": campos["establishment_avaliation_count"],
+                    "establishment_address": campos["establishment_address"]
+                })
+                del em_andamento[aba]
+                if controlador is not None:
+                    controlador.liberar_vaga()
+                # Reaproveita a aba para o próximo da fila, em vez de fechar e abrir outra
+                seguinte = proximo()
+                if seguinte is not None:
+                    proximo_indice, proximo_cartao = seguinte
+                    if controlador is not None:
+                        controlador.aguardar()
+                    log_info("Reaproveitando aba para o estabelecimento: %s", proximo_indice+1)
+                    em_andamento[aba] = (proximo_indice, proximo_cartao, time.monotonic())
+                    driver.navigate_tab(proximo_cartao["url"])
+                else:
+                    driver.close_tab(aba)
+            time.sleep(driver.POLL_FREQUENCY)
+    finally:
+        if controlador is not None:
+            for _ in em_andamento:
+                controlador.liberar_vaga()
+        for aba in em_andamento:
+            driver.close_tab(aba)
+        driver.switch_to_tab(aba_principal)
+
+def _coletar_janela(driver, i, card, window_timeout):
+    """
+        Abre a janela de um estabelecimento da lista de resultados, coleta os dados e fecha a janela.
+
+        Args:
+            driver: driver do navegador
+            i: posição do estabelecimento nos resultados (usado nos logs)
+            card: cartão da lista de resultados lido pelo iter_feed_cards com elementos=True
+            window_timeout: tempo máximo (segundos) para a janela abrir ou fechar
+        Returns:
+            dicionário com os dados do estabelecimento
+        Raises:
+            ValueError: caso a janela não carregue
+    """
+    # Variável para verificar se a janela do estabelecimento foi carregada
+    window_loaded = False
+    # Número máximo de tentativas de abrir a janela do estabelecimento
+    max_attempts = 3
+    attempts = 0
+    # O clique é no próprio elemento do cartão lido, e não pela posição na lista, que muda com separadores e anúncios
+    cartao = card["elemento"]
+    text = card["text"]
+
+    # Nessa eu faço um loop para garantir que a janela do estabelecimento foi carregada
+    inicio_abertura = time.perf_counter()
+    while not window_loaded and attempts < max_attempts:
+        log_info("Abrindo janela do estabelecimento: %s", i+1)
+        driver.scroll_to_element(element=cartao)
+        driver.click_on_element(element=cartao)
+        # Aqui para entender se a Janela foi carregada ou não, eu estou usando o nome do estabelecimento que vem do cartão e do establishment_name, onde no cartão ele já vem com a maioria das informações do estabelecimento, porém não todas, então eu abro o cartão do estabelecimento e coleto o nome do estabelecimento que abriu no cartão, caso esse nome estaja dentro do texto do cartão, significa que a janela foi carregada com sucesso, caso contrário ele tentará abrir novamente o cartão.
+        # Cada verificação já lê todos os campos da janela de uma vez, então quando a janela carrega os dados já estão em mãos.
+        # As verificações não entram nas estatísticas dos seletores, só a leitura final (ou a última, se a janela não carregar)
+        leitura = {}
+
+        def janela_carregada():
+            leitura["campos"] = driver.extract_fields(DETAIL_SELECTORS, registrar=False)
+            return _painel_carregado(leitura["campos"], text)
+
+        campos = driver.wait_condition(janela_carregada, timeout=window_timeout)
+        if campos:
+            log_info("Janela carregada, nome do lugar: %s", campos['establishment_name'])
+            window_loaded = True
+        else:
+            registrar_extracao(DETAIL_SELECTORS, leitura.get("campos", {}))
+            log_error("Não foi possível encontrar o nome do estabelecimento na janela")
+            log_error("Tentativa %s de %s", attempts+1, max_attempts)
+            attempts += 1
+    registrar_duracao("card_open", time.perf_counter() - inicio_abertura)
+
+    # Caso a janela não tenha sido carregada, a automação levanta um erro de timeout
+    if not window_loaded:
+        raise ValueError(f"Timeout ao carregar a janela do estabelecimento: {i+1}")
+
+    log_info("Janela do estabelecimento carregada com sucesso")
+    establishment_name = campos["establishment_name"]
+    # O endereço é um dos últimos blocos a renderizar na janela, então se ele ainda não veio eu espero ele aparecer e leio os campos de novo
+    # (alguns lugares não têm endereço, por isso a espera é curta)
+    with medir("card_extract"):
+        if not campos["establishment_address"] and driver.wait_element(seletor=ESTABLISHMENT_ADDRESS, timeout=2):
+            campos = driver.extract_fields(DETAIL_SELECTORS, registrar=False)
+        registrar_extracao(DETAIL_SELECTORS, campos)
+
+    # Aqui eu fecho a janela do estabelecimento, para garantir que a automação não confuda o cartão do proximo estabelecimento com do cartão que acabei de coletar os dados.
+    with medir("card_close"):
+        driver.click_on_element(seletor=CLOSE_BUTTON)
+        driver.wait_element_gone(seletor=ESTABLISHMENT_NAME, timeout=window_timeout)
+
+    # Aqui eu pego o resto das informações, como o tipo do estabelecimento, a nota da avaliação, a quantidade de avaliações e o endereço completo do estabelecimento.
+    return {
+        "establishment_name": establishment_name,
+        "establishment_type": campos["establishment_type"],
+        "establishment_rate": campos["establishment_rate"],
+        "establishment_avaliation_count": campos["establishment_avaliation_count"],
+        "establishment_address": campos["establishment_address"]
+    }
+
+def collect_data(driver, establishment_type_search, qtd_results = 10, skip_indices = None, on_item = None, mode = "detail", janela_abas = 4,
+                 place_index = None, prefetch = 5, busca_direta = True, idioma = None, viewport = None,
+                 controlador = None, url_base = GOOGLE_MAPS_URL, anteriores = None):
     """
-        Recebe um tipo de estabelecimento e faz a consulta dele no google maps, 
+        Recebe um tipo de estabelecimento e faz a consulta dele no google maps,
         depois coleta os dados de cada estabelecimento encontrado conforme a quantidade informada.
 
         Args:
             driver: driver do navegador
             establishment_type_search: tipo de estabelecimento a ser buscado
             qtd_results: quantidade de resultados a serem coletados
+            skip_indices: índices já coletados em uma execução anterior, que não serão abertos novamente
+            on_item: função chamada com (indice, dados) assim que cada estabelecimento é coletado
+            mode: "detail" abre a janela de cada estabelecimento; "list" lê os dados direto dos cartões
+                  da lista e só abre a janela dos estabelecimentos com campos faltando;
+                  "tabs" abre as páginas dos estabelecimentos em várias abas ao mesmo tempo
+            janela_abas: quantidade de abas carregando ao mesmo tempo no modo "tabs"
+            place_index: índice de lugares compartilhado entre as categorias; lugares já coletados
+                         em outra categoria são reaproveitados sem abrir a janela
+            prefetch: quantidade de cartões mantidos carregados à frente do atual no modo "detail"
+            busca_direta: se True a busca é aberta direto pela URL; se False o texto é digitado no campo de pesquisa
+            idioma: idioma da página na busca direta (ex: "pt-BR")
+            viewport: centro e zoom do mapa na busca direta (ex: "-23.5505,-46.6333,12z")
+            controlador: controlador de vazão compartilhado entre os workers: cada busca, janela ou aba ocupa uma vaga
+                         de concorrência enquanto carrega e tem o resultado (sucesso e latência, ou falha) informado a ele
+            url_base: endereço do Google Maps usado na busca direta
+            anteriores: resultados da execução anterior (atualização incremental); lugares cujo cartão tem a mesma
+                        nota e quantidade de avaliações da execução anterior são reaproveitados sem abrir a janela
         Returns:
             dicionário com os dados coletados
         Raises:
@@ -23,125 +524,203 @@ def collect_data(driver, establishment_type_search, qtd_results = 10):
             WebDriverWaitTimeoutException: caso ocorra um timeout ao coletar os dados
             WebDriverWaitTimeoutException: caso ocorra um timeout ao coletar os dados
     """
-    # XPaths dos elementos da página
-    search_input_xpath = "//input[contains(@class ,'searchboxinput')]"
-    establishment_name_xpath = "//h1[contains(@class ,'DUwDvf lfPIob')]"
-    establishment_type_xpath = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[2]/div[2]/div/div[1]/div[2]/div/div[2]/span/span/button"
-    establishment_rate_xpath = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[2]/div[2]/div/div[1]/div[2]/div/div[1]/div[2]/span[1]/span[1]"
-    establishment_avaliation_count_xpath = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[2]/div[2]/div/div[1]/div[2]/div/div[1]/div[2]/span[2]/span/span"
-    establishment_address_xpath = "//*[contains(@data-item-id ,'address')]/div/div[2]/div[1]"
-    close_button_xpath = "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[1]/div/div/div[3]/span/button"
-
     # Variáveis de controle
     search_loaded = False # Variável para verificar se a página de busca foi carregada
-    index_inicial_result = 3 # Índice inicial dos resultados na página de busca
-    max_load_attemps = 5 # Número máximo de tentativas de carregamento da página de busca
-    load_attemps = 0 # Variável para o número de tentativas de carregamento da página de busca
-    establishment_name = None # Variável para o nome do estabelecimento
-    establishment_type = None # Variável para o tipo do estabelecimento
-    establishment_rate = None # Variável para a taxa do estabelecimento
-    establishment_avaliation_count = None # Variável para a quantidade de avaliações do estabelecimento
-    establishment_address = None # Variável para o endereço do estabelecimento
+    search_timeout = 15 # Tempo máximo (segundos) para a página de busca processar a pesquisa
+    window_timeout = 10 # Tempo máximo (segundos) para a janela do estabelecimento abrir ou fechar
+    raw_cards = [] # Cartões lidos da lista, com o elemento de cada um (modo "list")
+    cards = [] # Dados lidos direto dos cartões da lista (modo "list")
+    identidades = [] # Identidade de cada cartão da lista, usada no índice de lugares (modo "list")
     result_research = {} # Variável para armazenar os resultados da busca
+    skip_indices = skip_indices or set() # Índices que já foram coletados e podem ser pulados
+
+    log_info("Iniciando a coleta de dados para o estabelecimento do tipo: %s", establishment_type_search)
+    # A busca ocupa uma vaga do controlador de vazão enquanto a página carrega
+    with controlador.vaga() if controlador is not None else nullcontext():
+        if controlador is not None:
+            controlador.aguardar()
+        inicio_busca = time.monotonic()
+        if busca_direta:
+            # A busca é aberta direto pela URL, sem digitar no campo de pesquisa e sem esperar a página inicial do google maps
+            url_busca = montar_url_busca(establishment_type_search, idioma, viewport, url_base)
+            log_info("Abrindo a busca: %s", url_busca)
+            with medir("search_open"):
+                driver.open_url(url_busca, wait_load=False)
+        else:
+            # A automação espera a página do google maps ser totalmente carregada antes de iniciar as buscas
+            log_info("Aguardando o carregamento da página")
+            driver.wait_page_load(timeout=60)
 
-    # A automação espera a página do google maps ser totalmente carregada antes de iniciar as buscas
-    log_info(f"Iniciando a coleta de dados para o estabelecimento do tipo: {establishment_type_search}")
-    log_info(f"Aguardando o carregamento da página")
-    driver.wait_page_load(timeout=60)
-
-    # Após a página ser carregada, a automação digita o texto passado como parâmetro na busca do estabelecimento
-    # Exemplo: caso tenha sido colado na planilha a palavra "restaurante", a automação irá digitar "restaurante" na busca do estabelecimento
-    log_info(f"Digitando o nome do estabelecimento")
-    driver.type_into(by=By.XPATH, value=search_input_xpath, txt=establishment_type_search, send_enter=True)
-    # Aqui espera três segundo só para dar um tempo para a página processar a solicitação de busca
-    time.sleep(3)
-
-    # Aqui a automação garante que a página fez a requisição da busca e retornou algum resultado
-    log_info(f"Aguardando o carregamento da página de busca")
-    while not search_loaded or load_attemps < max_load_attemps:
-        log_info("Coletando o URL da página")
-        current_url = driver.get_current_url()
-        log_info(f"URL da página: {current_url}")
-        # Por algum motivo a página do google maps não recarrega ou atualiza para mostrar esses resultados da busca, 
-        # ela só atualiza a url e adiciona um campo de "/data=!3m1!4b1", não necessáriamente a data vem assim, ela pode ocorrer de vir como "/data=!4d1!3m1!4b1"
-        # essa foi a unica maneira que achei para validar se a página realmente processou a busca e retornou algum resultado
-        if "/data=" in current_url and "!3m1!4b1" in current_url:
-            # Caso na url tenha sido encontrado o campo "/data=" e o campo "!3m1!4b1", significa que a página realmente processou a busca e retornou algum resultado
-            log_info(f"Página de busca carregada com sucesso")
-            search_loaded = True
-            break
-        # Caso não tenha sido encontrado o campo "/data=" e o campo "!3m1!4b1", significa que a página não processou a busca e não retornou nenhum resultado
-        # Ou ela ainda está carregando os resultadas da busca
-        log_info("Tela não foi carregada")
-        load_attemps += 1
-        time.sleep(0.5) # Aqui espera meio segundo para dar um tempo para a página processar a solicitação de busca
+            # A lista e a URL da busca anterior continuam na página até a nova busca começar, então guardo as duas antes de digitar
+            feed_anterior = driver.find_selector(RESULTS_FEED)
+            url_anterior = driver.get_current_url()
+
+            # Após a página ser carregada, a automação digita o texto passado como parâmetro na busca do estabelecimento
+            # Exemplo: caso tenha sido colado na planilha a palavra "restaurante", a automação irá digitar "restaurante" na busca do estabelecimento
+            log_info("Digitando o nome do estabelecimento")
+            with medir("search_typing"):
+                driver.type_into(seletor=SEARCH_INPUT, txt=establishment_type_search, send_enter=True)
+                # A busca só começou quando a URL muda ou a lista anterior sai da página; sem isso os cartões da categoria
+                # anterior seriam lidos como se fossem desta
+                busca_iniciada = driver.wait_condition(
+                    lambda: driver.get_current_url() != url_anterior or (feed_anterior is not None and driver.is_stale(feed_anterior)),
+                    timeout=search_timeout)
+            if not busca_iniciada:
+                if controlador is not None:
+                    controlador.registrar_falha("timeout")
+                raise ValueError(f"A busca do estabelecimento do tipo {establishment_type_search} não substituiu a busca anterior")
+
+        # Aqui a automação garante que a página processou a busca e mostrou a lista de resultados.
+        # A espera termina assim que a lista aparece na página, sem tempo fixo.
+        log_info("Aguardando o carregamento da página de busca")
+        with medir("search_wait"):
+            search_loaded = driver.wait_element(seletor=RESULTS_FEED, timeout=search_timeout) is not None
+    if search_loaded:
+        log_info("Página de busca carregada com sucesso, URL da página: %s", driver.get_current_url())
+        if controlador is not None:
+            controlador.registrar_sucesso(time.monotonic() - inicio_busca)
 
     # Caso a página não tenha sido carregada, a automação levanta um erro de timeout
     if not search_loaded:
+        bloqueio = detectar_bloqueio(driver)
+        if controlador is not None:
+            controlador.registrar_falha("bloqueio" if bloqueio else "timeout")
+        if bloqueio:
+            raise ValueError(f"Página de bloqueio ({bloqueio}) ao buscar o estabelecimento do tipo: {establishment_type_search}")
         raise ValueError(f"Timeout ao carregar a página de busca do estabelecimento do tipo: {establishment_type_search}")
 
+    # No modo "list" todos os cartões são lidos de uma vez, sem abrir a janela de cada estabelecimento
+    if mode == "list":
+        log_info("Lendo os cartões da lista de resultados")
+        with medir("list_harvest"):
+            raw_cards = harvest_cards(driver, qtd_results, elementos=True)
+        cards = [parse_card_text(card["text"], card["name"]) for card in raw_cards]
+        identidades = [_identidade_cartao(card["text"], card["name"], card["url"]) for card in raw_cards]
+        log_info("%s cartões lidos da lista de resultados", len(cards))
+
+    # No modo "tabs" os links dos cartões são abertos em várias abas em paralelo dentro do mesmo navegador
+    if mode == "tabs":
+        with medir("list_harvest"):
+            cards = harvest_cards(driver, qtd_results)
+        log_info("%s cartões lidos da lista de resultados, coletando em até %s abas", len(cards), janela_abas)
+
+        def registrar(i, dados):
+            log_info("Estabelecimento %s coletado: %s", i+1, dados['establishment_name'])
+            if place_index is not None:
+                place_index.registrar(_identidade_cartao(cards[i]["text"], cards[i]["name"], cards[i]["url"]), dados)
+            result_research[i] = dados
+            if on_item is not None:
+                on_item(i, dados)
+
+        def ja_coletado(i, card):
+            # Consultado logo antes de abrir cada aba, para aproveitar também os lugares que as outras categorias
+            # coletaram enquanto esta categoria já estava em andamento
+            conhecido = place_index.buscar(_identidade_cartao(card["text"], card["name"], card["url"])) if place_index is not None else None
+            if conhecido is None:
+                return False
+            log_info("Estabelecimento %s já coletado em outra categoria: %s", i+1, conhecido['establishment_name'])
+            result_research[i] = conhecido
+            if on_item is not None:
+                on_item(i, conhecido)
+            return True
+
+        pendentes = []
+        repetidos = [] # (indice, indice do primeiro cartão do mesmo lugar na lista)
+        primeiros = {} # identidade -> indice do primeiro cartão com essa identidade
+        for i, card in enumerate(cards):
+            if i in skip_indices:
+                continue
+            anterior = anteriores.buscar(establishment_type_search, parse_card_text(card["text"], card["name"])) if anteriores is not None else None
+            if anterior is not None:
+                log_info("Estabelecimento %s sem alterações desde a execução anterior: %s", i+1, anterior['establishment_name'])
+                result_research[i] = anterior
+                if on_item is not None:
+                    on_item(i, anterior)
+                continue
+            # O mesmo lugar repetido na lista é aberto uma vez só
+            identidade = _identidade_cartao(card["text"], card["name"], card["url"])
+            if identidade is not None and identidade in primeiros:
+                repetidos.append((i, primeiros[identidade]))
+                continue
+            if identidade is not None:
+                primeiros[identidade] = i
+            pendentes.append((i, card))
+        _coletar_em_abas(driver, pendentes, janela_abas, window_timeout, registrar, controlador, ja_coletado)
+        for i, primeiro in repetidos:
+            if primeiro in result_research:
+                log_info("Estabelecimento %s repetido na lista, mesmo lugar do resultado %s", i+1, primeiro+1)
+                result_research[i] = dict(result_research[primeiro])
+                if on_item is not None:
+                    on_item(i, result_research[i])
+        _medir_bytes_pagina(driver, "busca", establishment_type_search)
+        return dict(sorted(result_research.items()))
+
+    # No modo "detail" a lista de resultados é rolada à frente da coleta, mantendo "prefetch" cartões já carregados;
+    # no modo "list" os cartões já foram todos lidos. Em ambos a coleta termina se a lista acabar antes da quantidade pedida
+    cartoes = iter_feed_cards(driver, qtd_results, prefetch, elementos=True) if mode == "detail" else enumerate(raw_cards)
+
     # Caso a página tenha sido carregada, a automação coleta os dados de cada estabelecimento encontrado conforme a quantidade informada
-    for i in range(qtd_results):
-        log_info(f"Coletando o resultado {i+1}")
-        # Variável para verificar se a janela do estabelecimento foi carregada
-        window_loaded = False
-        # Número máximo de tentativas de abrir a janela do estabelecimento
-        max_attempts = 3
-        attempts = 0
-
-        # Nessa eu faço um loop para garantir que a janela do estabelecimento foi carregada
-        while not window_loaded and attempts < max_attempts:
-            # Esse xpath serve para clicar nos resultados da busca, onde cada estavelecimento tem um cartão e um index, que começa no número 3 e vai aumentando de 2 em 2
-            base_div_results_xpath = f"/html/body/div[1]/div[2]/div[9]/div[8]/div/div/div[1]/div[2]/div/div[1]/div/div/div[1]/div[1]/div[{index_inicial_result}]"
-            log_info(f"Abrindo janela do estabelecimento: {i+1}")
-            driver.scroll_to_element(by=By.XPATH, value=base_div_results_xpath)
-            driver.click_on_element(by=By.XPATH, value=base_div_results_xpath)
-            text = driver.get_text(by=By.XPATH, value=base_div_results_xpath)
-            establishment_name = driver.get_text(by=By.XPATH, value=establishment_name_xpath)
-            # Aqui para entender se a Janela foi carregada ou não, eu estou usando o nome do estabelecimento que vem do base_div_results_xpath e do establishment_name_xpath, onde no base_div_results_xpath ele já vem com a maioria das informações do estabelecimento, porém não todas, então eu abro o cartão do estabelecimento e coleto o nome do estabelecimento que abriu no cartão, caso esse nome estaja dentro da lista do base_div_results_xpath, significa que a janela foi carregada com sucesso, caso contrário ele tentará abrir novamente o cartão.
-            if(establishment_name in text and establishment_name != "" and establishment_name is not None):
-                log_info(f"Janela carregada, nome do lugar: {establishment_name}")
-                window_loaded = True
-                time.sleep(1)
-            else:
-                log_error(f"Não foi possível encontrar o nome do estabelecimento na janela")
-                log_error(f"Tentativa {attempts+1} de {max_attempts}")
-                attempts += 1
-                time.sleep(1)
-
-        # Caso a janela não tenha sido carregada, a automação levanta um erro de timeout
-        if not window_loaded:
-            raise ValueError(f"Timeout ao carregar a janela do estabelecimento: {i+1}")
-        
-        log_info(f"Janela do estabelecimento carregada com sucesso")
-
-        # Aqui eu coleto o resto das informações que estão faltando, como o tipo do estabelecimento, a nota da avaliação, a quantidade de avaliações e o endereço completo do estabelecimento.
-        establishment_type = driver.get_text(by=By.XPATH, value=establishment_type_xpath)
-        establishment_rate = driver.get_text(by=By.XPATH, value=establishment_rate_xpath)
-        establishment_avaliation_count = driver.get_text(by=By.XPATH, value=establishment_avaliation_count_xpath)
-        establishment_address = driver.get_text(by=By.XPATH, value=establishment_address_xpath)
+    for i, card in cartoes:
+        # Caso esse resultado já tenha sido coletado em uma execução anterior, ele é pulado
+        if i in skip_indices:
+            log_info("Resultado %s já coletado, pulando", i+1)
+            continue
+        log_info("Coletando o resultado %s", i+1)
+
+        # Lugar sem alterações ou já coletado é resolvido pelo cartão, antes de ocupar uma vaga do controlador de vazão
+        if mode == "list":
+            resumo, identidade = cards[i], identidades[i]
+        else:
+            resumo = parse_card_text(card["text"], card["name"])
+            identidade = _identidade_cartao(card["text"], card["name"], card["url"])
+        anterior = anteriores.buscar(establishment_type_search, resumo) if anteriores is not None else None
+        conhecido = place_index.buscar(identidade) if place_index is not None and anterior is None else None
+        if anterior is not None:
+            # Lugar sem alterações desde a execução anterior
+            log_info("Estabelecimento %s sem alterações desde a execução anterior", i+1)
+            dados = anterior
+        elif conhecido is not None:
+            # Lugar já coletado em outra categoria
+            log_info("Estabelecimento %s já coletado em outra categoria", i+1)
+            dados = conhecido
+        elif mode == "list" and all(resumo.values()):
+            # O cartão já trouxe todos os campos, não é preciso abrir a janela
+            dados = resumo
+            if place_index is not None:
+                place_index.registrar(identidade, dados)
+        else:
+            if mode == "list":
+                log_info("Cartão %s com campos faltando, abrindo a janela do estabelecimento", i+1)
+            # A janela ocupa uma vaga do controlador de vazão enquanto carrega, e o resultado dela é informado a ele
+            with controlador.vaga() if controlador is not None else nullcontext():
+                if controlador is not None:
+                    controlador.aguardar()
+                inicio = time.perf_counter()
+                try:
+                    dados = _coletar_janela(driver, i, card, window_timeout)
+                except Exception as e:
+                    if controlador is not None:
+                        controlador.registrar_falha(_tipo_falha(driver, e))
+                    raise
+            if controlador is not None:
+                controlador.registrar_sucesso(time.perf_counter() - inicio)
+            if place_index is not None:
+                place_index.registrar(identidade, dados)
 
         # Aqui eu imprimo as informações coletadas
-        log_info(f"Nome do estabelecimento: {establishment_name}")
-        log_info(f"Tipo do estabelecimento: {establishment_type}")
-        log_info(f"Taxa do estabelecimento: {establishment_rate}")
-        log_info(f"Quantidade de avaliações do estabelecimento: {establishment_avaliation_count}")
-        log_info(f"Endereço do estabelecimento: {establishment_address}")
+        log_info("Nome do estabelecimento: %s", dados['establishment_name'])
+        log_info("Tipo do estabelecimento: %s", dados['establishment_type'])
+        log_info("Taxa do estabelecimento: %s", dados['establishment_rate'])
+        log_info("Quantidade de avaliações do estabelecimento: %s", dados['establishment_avaliation_count'])
+        log_info("Endereço do estabelecimento: %s", dados['establishment_address'])
 
         # Aqui eu armazeno as informações coletadas em um dicionário
-        result_research[i] = {
-            "establishment_name": establishment_name,
-            "establishment_type": establishment_type,
-            "establishment_rate": establishment_rate,
-            "establishment_avaliation_count": establishment_avaliation_count,
-            "establishment_address": establishment_address
-        }
-
-        # Aqui eu incremento o índice inicial dos resultados para a próxima iteração
-        index_inicial_result += 2
-        # Aqui eu fecho a janela do estabelecimento, para garantir que a automação não confuda o cartão do proximo estabelecimento com do cartão que acabei de coletar os dados.
-        driver.click_on_element(by=By.XPATH, value=close_button_xpath)
-        time.sleep(1)    
+        result_research[i] = dados
+        # Aqui eu aviso quem chamou a função que esse estabelecimento foi coletado (ex: para gravar no diário em disco)
+        if on_item is not None:
+            on_item(i, result_research[i])
 
+    # A página de busca inclui as janelas dos estabelecimentos abertas nela
+    _medir_bytes_pagina(driver, "busca", establishment_type_search)
     # Após todas as iterações, a automação retorna o dicionário com os dados coletados
-    return result_research
\ No newline at end of file
+    return result_research
@@ -0,0 +1,307 @@
+from functions.src.google_map import (DETAIL_SELECTORS, GOOGLE_MAPS_URL, RESULTS_FEED, RESULTS_FEED_CSS, RESULT_ARTICLE_CSS,
+                                      RESULTS_END_CSS, _BLOQUEIO_JS, _HARVEST_CARDS_JS, _SCROLL_FEED_JS, _identidade_cartao,
+                                      _painel_carregado, montar_url_busca, parse_card_text)
+from functions.utils.logger import log_info, log_error, log_debug
+from functions.utils.selector_registry import registrar_extracao
+from functions.utils.metrics import medir, registrar_bytes, registrar_duracao
+import asyncio
+import contextlib
+import inspect
+import time
+
+async def detectar_bloqueio_async(pagina):
+    """
+        Versão assíncrona do detectar_bloqueio.
+
+        Args:
+            pagina: página do AsyncWebAutomation
+        Returns:
+            "captcha", "consentimento" ou None
+    """
+    try:
+        return await pagina.execute_script(_BLOQUEIO_JS)
+    except Exception:
+        return None
+
+async def _tipo_falha_async(pagina, erro):
+    """
+        Versão assíncrona do _tipo_falha do google_map.
+    """
+    if await detectar_bloqueio_async(pagina):
+        return "bloqueio"
+    if isinstance(erro, (TimeoutError, asyncio.TimeoutError)) or str(erro).startswith("Timeout"):
+        return "timeout"
+    return "erro"
+
+async def _medir_bytes_pagina_async(pagina, tipo, descricao):
+    """
+        Versão assíncrona do _medir_bytes_pagina do google_map.
+    """
+    try:
+        transferidos = await pagina.page_transfer_bytes()
+    except Exception as e:
+        log_error("Erro ao medir os bytes transferidos pela página de %s %s: %s", tipo, descricao, e)
+        return
+    registrar_bytes(tipo, transferidos)
+    log_debug("Bytes transferidos pela página de %s %s: %s", tipo, descricao, transferidos)
+
+async def _carregar_feed(pagina, alvo, timeout = 30):
+    """
+        Rola a lista de resultados até ter pelo menos "alvo" cartões carregados ou a lista acabar.
+
+        Args:
+            pagina: página do AsyncWebAutomation
+            alvo: quantidade de cartões que precisam estar carregados
+            timeout: tempo máximo (segundos) esperando a lista carregar mais cartões
+        Returns:
+            tupla (quantidade de cartões carregados, se a lista chegou ao fim)
+    """
+    estado = {"count": 0, "fim": False}
+
+    async def carregado():
+        resultado = await pagina.execute_script(_SCROLL_FEED_JS, RESULTS_FEED_CSS, RESULT_ARTICLE_CSS, alvo, RESULTS_END_CSS)
+        estado["count"], estado["fim"] = resultado["count"], resultado["fim"]
+        # Como no google_map, a lista só está no fim quando o marcador de fim aparece
+        return estado["count"] >= alvo or estado["fim"]
+
+    with medir("feed_load"):
+        await pagina.wait_condition(carregado, timeout=timeout)
+    return max(estado["count"], 0), estado["fim"]
+
+async def harvest_cards_async(pagina, qtd_results, timeout = 30):
+    """
+        Rola a lista de resultados até ter a quantidade de cartões pedida (ou a lista acabar)
+        e lê todos os cartões em uma única chamada ao navegador.
+
+        Args:
+            pagina: página do AsyncWebAutomation
+            qtd_results: quantidade de cartões desejada
+            timeout: tempo máximo (segundos) esperando a lista carregar mais cartões
+        Returns:
+            lista com {"name", "text", "url"} de cada cartão, na ordem da lista
+        Raises:
+            ValueError: caso a lista pare de carregar cartões sem o marcador de fim da lista
+    """
+    carregados, fim = await _carregar_feed(pagina, qtd_results, timeout)
+    if carregados < qtd_results:
+        if not fim:
+            # Sem o marcador de fim a lista pode só estar lenta: a categoria falha e é tentada de novo
+            raise ValueError(f"Timeout ao carregar a lista de resultados: {carregados} de {qtd_results} cartões carregados")
+        log_info("A lista de resultados terminou com %s estabelecimentos", carregados)
+    if carregados == 0:
+        return []
+    cards = await pagina.execute_script(_HARVEST_CARDS_JS, RESULT_ARTICLE_CSS, 0, min(qtd_results, carregados)) or []
+    if not cards:
+        raise ValueError("Não foi possível ler os cartões da lista de resultados")
+    return cards
+
+async def _coletar_em_paginas(pagina, pendentes, janela_abas, window_timeout, on_done, controlador = None, ja_coletado = None):
+    """
+        Abre as páginas dos estabelecimentos em várias páginas do navegador ao mesmo tempo, cada uma consumindo
+        a fila de estabelecimentos pendentes até ela esvaziar.
+
+        Args:
+            pagina: página do AsyncWebAutomation onde a busca foi feita
+            pendentes: lista de (indice, cartao) com os cartões vindos do harvest_cards_async
+            janela_abas: quantidade máxima de páginas carregando ao mesmo tempo
+            window_timeout: tempo máximo (segundos) para a página de um estabelecimento carregar
+            on_done: corrotina chamada com (indice, dados) para cada estabelecimento lido
+            controlador: controlador de vazão consultado antes de abrir cada página; cada página carregando ocupa uma
+                         vaga de concorrência e o resultado de cada página (sucesso e latência, ou falha) é informado a ele
+            ja_coletado: corrotina chamada com (indice, cartao) logo antes de abrir cada página; se ela retornar True
+                         o estabelecimento já foi resolvido (ex: coletado em outra categoria) e a página não é aberta
+        Raises:
+            ValueError: caso algum cartão não tenha link ou alguma página não carregue a tempo
+    """
+    sem_link = [indice + 1 for indice, cartao in pendentes if not cartao.get("url")]
+    if sem_link:
+        raise ValueError(f"Cartões sem link para a página do estabelecimento: {sem_link}")
+    if not pendentes:
+        return
+
+    fila = asyncio.Queue()
+    for pendente in pendentes:
+        fila.put_nowait(pendente)
+
+    async def carregar_pagina(aba, cartao):
+        await aba.open_url(cartao["url"], wait_load=False)
+        leitura = {}
+
+        async def carregada():
+            # As verificações não entram nas estatísticas dos seletores, só a leitura final da espera
+            leitura["campos"] = await aba.extract_fields(DETAIL_SELECTORS, registrar=False)
+            return _painel_carregado(leitura["campos"], cartao["text"])
+
+        campos = await aba.wait_condition(carregada, timeout=window_timeout)
+        registrar_extracao(DETAIL_SELECTORS, leitura.get("campos", {}))
+        return campos
+
+    async def consumir(aba):
+        while not fila.empty():
+            indice, cartao = fila.get_nowait()
+            if ja_coletado is not None and await ja_coletado(indice, cartao):
+                continue
+            # Cada página segura uma única vaga por vez, então aqui a espera pela vaga não trava as outras páginas
+            async with controlador.vaga_async() if controlador is not None else contextlib.nullcontext():
+                if controlador is not None:
+                    await controlador.aguardar_async()
+                log_info("Abrindo página do estabelecimento: %s", indice+1)
+                inicio = time.monotonic()
+                try:
+                    campos = await carregar_pagina(aba, cartao)
+                    if not campos:
+                        raise ValueError(f"Timeout ao carregar a página do estabelecimento: {indice+1}")
+                except Exception as e:
+                    if controlador is not None:
+                        controlador.registrar_falha(await _tipo_falha_async(aba, e))
+                    raise
+            registrar_duracao("tab_fetch", time.monotonic() - inicio)
+            await _medir_bytes_pagina_async(aba, "estabelecimento", indice+1)
+            if controlador is not None:
+                controlador.registrar_sucesso(time.monotonic() - inicio)
+            await on_done(indice, {
+                "establishment_name": campos["establishment_name"],
+                "establishment_type": campos["establishment_type"],
+                "establishment_rate": campos["establishment_rate"],
+                "establishment_avaliation_count": campos["establishment_avaliation_count"],
+                "establishment_address": campos["establishment_address"]
+            })
+
+    abas = []
+    tarefas = []
+    try:
+        for _ in range(min(janela_abas, len(pendentes))):
+            abas.append(await pagina.new_page())
+        tarefas = [asyncio.create_task(consumir(aba)) for aba in abas]
+        await asyncio.gather(*tarefas)
+    finally:
+        # Se uma página falhar, as demais param e todas são fechadas
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        for aba in abas:
+            await aba.close_page()
+
+async def collect_data_async(pagina, establishment_type_search, qtd_results = 10, skip_indices = None, on_item = None,
+                             mode = "detail", janela_abas = 4, place_index = None, idioma = None, viewport = None,
+                             controlador = None, url_base = GOOGLE_MAPS_URL, anteriores = None, **_opcoes_selenium):
+    """
+        Versão assíncrona do collect_data, para o backend "cdp" (functions/utils/cdp_web.py).
+
+        A busca é sempre aberta direto pela URL e os cartões da lista são lidos de uma vez. Os estabelecimentos
+        que precisam ser abertos são coletados pelas suas páginas, em até "janela_abas" páginas ao mesmo tempo:
+        no modo "list" só os cartões com campos faltando; nos modos "detail" e "tabs" todos (sem clicar nos cartões,
+        como o modo "tabs" do collect_data). As opções exclusivas do Selenium (prefetch, busca_direta) são ignoradas.
+
+        Args:
+            pagina: página do AsyncWebAutomation
+            establishment_type_search: tipo de estabelecimento a ser buscado
+            qtd_results: quantidade de resultados a serem coletados
+            skip_indices: índices já coletados em uma execução anterior, que não serão abertos novamente
+            on_item: função ou corrotina chamada com (indice, dados) assim que cada estabelecimento é coletado
+            mode: "detail", "list" ou "tabs", como no collect_data
+            janela_abas: quantidade de páginas de estabelecimentos carregando ao mesmo tempo
+            place_index: índice de lugares compartilhado entre as categorias
+            idioma: idioma da página (ex: "pt-BR")
+            viewport: centro e zoom do mapa (ex: "-23.5505,-46.6333,12z")
+            controlador: controlador de vazão compartilhado: a busca e cada página ocupam uma vaga de concorrência
+                         enquanto carregam e têm o resultado (sucesso e latência, ou falha) informado a ele
+            url_base: endereço do Google Maps usado na busca
+            anteriores: resultados da execução anterior (atualização incremental)
+        Returns:
+            dicionário com os dados coletados
+        Raises:
+            ValueError: caso a busca ou alguma página não carregue
+    """
+    search_timeout = 15 # Tempo máximo (segundos) para a página de busca processar a pesquisa
+    window_timeout = 10 # Tempo máximo (segundos) para a página do estabelecimento carregar
+    result_research = {} # Variável para armazenar os resultados da busca
+    skip_indices = skip_indices or set() # Índices que já foram coletados e podem ser pulados
+
+    log_info("Iniciando a coleta de dados para o estabelecimento do tipo: %s", establishment_type_search)
+    # A busca ocupa uma vaga do controlador de vazão enquanto a página carrega
+    async with controlador.vaga_async() if controlador is not None else contextlib.nullcontext():
+        if controlador is not None:
+            await controlador.aguardar_async()
+        inicio_busca = time.monotonic()
+        url_busca = montar_url_busca(establishment_type_search, idioma, viewport, url_base)
+        log_info("Abrindo a busca: %s", url_busca)
+        with medir("search_open"):
+            await pagina.open_url(url_busca, wait_load=False)
+
+        log_info("Aguardando o carregamento da página de busca")
+        with medir("search_wait"):
+            search_loaded = await pagina.wait_element(seletor=RESULTS_FEED, timeout=search_timeout) is not None
+    if search_loaded and controlador is not None:
+        controlador.registrar_sucesso(time.monotonic() - inicio_busca)
+    if not search_loaded:
+        bloqueio = await detectar_bloqueio_async(pagina)
+        if controlador is not None:
+            controlador.registrar_falha("bloqueio" if bloqueio else "timeout")
+        if bloqueio:
+            raise ValueError(f"Página de bloqueio ({bloqueio}) ao buscar o estabelecimento do tipo: {establishment_type_search}")
+        raise ValueError(f"Timeout ao carregar a página de busca do estabelecimento do tipo: {establishment_type_search}")
+
+    with medir("list_harvest"):
+        cards = await harvest_cards_async(pagina, qtd_results)
+    log_info("%s cartões lidos da lista de resultados", len(cards))
+
+    async def avisar(i, dados):
+        result_research[i] = dados
+        if on_item is not None and inspect.isawaitable(resultado := on_item(i, dados)):
+            await resultado
+
+    async def registrar(i, dados):
+        log_info("Estabelecimento %s coletado: %s", i+1, dados['establishment_name'])
+        if place_index is not None:
+            place_index.registrar(_identidade_cartao(cards[i]["text"], cards[i]["name"], cards[i]["url"]), dados)
+        await avisar(i, dados)
+
+    async def ja_coletado(i, card):
+        # Consultado logo antes de abrir cada página, para aproveitar também os lugares que as outras categorias
+        # coletaram enquanto esta categoria já estava em andamento
+        conhecido = place_index.buscar(_identidade_cartao(card["text"], card["name"], card["url"])) if place_index is not None else None
+        if conhecido is None:
+            return False
+        log_info("Estabelecimento %s já coletado em outra categoria: %s", i+1, conhecido['establishment_name'])
+        await avisar(i, conhecido)
+        return True
+
+    pendentes = []
+    repetidos = [] # (indice, indice do primeiro cartão do mesmo lugar na lista)
+    primeiros = {} # identidade -> indice do primeiro cartão com essa identidade
+    for i, card in enumerate(cards):
+        if i in skip_indices:
+            log_info("Resultado %s já coletado, pulando", i+1)
+            continue
+        dados_cartao = parse_card_text(card["text"], card["name"])
+        anterior = anteriores.buscar(establishment_type_search, dados_cartao) if anteriores is not None else None
+        if anterior is not None:
+            log_info("Estabelecimento %s sem alterações desde a execução anterior: %s", i+1, anterior['establishment_name'])
+            await avisar(i, anterior)
+            continue
+        # Lugares já coletados em outra categoria não precisam ser abertos
+        if await ja_coletado(i, card):
+            continue
+        if mode == "list" and all(dados_cartao.values()):
+            # O cartão já trouxe todos os campos, não é preciso abrir a página
+            await registrar(i, dados_cartao)
+            continue
+        # O mesmo lugar repetido na lista é aberto uma vez só
+        identidade = _identidade_cartao(card["text"], card["name"], card["url"])
+        if identidade is not None and identidade in primeiros:
+            repetidos.append((i, primeiros[identidade]))
+            continue
+        if identidade is not None:
+            primeiros[identidade] = i
+        pendentes.append((i, card))
+
+    if pendentes:
+        log_info("Coletando %s estabelecimento(s) em até %s páginas", len(pendentes), janela_abas)
+    await _coletar_em_paginas(pagina, pendentes, janela_abas, window_timeout, registrar, controlador, ja_coletado)
+    for i, primeiro in repetidos:
+        if primeiro in result_research:
+            log_info("Estabelecimento %s repetido na lista, mesmo lugar do resultado %s", i+1, primeiro+1)
+            await avisar(i, dict(result_research[primeiro]))
+    await _medir_bytes_pagina_async(pagina, "busca", establishment_type_search)
+    return dict(sorted(result_research.items()))
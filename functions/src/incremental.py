@@ -0,0 +1,150 @@
+from functions.src.place_index import identidade_lugar
+from functions.utils.cache import normalizar_termo
+import json
+import os
+import re
+import threading
+
+# Campos comparados para decidir se um lugar mudou desde a execução anterior
+CAMPOS_COMPARADOS = ("establishment_name", "establishment_type", "establishment_rate",
+                     "establishment_avaliation_count", "establishment_address")
+
+def _digitos(valor):
+    # "4,5" e "4.5", "(1.234)" e "1234" são o mesmo valor
+    return re.sub(r"\D", "", str(valor or ""))
+
+def chave_resultado(dados):
+    """
+        Identidade de um estabelecimento já coletado, usada para comparar duas execuções.
+        Usa o nome e o endereço normalizados e, sem endereço, só o nome.
+
+        Args:
+            dados: dicionário com os dados do estabelecimento
+        Returns:
+            a identidade do lugar
+    """
+    nome = dados.get("establishment_name", "")
+    return identidade_lugar(nome, dados.get("establishment_address", "")) or f"nome:{normalizar_termo(nome)}"
+
+def carregar_resultados_anteriores(filepath):
+    """
+        Lê o resultados.json de uma execução anterior.
+
+        Args:
+            filepath: caminho do arquivo JSON
+        Returns:
+            dicionário {categoria: {indice: dados}}, vazio se o arquivo não existir
+    """
+    if not os.path.exists(filepath):
+        return {}
+    with open(filepath, encoding="utf-8") as f:
+        return json.load(f)
+
+class ResultadosAnteriores:
+    """
+    Índice dos resultados de uma execução anterior, usado na atualização incremental (--incremental).
+
+    Para cada cartão da lista de resultados, o lugar é procurado entre os resultados anteriores da mesma
+    categoria pelo nome e pelo endereço do cartão (o endereço do cartão é o começo do endereço completo).
+    Cartões sem endereço só são reaproveitados quando a categoria tem um único lugar com aquele nome.
+    Se a nota e a quantidade de avaliações do cartão forem as mesmas, os dados anteriores são reaproveitados
+    sem abrir a janela do estabelecimento. Lugares novos ou alterados são coletados normalmente.
+    Um cartão procurado de novo (ex: nova tentativa da categoria) recebe a mesma resposta e não é contado
+    outra vez no resumo.
+    """
+
+    def __init__(self, resultados):
+        """
+        Args:
+            resultados: dicionário {categoria: {indice: dados}} da execução anterior
+        """
+        self.__lock = threading.Lock()
+        self.__por_categoria = {}
+        for categoria, estabelecimentos in resultados.items():
+            por_nome = self.__por_categoria.setdefault(normalizar_termo(categoria), {})
+            for dados in estabelecimentos.values():
+                por_nome.setdefault(normalizar_termo(dados.get("establishment_name", "")), []).append(dados)
+        self.__usados = set()
+        # Cartões já procurados: chave do cartão -> dados reaproveitados (None se novo ou alterado)
+        self.__cartoes = {}
+        self.__reaproveitados = 0
+        self.__alterados = 0
+        self.__novos = 0
+
+    def buscar(self, categoria, cartao):
+        """
+        Retorna uma cópia dos dados anteriores do lugar do cartão se ele não mudou, ou None.
+
+        Args:
+            categoria: categoria sendo coletada
+            cartao: dados lidos do cartão da lista (parse_card_text)
+        """
+        nome = normalizar_termo(cartao.get("establishment_name", ""))
+        endereco = normalizar_termo(cartao.get("establishment_address", ""))
+        chave = (normalizar_termo(categoria), nome, endereco, _digitos(cartao.get("establishment_rate")),
+                 _digitos(cartao.get("establishment_avaliation_count")))
+        with self.__lock:
+            if chave in self.__cartoes:
+                dados = self.__cartoes[chave]
+                return dict(dados) if dados is not None else None
+            mesmo_nome = self.__por_categoria.get(normalizar_termo(categoria), {}).get(nome, [])
+            if endereco:
+                candidatos = [dados for dados in mesmo_nome if id(dados) not in self.__usados
+                              and endereco in normalizar_termo(dados.get("establishment_address", ""))]
+            else:
+                # Sem endereço não dá para separar as unidades de uma rede com o mesmo nome
+                candidatos = mesmo_nome if len(mesmo_nome) == 1 and id(mesmo_nome[0]) not in self.__usados else []
+            for dados in candidatos:
+                if (_digitos(dados.get("establishment_rate")) == _digitos(cartao.get("establishment_rate"))
+                        and _digitos(dados.get("establishment_avaliation_count")) == _digitos(cartao.get("establishment_avaliation_count"))):
+                    self.__usados.add(id(dados))
+                    self.__cartoes[chave] = dados
+                    self.__reaproveitados += 1
+                    return dict(dados)
+            self.__cartoes[chave] = None
+            if candidatos:
+                self.__alterados += 1
+            else:
+                self.__novos += 1
+            return None
+
+    def resumo(self):
+        """
+        Quantidade de lugares reaproveitados, alterados e novos encontrados nas listas de resultados.
+
+        Returns:
+            dict: {"reaproveitados", "alterados", "novos"}
+        """
+        with self.__lock:
+            return {"reaproveitados": self.__reaproveitados, "alterados": self.__alterados, "novos": self.__novos}
+
+def calcular_alteracoes(anteriores, atuais):
+    """
+        Compara os resultados de duas execuções, categoria por categoria, pela identidade de cada lugar.
+
+        Args:
+            anteriores: dicionário {categoria: {indice: dados}} da execução anterior
+            atuais: dicionário {categoria: {indice: dados}} da execução atual
+        Returns:
+            dicionário {"adicionados": [...], "alterados": [...], "removidos": [...]}, com a categoria em cada item.
+            Os alterados trazem os campos que mudaram, com o valor anterior e o atual.
+    """
+    alteracoes = {"adicionados": [], "alterados": [], "removidos": []}
+    for categoria in dict.fromkeys(list(anteriores) + list(atuais)):
+        antes = {}
+        for dados in anteriores.get(categoria, {}).values():
+            antes.setdefault(chave_resultado(dados), []).append(dados)
+        for dados in atuais.get(categoria, {}).values():
+            mesmos = antes.get(chave_resultado(dados))
+            if not mesmos:
+                alteracoes["adicionados"].append({"categoria": categoria, **dados})
+                continue
+            anterior = mesmos.pop(0)
+            campos = {campo: {"antes": anterior.get(campo, ""), "depois": dados.get(campo, "")}
+                      for campo in CAMPOS_COMPARADOS if anterior.get(campo, "") != dados.get(campo, "")}
+            if campos:
+                alteracoes["alterados"].append({"categoria": categoria, "establishment_name": dados.get("establishment_name", ""),
+                                                "campos": campos})
+        for restantes in antes.values():
+            alteracoes["removidos"].extend({"categoria": categoria, **dados} for dados in restantes)
+    return alteracoes
@@ -0,0 +1,71 @@
+from functions.utils.cache import normalizar_termo
+import re
+import threading
+
+# Id do lugar presente nos links do Google Maps, ex: "!1s0x94ce5f...:0x2b7c...!"
+_PLACE_ID_RE = re.compile(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)")
+
+def identidade_lugar(nome = "", endereco = "", url = ""):
+    """
+        Calcula uma identidade estável para um estabelecimento.
+        Usa o id do lugar que vem no link do Google Maps e, na falta dele, o nome e o endereço normalizados.
+
+        Args:
+            nome: nome do estabelecimento
+            endereco: endereço do estabelecimento (como aparece no cartão da lista)
+            url: link da página do estabelecimento
+        Returns:
+            a identidade do lugar, ou None quando não há informação suficiente
+    """
+    place_id = _PLACE_ID_RE.search(url or "")
+    if place_id:
+        return f"id:{place_id.group(1).lower()}"
+    if nome and endereco:
+        return f"nome:{normalizar_termo(nome)}|{normalizar_termo(endereco)}"
+    return None
+
+class IndiceLugares:
+    """
+    Índice dos estabelecimentos já coletados na execução, compartilhado entre categorias e workers.
+    Quando o mesmo lugar aparece em outra categoria, os dados guardados são reaproveitados
+    em vez de abrir a janela do estabelecimento de novo.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__lugares = {}
+        self.__reaproveitados = 0
+
+    def buscar(self, identidade):
+        """
+        Retorna uma cópia dos dados de um lugar já coletado, ou None.
+        """
+        if identidade is None:
+            return None
+        with self.__lock:
+            dados = self.__lugares.get(identidade)
+            if dados is None:
+                return None
+            self.__reaproveitados += 1
+            return dict(dados)
+
+    def registrar(self, identidade, dados):
+        """
+        Guarda os dados de um lugar coletado.
+        """
+        if identidade is None:
+            return
+        with self.__lock:
+            self.__lugares.setdefault(identidade, dict(dados))
+
+    @property
+    def reaproveitados(self):
+        """
+        Quantidade de vezes que um lugar foi reaproveitado do índice.
+        """
+        with self.__lock:
+            return self.__reaproveitados
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__lugares)
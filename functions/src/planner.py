@@ -0,0 +1,135 @@
+from functions.utils.cache import normalizar_termo
+import json
+import os
+
+# Segundos por estabelecimento em cada modo, usados na estimativa quando não há métricas de uma execução anterior
+SEGUNDOS_POR_ITEM = {"detail": 3.0, "list": 0.5, "tabs": 1.2}
+# Segundos gastos em cada categoria antes do primeiro estabelecimento (busca e lista de resultados),
+# somados só à estimativa padrão: o tempo por estabelecimento das métricas já inclui a busca
+SEGUNDOS_POR_BUSCA = 5.0
+
+def deduplicar_tarefas(tarefas):
+    """
+        Remove as categorias repetidas da planilha (mesmo termo sem acentos, maiúsculas e espaços extras).
+        Fica a primeira linha de cada categoria, com a maior quantidade pedida entre as repetidas.
+
+        Args:
+            tarefas: lista de tuplas (establishment_type, qtd_results) na ordem da planilha
+        Returns:
+            tupla (tarefas sem repetição na ordem da planilha, lista das linhas removidas)
+    """
+    posicoes = {}
+    unicas = []
+    removidas = []
+    for establishment_type, qtd_results in tarefas:
+        chave = normalizar_termo(establishment_type)
+        if chave not in posicoes:
+            posicoes[chave] = len(unicas)
+            unicas.append((establishment_type, qtd_results))
+            continue
+        posicao = posicoes[chave]
+        unicas[posicao] = (unicas[posicao][0], max(unicas[posicao][1], qtd_results))
+        removidas.append((establishment_type, qtd_results))
+    return unicas, removidas
+
+def ordem_de_coleta(tarefas):
+    """
+        Ordem em que as categorias são entregues aos workers: as maiores primeiro, para que as categorias grandes
+        não fiquem para o fim com um worker sozinho coletando enquanto os outros já terminaram.
+        Categorias com a mesma quantidade seguem a ordem da planilha.
+
+        Args:
+            tarefas: lista de tuplas (establishment_type, qtd_results) na ordem da planilha
+        Returns:
+            lista com as posições das tarefas na ordem de coleta
+    """
+    return sorted(range(len(tarefas)), key=lambda posicao: (-tarefas[posicao][1], posicao))
+
+def segundos_por_item(config):
+    """
+        Tempo médio por estabelecimento, lido das métricas da última execução (arquivo de métricas do config.toml)
+        ou, sem métricas, o valor padrão do modo configurado. O valor das métricas vem do tempo total das
+        categorias, então já inclui a busca e a lista de resultados.
+
+        Args:
+            config: configuração carregada do config.toml
+        Returns:
+            tupla (segundos por estabelecimento, origem do valor: "metricas" ou "padrao")
+    """
+    caminho = config.get("arquivos", {}).get("metricas")
+    if caminho and os.path.exists(caminho):
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                metricas = json.load(f)
+            categorias = metricas.get("fases", {}).get("category", {})
+            if metricas.get("itens_coletados") and categorias.get("total"):
+                return categorias["total"] / metricas["itens_coletados"], "metricas"
+        except (OSError, ValueError):
+            pass
+    return SEGUNDOS_POR_ITEM.get(config["base"].get("mode", "detail"), SEGUNDOS_POR_ITEM["detail"]), "padrao"
+
+def montar_plano(tarefas, config, atendidas=None):
+    """
+        Monta a agenda de coleta e estima a duração, distribuindo as categorias na ordem de coleta
+        para o worker que fica livre primeiro (como a fila dos workers faz).
+
+        Args:
+            tarefas: lista de tuplas (establishment_type, qtd_results) sem repetição, na ordem da planilha
+            config: configuração carregada do config.toml
+            atendidas: dicionário {establishment_type: motivo} das categorias que não abrem o navegador
+                       (ex: "cache", "diário")
+        Returns:
+            dicionário {"agenda", "workers", "segundos_por_item", "origem", "segundos"}. Cada item da agenda traz
+            posicao, categoria, qtd_results, worker, inicio e fim estimados (segundos) e o motivo, se atendida.
+    """
+    atendidas = atendidas or {}
+    por_item, origem = segundos_por_item(config)
+    por_busca = 0.0 if origem == "metricas" else SEGUNDOS_POR_BUSCA
+    pendentes = [posicao for posicao in ordem_de_coleta(tarefas) if tarefas[posicao][0] not in atendidas]
+    qtd_workers = max(1, min(int(config["base"].get("workers", 1)), len(pendentes))) if pendentes else 0
+    livres = [0.0] * qtd_workers
+
+    agenda = []
+    for posicao in ordem_de_coleta(tarefas):
+        establishment_type, qtd_results = tarefas[posicao]
+        item = {"posicao": posicao, "categoria": establishment_type, "qtd_results": qtd_results,
+                "worker": None, "inicio": 0.0, "fim": 0.0, "atendida": atendidas.get(establishment_type)}
+        if item["atendida"] is None:
+            worker = min(range(qtd_workers), key=lambda numero: livres[numero])
+            item["worker"] = worker + 1
+            item["inicio"] = livres[worker]
+            livres[worker] += por_busca + qtd_results * por_item
+            item["fim"] = livres[worker]
+        agenda.append(item)
+    return {"agenda": agenda, "workers": qtd_workers, "segundos_por_item": por_item, "origem": origem,
+            "segundos": max(livres, default=0.0)}
+
+def formatar_plano(plano, removidas=()):
+    """
+        Texto do plano de coleta para o --plan.
+
+        Args:
+            plano: plano retornado pelo montar_plano
+            removidas: linhas repetidas removidas da planilha
+        Returns:
+            texto com uma linha por categoria, na ordem de coleta, e a duração estimada
+    """
+    linhas = [f"{'#':>3}  {'Categoria':<30} {'Qtd':>5}  {'Worker':>6}  {'Início':>8}  {'Fim':>8}"]
+    for ordem, item in enumerate(plano["agenda"], start=1):
+        if item["atendida"]:
+            linhas.append(f"{ordem:>3}  {item['categoria']:<30} {item['qtd_results']:>5}  {'-':>6}  ({item['atendida']})")
+            continue
+        linhas.append(f"{ordem:>3}  {item['categoria']:<30} {item['qtd_results']:>5}  {item['worker']:>6}  "
+                      f"{_duracao(item['inicio']):>8}  {_duracao(item['fim']):>8}")
+    for establishment_type, qtd_results in removidas:
+        linhas.append(f"Linha repetida removida: {establishment_type} ({qtd_results})")
+    origem = "métricas da última execução" if plano["origem"] == "metricas" else "valor padrão do modo"
+    linhas.append(f"{sum(1 for item in plano['agenda'] if not item['atendida'])} categoria(s) para coletar em "
+                  f"{plano['workers']} worker(s), {plano['segundos_por_item']:.2f}s por estabelecimento ({origem})")
+    linhas.append(f"Duração estimada: {_duracao(plano['segundos'])}")
+    return "\n".join(linhas)
+
+def _duracao(segundos):
+    minutos, segundos = divmod(int(round(segundos)), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}:{minutos:02d}:{segundos:02d}"
@@ -0,0 +1,74 @@
+from functions.utils.file_manager import flatten_results
+import os
+
+# Padrões usados para separar o endereço no formato do Google Maps, ex:
+# "Av. Mutinga, 3725 - Jardim Santo Elias, São Paulo - SP, 05110-000"
+# O endereço pode começar com o nome de um shopping ou galeria e ter trechos extras separados por " - "
+# (ex: "Rod. Raposo Tavares, 366 - Loja 4 - Km 18, Osasco - SP"), por isso cada parte fica dentro de um trecho
+_TRECHO = r"(?:(?!\s-\s)[^,])+?"
+_FIM_ENDERECO = r"(?:,\s*\d{5}-?\d{3})?\s*$"
+_CEP_RE = r"(\d{5}-?\d{3})\s*$"
+_UF_RE = r"\s-\s([A-Z]{2})" + _FIM_ENDERECO
+_CIDADE_RE = r"(?:^|,)\s*(" + _TRECHO + r")\s-\s[A-Z]{2}" + _FIM_ENDERECO
+_BAIRRO_RE = r"\s-\s(" + _TRECHO + r"),\s*" + _TRECHO + r"\s-\s[A-Z]{2}" + _FIM_ENDERECO
+# Trecho "logradouro, número" em qualquer posição do endereço (o número começa com um dígito ou é "s/n", e não é o CEP)
+_LOGRADOURO_COM_NUMERO_RE = (r"(?:^|\s-\s)\s*(?P<logradouro>" + _TRECHO + r"),\s*"
+                             r"(?P<numero>(?!\d{5}-?\d{3}\b)\d[^,\s]*|[sS]/[nN])(?=\s-\s|\s*,|\s*$)")
+# Sem número, o logradouro é o primeiro trecho
+_LOGRADOURO_NUMERO_RE = r"^\s*(?P<logradouro>[^,]+?)(?:,\s*(?P<numero>[^,]+?))?\s*$"
+
+def build_typed_frame(data):
+    """
+        Monta um DataFrame tipado a partir dos resultados coletados.
+        A nota e a quantidade de avaliações são convertidas para números e o endereço é separado em
+        logradouro, número, bairro, cidade, UF e CEP, tudo com operações vetorizadas sobre a coluna inteira.
+
+        Args:
+            data: dicionário de resultados {categoria: {indice: dados}} ou pares (categoria, {indice: dados})
+        Returns:
+            DataFrame com as colunas originais e as colunas tipadas
+    """
+    # O pandas só é importado quando os resultados tipados são gerados
+    import pandas as pd
+
+    df = pd.DataFrame(list(flatten_results(data)), columns=[
+        "categoria", "establishment_name", "establishment_type", "establishment_rate",
+        "establishment_avaliation_count", "establishment_address",
+    ]).astype("string")
+
+    # "4,5" -> 4.5
+    df["rate"] = pd.to_numeric(df["establishment_rate"].str.strip().str.replace(",", ".", regex=False),
+                               errors="coerce").astype("Float64")
+    # "(1.234)" -> 1234
+    df["avaliation_count"] = pd.to_numeric(df["establishment_avaliation_count"].str.replace(r"\D", "", regex=True)
+                                           .replace("", pd.NA), errors="coerce").astype("Int64")
+
+    endereco = df["establishment_address"].fillna("")
+    # O logradouro e o número vêm do trecho "logradouro, número"; sem número, do primeiro trecho (antes do primeiro " - ")
+    com_numero = endereco.str.extract(_LOGRADOURO_COM_NUMERO_RE).astype("string")
+    primeiro_trecho = endereco.str.split(" - ", n=1).str[0].str.extract(_LOGRADOURO_NUMERO_RE).astype("string")
+    encontrado = com_numero["logradouro"].notna()
+    df["address_street"] = com_numero["logradouro"].where(encontrado, primeiro_trecho["logradouro"])
+    df["address_number"] = com_numero["numero"].where(encontrado, primeiro_trecho["numero"])
+    df["address_district"] = endereco.str.extract(_BAIRRO_RE, expand=False)
+    df["address_city"] = endereco.str.extract(_CIDADE_RE, expand=False)
+    df["address_state"] = endereco.str.extract(_UF_RE, expand=False)
+    df["address_postal_code"] = endereco.str.extract(_CEP_RE, expand=False)
+    return df
+
+def write_typed_results(data, filepath):
+    """
+        Escreve os resultados tipados em um arquivo Parquet (precisa do pyarrow instalado).
+
+        Args:
+            data: dicionário de resultados {categoria: {indice: dados}} ou pares (categoria, {indice: dados})
+            filepath: caminho do arquivo Parquet
+    """
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        build_typed_frame(data).to_parquet(filepath, engine="pyarrow", index=False)
+        return True
+    except ImportError as e:
+        raise ValueError(f"O pyarrow é necessário para escrever o arquivo Parquet: {e}")
+    except Exception as e:
+        raise ValueError(f"Erro ao escrever o arquivo Parquet: {e}")
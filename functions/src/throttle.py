@@ -0,0 +1,239 @@
+from functions.utils.logger import log_info
+from functions.utils.metrics import registrar_duracao
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import statistics
+import threading
+import time
+
+class ControladorVazao:
+    """
+    Controla o ritmo das ações no Google Maps, compartilhado entre todos os workers.
+
+    Cada ação (abrir uma busca, um cartão ou uma aba) consome um token de um token bucket que é
+    reabastecido na taxa atual, e ocupa uma vaga de concorrência enquanto a página carrega. A taxa e a quantidade
+    de páginas carregando ao mesmo tempo são ajustadas por AIMD a partir do resultado de cada página: a cada janela
+    de resultados saudável (taxa de sucesso e latência dentro do alvo) elas sobem um pouco; quando a janela piora,
+    ou quando aparece uma página de captcha/consentimento, elas caem pela metade.
+
+    aguardar_async e vaga_async são as versões para o event loop do backend "cdp": a espera é feita com
+    asyncio.sleep, e a vaga é reservada e devolvida na thread do event loop.
+    """
+
+    # Intervalo (segundos) entre as verificações das esperas assíncronas, que não recebem o notify da condição
+    INTERVALO_ASYNC = 0.05
+
+    def __init__(self, taxa_inicial=1.0, taxa_minima=0.2, taxa_maxima=4.0, rajada=3, incremento=0.2,
+                 fator_reducao=0.5, latencia_alvo=6.0, janela=10, taxa_sucesso_minima=0.8, pausa_bloqueio=120,
+                 concorrencia_maxima=1):
+        """
+        Args:
+            taxa_inicial (float): Ações por segundo no início da execução.
+            taxa_minima (float): Menor taxa permitida.
+            taxa_maxima (float): Maior taxa permitida.
+            rajada (int): Quantidade máxima de tokens acumulados (ações seguidas sem espera).
+            incremento (float): Quanto a taxa sobe a cada janela saudável.
+            fator_reducao (float): Fator aplicado à taxa e à concorrência quando a janela piora.
+            latencia_alvo (float): Latência mediana máxima (segundos) de uma janela saudável.
+            janela (int): Quantidade de resultados avaliados a cada ajuste.
+            taxa_sucesso_minima (float): Fração mínima de sucessos de uma janela saudável.
+            pausa_bloqueio (float): Segundos sem nenhuma ação depois de uma página de bloqueio.
+            concorrencia_maxima (int): Quantidade máxima de páginas (janelas, abas ou buscas) carregando ao mesmo tempo.
+        """
+        self.__condicao = threading.Condition()
+        self.__taxa = float(taxa_inicial)
+        self.__taxa_minima = float(taxa_minima)
+        self.__taxa_maxima = float(taxa_maxima)
+        self.__rajada = float(rajada)
+        self.__incremento = float(incremento)
+        self.__fator_reducao = float(fator_reducao)
+        self.__latencia_alvo = float(latencia_alvo)
+        self.__janela = deque(maxlen=int(janela))
+        self.__taxa_sucesso_minima = float(taxa_sucesso_minima)
+        self.__pausa_bloqueio = float(pausa_bloqueio)
+        self.__concorrencia_maxima = max(1, int(concorrencia_maxima))
+        self.__concorrencia = self.__concorrencia_maxima
+        self.__ativos = 0
+        self.__tokens = self.__rajada
+        self.__ultimo_abastecimento = time.monotonic()
+        self.__pausado_ate = 0.0
+        self.__bloqueios = 0
+
+    def aguardar(self):
+        """
+        Espera até que a próxima ação possa ser feita, consumindo um token.
+
+        Returns:
+            float: Tempo esperado, em segundos.
+        """
+        inicio = time.monotonic()
+        with self.__condicao:
+            while True:
+                espera = self.__consumir_token()
+                if espera is None:
+                    break
+                self.__condicao.wait(espera)
+        esperado = time.monotonic() - inicio
+        registrar_duracao("throttle_wait", esperado)
+        return esperado
+
+    async def aguardar_async(self):
+        """
+        Mesmo que o aguardar, sem travar o event loop enquanto espera.
+
+        Returns:
+            float: Tempo esperado, em segundos.
+        """
+        inicio = time.monotonic()
+        while True:
+            with self.__condicao:
+                espera = self.__consumir_token()
+            if espera is None:
+                break
+            await asyncio.sleep(min(espera, self.INTERVALO_ASYNC))
+        esperado = time.monotonic() - inicio
+        registrar_duracao("throttle_wait", esperado)
+        return esperado
+
+    def __consumir_token(self):
+        # Chamado com a condição travada: consome um token e retorna None, ou retorna quantos segundos esperar
+        agora = time.monotonic()
+        if agora < self.__pausado_ate:
+            return self.__pausado_ate - agora
+        self.__tokens = min(self.__rajada, self.__tokens + (agora - self.__ultimo_abastecimento) * self.__taxa)
+        self.__ultimo_abastecimento = agora
+        if self.__tokens >= 1:
+            self.__tokens -= 1
+            return None
+        return (1 - self.__tokens) / self.__taxa
+
+    @contextmanager
+    def vaga(self):
+        """
+        Reserva uma das vagas de concorrência durante o bloco (ex: o carregamento de uma janela ou busca).
+        """
+        with self.__condicao:
+            while self.__ativos >= self.__concorrencia:
+                self.__condicao.wait()
+            self.__ativos += 1
+        try:
+            yield
+        finally:
+            self.liberar_vaga()
+
+    def tentar_vaga(self):
+        """
+        Reserva uma vaga de concorrência sem esperar, para quem já segura outras vagas (ex: as abas do modo "tabs"):
+        esperar por uma vaga nesse caso poderia travar os workers uns nos outros. A vaga é devolvida com o liberar_vaga.
+
+        Returns:
+            bool: True se a vaga foi reservada.
+        """
+        with self.__condicao:
+            if self.__ativos >= self.__concorrencia:
+                return False
+            self.__ativos += 1
+            return True
+
+    @asynccontextmanager
+    async def vaga_async(self):
+        """
+        Mesmo que a vaga, para corrotinas: a espera não trava o event loop.
+        """
+        while True:
+            with self.__condicao:
+                if self.__ativos < self.__concorrencia:
+                    self.__ativos += 1
+                    break
+            await asyncio.sleep(self.INTERVALO_ASYNC)
+        try:
+            yield
+        finally:
+            self.liberar_vaga()
+
+    def liberar_vaga(self):
+        """
+        Devolve uma vaga reservada com o tentar_vaga.
+        """
+        with self.__condicao:
+            self.__ativos -= 1
+            self.__condicao.notify_all()
+
+    def registrar_sucesso(self, latencia):
+        """
+        Registra uma página (busca, janela ou aba) carregada com sucesso.
+
+        Args:
+            latencia (float): Tempo de carregamento da página, em segundos.
+        """
+        with self.__condicao:
+            self.__janela.append((True, float(latencia)))
+            self.__avaliar_janela()
+
+    def registrar_falha(self, tipo="erro"):
+        """
+        Registra uma página (busca, janela ou aba) que não carregou.
+
+        Args:
+            tipo (str): "timeout", "erro" ou "bloqueio" (captcha/consentimento). Um bloqueio reduz a taxa e a
+                        concorrência na hora e pausa todas as ações por pausa_bloqueio segundos.
+        """
+        with self.__condicao:
+            if tipo == "bloqueio":
+                self.__bloqueios += 1
+                self.__pausado_ate = time.monotonic() + self.__pausa_bloqueio
+                self.__reduzir(f"página de bloqueio, pausando por {self.__pausa_bloqueio:.0f}s")
+                return
+            self.__janela.append((False, None))
+            self.__avaliar_janela()
+
+    def __avaliar_janela(self):
+        # Só ajusta quando a janela está completa, e começa uma janela nova depois de cada ajuste
+        if len(self.__janela) < self.__janela.maxlen:
+            return
+        latencias = [latencia for sucesso, latencia in self.__janela if sucesso]
+        taxa_sucesso = len(latencias) / len(self.__janela)
+        mediana = statistics.median(latencias) if latencias else float("inf")
+        if taxa_sucesso < self.__taxa_sucesso_minima or mediana > self.__latencia_alvo:
+            self.__reduzir(f"sucesso {taxa_sucesso:.0%}, latência mediana {mediana:.1f}s")
+            return
+        self.__taxa = min(self.__taxa_maxima, self.__taxa + self.__incremento)
+        self.__concorrencia = min(self.__concorrencia_maxima, self.__concorrencia + 1)
+        self.__janela.clear()
+        self.__condicao.notify_all()
+
+    def __reduzir(self, motivo):
+        self.__taxa = max(self.__taxa_minima, self.__taxa * self.__fator_reducao)
+        self.__concorrencia = max(1, int(self.__concorrencia * self.__fator_reducao))
+        self.__tokens = min(self.__tokens, 0.0)
+        self.__janela.clear()
+        log_info("Reduzindo o ritmo (%s): %.2f ações/s, %s página(s) ao mesmo tempo", motivo, self.__taxa, self.__concorrencia)
+
+    def resumo(self):
+        """
+        Estado atual do controlador.
+
+        Returns:
+            dict: {"taxa", "concorrencia", "bloqueios"}.
+        """
+        with self.__condicao:
+            return {"taxa": self.__taxa, "concorrencia": self.__concorrencia, "bloqueios": self.__bloqueios}
+
+def criar_controlador(config):
+    """
+    Cria o controlador a partir da seção [vazao] do config.toml.
+
+    Args:
+        config: configuração carregada do config.toml
+    Returns:
+        ControladorVazao, ou None se a seção não existir ou estiver desativada
+    """
+    vazao = dict(config.get("vazao", {}))
+    if not vazao.pop("ativo", False):
+        return None
+    # Cada worker carrega uma página por vez, menos no modo "tabs" e no backend cdp, que abrem várias abas por categoria
+    paginas_por_worker = 1
+    if config["base"].get("mode", "detail") == "tabs" or config["base"].get("backend", "selenium") == "cdp":
+        paginas_por_worker = max(1, int(config["base"].get("abas_simultaneas", 4)))
+    return ControladorVazao(concorrencia_maxima=int(config["base"].get("workers", 1)) * paginas_por_worker, **vazao)
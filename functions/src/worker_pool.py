@@ -0,0 +1,602 @@
+from functions.utils import selenium_web
+from functions.src.google_map import collect_data, GOOGLE_MAPS_URL
+from functions.src.place_index import IndiceLugares
+from functions.src.planner import ordem_de_coleta
+from functions.src.throttle import criar_controlador
+from functions.utils.job_store import PENDENTE, LeasePerdido
+from functions.utils.logger import log_info, log_error, log_debug
+from functions.utils.metrics import medir, contar_item, registrar_recurso
+from contextlib import contextmanager, nullcontext
+import os
+import queue
+import socket
+import threading
+import time
+
+def coletar_categoria(driver, establishment_type, qtd_results, tentativas_maximas, url_google_maps, journal=None,
+                      cache=None, opcoes_coleta=None):
+    """
+    Coleta os dados de uma categoria, recuperando o navegador em caso de erro e continuando do estabelecimento que falhou.
+
+    Args:
+        driver: driver do navegador
+        establishment_type: tipo de estabelecimento a ser buscado
+        qtd_results: quantidade de resultados a serem coletados
+        tentativas_maximas: número máximo de tentativas de coleta
+        url_google_maps: url aberta novamente após reiniciar o navegador
+        journal: diário em disco onde cada estabelecimento é gravado assim que é coletado
+        cache: cache de buscas onde o resultado completo da categoria é salvo
+        opcoes_coleta: argumentos extras repassados ao collect_data (mode, janela_abas, prefetch, place_index...)
+    Returns:
+        dicionário com os dados coletados ou None caso todas as tentativas falhem
+    """
+    tentativas = 0
+    # Estabelecimentos já coletados nesta categoria, mantidos entre as tentativas
+    # para que uma nova tentativa continue do índice que falhou em vez de recomeçar do zero
+    parciais = {}
+    if journal is not None:
+        # Índices gravados em uma execução anterior (--resume) não são coletados de novo
+        ja_coletados = journal.indices_coletados(establishment_type)
+    else:
+        ja_coletados = set()
+
+    def on_item(indice, dados):
+        parciais[indice] = dados
+        contar_item()
+        if journal is not None:
+            journal.registrar_item(establishment_type, indice, dados)
+
+    while tentativas < tentativas_maximas:
+        try:
+            with medir("category"):
+                result_research = collect_data(driver, establishment_type, qtd_results, skip_indices=ja_coletados | set(parciais),
+                                               on_item=on_item, **(opcoes_coleta or {}))
+            if journal is not None:
+                journal.concluir_categoria(establishment_type)
+            result_research = dict(sorted({**parciais, **result_research}.items()))
+            # Só salvo no cache quando a categoria inteira foi coletada nesta execução
+            if cache is not None and not ja_coletados:
+                cache.salvar(establishment_type, qtd_results, result_research)
+            log_info("Dados coletados para o estabelecimento do tipo: %s", establishment_type)
+            log_debug("Dados coletados: %s", result_research)
+            return result_research
+        except LeasePerdido:
+            # Outro worker pode estar com a categoria, então não adianta tentar de novo
+            raise
+        except Exception as e:
+            log_error("Erro ao coletar dados: %s", e)
+            tentativas += 1
+            log_info("%s estabelecimento(s) já coletados nesta categoria serão mantidos", len(parciais))
+            # A recuperação é feita em etapas: o próprio collect_data já tenta abrir o cartão de novo algumas vezes;
+            # na primeira falha da categoria só recarrego o Google Maps para refazer a busca,
+            # e só nas falhas seguintes reinicio o navegador inteiro.
+            _recuperar(driver, tentativas, url_google_maps)
+    log_error("Número máximo de tentativas atingido para o estabelecimento do tipo: %s", establishment_type)
+    return None
+
+def _recuperar(driver, tentativas, url_google_maps):
+    """
+    Recupera o navegador depois de uma falha, escalando conforme o número de falhas.
+
+    Args:
+        driver: driver do navegador
+        tentativas: quantidade de falhas da categoria até agora
+        url_google_maps: url aberta para refazer a busca
+    """
+    if tentativas == 1:
+        try:
+            log_info("Recarregando o Google Maps para refazer a busca")
+            with medir("open_url"):
+                driver.open_url(url_google_maps)
+            return
+        except Exception as e:
+            log_error("Erro ao recarregar o Google Maps: %s", e)
+    log_info("Reiniciando o navegador")
+    with medir("browser_restart"):
+        driver.restart_browser()
+    with medir("open_url"):
+        driver.open_url(url_google_maps)
+    time.sleep(1)
+
+def _opcoes_coleta(config, place_index=None, controlador=None, anteriores=None):
+    """
+    Monta os argumentos do collect_data a partir da seção [base] do config.toml.
+
+    Args:
+        config: configuração carregada do config.toml
+        place_index: índice de lugares compartilhado entre os workers
+        controlador: controlador de vazão compartilhado entre os workers
+        anteriores: resultados da execução anterior, na atualização incremental
+    Returns:
+        dicionário de argumentos para o collect_data
+    """
+    return {
+        "mode": config["base"].get("mode", "detail"),
+        "janela_abas": config["base"].get("abas_simultaneas", 4),
+        "prefetch": config["base"].get("cartoes_prefetch", 5),
+        "busca_direta": config["base"].get("busca_direta", True),
+        "idioma": config["base"].get("idioma") or None,
+        "viewport": config["base"].get("viewport") or None,
+        "url_base": config["base"].get("url_google_maps") or GOOGLE_MAPS_URL,
+        "place_index": place_index,
+        "controlador": controlador,
+        "anteriores": anteriores,
+    }
+
+def _reciclar_se_preciso(driver, config, url_google_maps):
+    """
+    Registra o uso de recursos do navegador e o reinicia se algum limite do config.toml foi atingido
+    (reciclar_rss_mb, reciclar_paginas, reciclar_minutos; 0 desativa o limite).
+
+    Args:
+        driver: driver do navegador
+        config: configuração carregada do config.toml
+        url_google_maps: url aberta depois de reiniciar o navegador
+    Returns:
+        True se o navegador foi reciclado
+    """
+    uso = driver.resource_usage()
+    log_info("Uso do navegador: memória %s MB, %s páginas, sessão com %.1f min",
+             "?" if uso["rss_mb"] is None else f"{uso['rss_mb']:.0f}", uso["paginas"], uso["idade_minutos"])
+    registrar_recurso("browser_rss_mb", uso["rss_mb"])
+    registrar_recurso("browser_pages", uso["paginas"])
+    registrar_recurso("browser_session_minutes", uso["idade_minutos"])
+
+    motivo = driver.recycle_reason(max_rss_mb=config["base"].get("reciclar_rss_mb", 0),
+                                   max_paginas=config["base"].get("reciclar_paginas", 0),
+                                   max_idade_minutos=config["base"].get("reciclar_minutos", 0))
+    if motivo is None:
+        return False
+    log_info("Reciclando o navegador: %s", motivo)
+    with medir("browser_recycle"):
+        driver.restart_browser()
+        driver.open_url(url_google_maps)
+    return True
+
+def _endereco_depuracao(endereco, numero):
+    """
+    Endereço de depuração do Chrome já aberto que o worker usa.
+    O worker 1 usa a porta configurada, o worker 2 a porta seguinte, e assim por diante.
+
+    Args:
+        endereco: endereço configurado ("host:porta"), ou vazio para abrir um Chrome novo
+        numero: número do worker
+    Returns:
+        o endereço do worker, ou None
+    """
+    if not endereco:
+        return None
+    host, porta = endereco.rsplit(":", 1)
+    return f"{host}:{int(porta) + numero - 1}"
+
+def _iniciar_navegador(driver, config, numero, url_google_maps):
+    """
+    Inicia o navegador de um worker e abre o Google Maps.
+
+    Args:
+        driver: WebAutomation ainda não iniciado
+        config: configuração carregada do config.toml
+        numero: número do worker, usado no nome da pasta de perfil do Chrome
+        url_google_maps: url inicial do navegador
+    """
+    pasta_perfis = config["base"].get("pasta_perfis")
+    user_data_dir = os.path.join(pasta_perfis, f"worker_{numero}") if pasta_perfis else None
+    log_info("Iniciando o driver")
+    with medir("driver_start"):
+        driver.startWebDriver(user_data_dir=user_data_dir, lean_mode=config["base"].get("lean_mode", False),
+                              debugger_address=_endereco_depuracao(config["base"].get("debugger_address"), numero),
+                              navegador_reserva=config["base"].get("navegador_reserva", False))
+    log_info("Abrindo o Google Maps")
+    with medir("open_url"):
+        driver.open_url(url_google_maps)
+
+class NavegadorAntecipado:
+    """
+    Navegador do worker 1 iniciado em segundo plano, para que a abertura do Chrome aconteça enquanto a planilha
+    é lida e o cache é consultado, em vez de depois.
+
+    O worker 1 pega o navegador com obter(). Se ninguém o usar (ex: todas as categorias vieram do cache),
+    descartar() o fecha sem esperar ele terminar de iniciar.
+    """
+
+    def __init__(self, config, url_google_maps):
+        self.__lock = threading.Lock()
+        self.__driver = None
+        self.__descartado = False
+        # Sem daemon: se o programa terminar antes do Chrome abrir, a thread ainda o fecha antes de o processo sair
+        self.__thread = threading.Thread(target=self.__iniciar, args=(config, url_google_maps), name="navegador-antecipado")
+        self.__thread.start()
+
+    def __iniciar(self, config, url_google_maps):
+        driver = selenium_web.WebAutomation()
+        try:
+            _iniciar_navegador(driver, config, 1, url_google_maps)
+        except Exception as e:
+            # O worker 1 tenta iniciar o navegador de novo por conta própria
+            log_error("Erro ao iniciar o navegador antecipado: %s", e)
+            driver.closer_chrome()
+            return
+        with self.__lock:
+            if not self.__descartado:
+                self.__driver = driver
+                return
+        log_info("Fechando o navegador antecipado, que não foi usado")
+        driver.closer_chrome()
+
+    def obter(self):
+        """
+        Espera o navegador terminar de iniciar e o entrega (só uma vez).
+
+        Returns:
+            o driver já com o Google Maps aberto, ou None se ele não iniciou ou já foi entregue
+        """
+        self.__thread.join()
+        with self.__lock:
+            driver, self.__driver = self.__driver, None
+        return driver
+
+    def descartar(self):
+        """
+        Fecha o navegador se ele não foi entregue a nenhum worker. Se ele ainda está iniciando, a própria thread
+        o fecha assim que terminar.
+        """
+        with self.__lock:
+            self.__descartado = True
+            driver, self.__driver = self.__driver, None
+        if driver is not None:
+            log_info("Fechando o navegador antecipado, que não foi usado")
+            driver.closer_chrome()
+
+class _FilaLocal:
+    """
+    Fila das categorias de uma execução local, em memória.
+    """
+
+    def __init__(self):
+        self.__fila = queue.Queue()
+
+    def adicionar(self, tarefa):
+        self.__fila.put(tarefa)
+
+    def proxima(self):
+        """
+        Próxima tarefa (posicao, establishment_type, qtd_results), ou None se a fila esvaziou.
+        """
+        try:
+            return self.__fila.get_nowait()
+        except queue.Empty:
+            return None
+
+    def em_coleta(self, tarefa, journal):
+        return nullcontext(journal)
+
+    def finalizar(self, tarefa, resultado):
+        self.__fila.task_done()
+
+    def vazia(self):
+        return self.__fila.empty()
+
+    def __len__(self):
+        return self.__fila.qsize()
+
+class _FilaDistribuida:
+    """
+    Adapta a fila de trabalhos compartilhada (functions/utils/job_store.py) para o loop do worker.
+
+    Cada worker reivindica uma categoria com um lease e o renova em uma thread enquanto a coleta roda.
+    Se a coleta falhar, a categoria é devolvida para a fila. Enquanto a fila estiver vazia (coordenador ainda
+    não carregou a planilha) ou houver categorias em andamento em outros workers, o worker continua esperando,
+    para pegar as que voltarem para a fila com o lease expirado.
+    """
+
+    def __init__(self, fila_trabalhos, no, lease_segundos=300, espera_segundos=10):
+        """
+        Args:
+            fila_trabalhos: fila de trabalhos compartilhada
+            no: identificador deste nó (ex: "host:pid"), completado com o nome de cada worker
+            lease_segundos: validade do lease de cada categoria
+            espera_segundos: intervalo entre as tentativas de pegar uma categoria quando não há nenhuma pendente
+        """
+        self.__fila_trabalhos = fila_trabalhos
+        self.__no = no
+        self.__lease_segundos = float(lease_segundos)
+        self.__espera_segundos = float(espera_segundos)
+
+    def __no_atual(self):
+        return f"{self.__no}:{threading.current_thread().name}"
+
+    def proxima(self):
+        while True:
+            tarefa = self.__fila_trabalhos.reivindicar(self.__no_atual(), self.__lease_segundos)
+            if tarefa is not None:
+                log_info("Categoria %s reivindicada", tarefa["categoria"])
+                return tarefa["posicao"], tarefa["categoria"], tarefa["qtd_results"]
+            # Com a fila ainda vazia o worker espera o coordenador carregar a planilha
+            situacao = self.__fila_trabalhos.situacao()
+            if any(situacao.values()) and self.__fila_trabalhos.finalizada():
+                return None
+            time.sleep(self.__espera_segundos)
+
+    @contextmanager
+    def em_coleta(self, tarefa, journal):
+        """
+        Renova o lease da categoria enquanto o bloco roda (heartbeat) e entrega o journal que a coleta deve usar:
+        a própria fila de trabalhos, que deixa de aceitar os itens deste worker quando o lease é perdido.
+        """
+        no = self.__no_atual()
+        parar = threading.Event()
+        perdido = threading.Event()
+
+        def renovar():
+            while not parar.wait(self.__lease_segundos / 3):
+                try:
+                    if not self.__fila_trabalhos.renovar(tarefa[1], no, self.__lease_segundos):
+                        log_error("Lease da categoria %s perdido, interrompendo a coleta", tarefa[1])
+                        perdido.set()
+                        return
+                except Exception as e:
+                    log_error("Erro ao renovar o lease da categoria %s: %s", tarefa[1], e)
+
+        heartbeat = threading.Thread(target=renovar, name=f"lease-{threading.current_thread().name}", daemon=True)
+        heartbeat.start()
+        try:
+            yield _JournalComLease(self.__fila_trabalhos, no, perdido)
+        finally:
+            parar.set()
+            heartbeat.join()
+
+    def finalizar(self, tarefa, resultado):
+        # Em caso de sucesso a categoria já foi concluída pelo coletar_categoria (a fila de trabalhos é o journal)
+        if resultado is None:
+            self.__fila_trabalhos.liberar(tarefa[1], self.__no_atual(), "falha na coleta")
+
+    def vazia(self):
+        return self.__fila_trabalhos.situacao()[PENDENTE] == 0
+
+    def __len__(self):
+        return self.__fila_trabalhos.situacao()[PENDENTE]
+
+class _JournalComLease:
+    """
+    Journal de uma categoria reivindicada na fila de trabalhos. Os itens só são gravados enquanto o heartbeat
+    mantém o lease; depois disso o próximo item levanta LeasePerdido, o que interrompe a coleta. A conclusão
+    da categoria é conferida pela própria fila (dono e validade do lease).
+    """
+
+    def __init__(self, fila_trabalhos, no, perdido):
+        self.__fila_trabalhos = fila_trabalhos
+        self.__no = no
+        self.__perdido = perdido
+
+    def __verificar_lease(self, categoria):
+        if self.__perdido.is_set():
+            raise LeasePerdido(f"O lease da categoria {categoria} não pertence mais a {self.__no}")
+
+    def registrar_item(self, categoria, indice, dados):
+        self.__verificar_lease(categoria)
+        self.__fila_trabalhos.registrar_item(categoria, indice, dados)
+
+    def concluir_categoria(self, categoria):
+        self.__verificar_lease(categoria)
+        self.__fila_trabalhos.concluir_categoria(categoria, self.__no)
+
+    def indices_coletados(self, categoria):
+        return self.__fila_trabalhos.indices_coletados(categoria)
+
+def _worker(numero, fila, resultados, trava, config, url_google_maps, journal=None, cache=None, place_index=None,
+            controlador=None, anteriores=None, antecipado=None):
+    """
+    Loop de um worker: abre o seu próprio navegador e consome categorias da fila até ela esvaziar.
+
+    Args:
+        numero: número do worker, usado no nome da pasta de perfil do Chrome
+        fila: fila com as tarefas (posicao, establishment_type, qtd_results), local ou distribuída
+        resultados: dicionário compartilhado onde os resultados são guardados por posição
+        trava: lock que protege o dicionário de resultados
+        config: configuração carregada do config.toml
+        url_google_maps: url inicial do navegador
+        journal: diário em disco compartilhado entre os workers
+        cache: cache de buscas compartilhado entre os workers
+        place_index: índice de lugares compartilhado entre os workers
+        controlador: controlador de vazão que limita o ritmo e quantas páginas carregam ao mesmo tempo
+        anteriores: resultados da execução anterior, na atualização incremental
+        antecipado: navegador já iniciado em segundo plano (NavegadorAntecipado), usado pelo worker 1
+    """
+    driver = antecipado.obter() if antecipado is not None and numero == 1 else None
+    if driver is None:
+        driver = selenium_web.WebAutomation()
+        try:
+            _iniciar_navegador(driver, config, numero, url_google_maps)
+        except Exception as e:
+            # Se o navegador desse worker não subir, as categorias continuam na fila para os outros workers
+            log_error("Erro ao iniciar o navegador do worker: %s", e)
+            driver.closer_chrome()
+            return
+
+    try:
+        while True:
+            tarefa = fila.proxima()
+            if tarefa is None:
+                break
+            posicao, establishment_type, qtd_results = tarefa
+            result_research = None
+            try:
+                with fila.em_coleta(tarefa, journal) as journal_tarefa:
+                    result_research = coletar_categoria(driver, establishment_type, qtd_results,
+                                                        config["base"]["tentativas_maximas"], url_google_maps, journal_tarefa,
+                                                        cache, _opcoes_coleta(config, place_index, controlador, anteriores))
+            except LeasePerdido as e:
+                # A categoria ficou com outro worker; este segue para a próxima
+                log_error("Coleta de %s interrompida: %s", establishment_type, e)
+            except Exception as e:
+                # Erro fora do fluxo de retry (ex: falha ao reiniciar o navegador), o worker é encerrado
+                log_error("Erro fatal no worker ao coletar %s: %s", establishment_type, e)
+                break
+            finally:
+                fila.finalizar(tarefa, result_research)
+            if result_research is not None:
+                with trava:
+                    resultados[posicao] = (establishment_type, result_research)
+            # Entre uma categoria e outra, o navegador é reciclado se passou dos limites de uso
+            if not fila.vazia():
+                try:
+                    _reciclar_se_preciso(driver, config, url_google_maps)
+                except Exception as e:
+                    log_error("Erro ao reciclar o navegador do worker: %s", e)
+                    break
+    finally:
+        log_info("Fechando o driver")
+        driver.closer_chrome()
+
+def executar_workers(tarefas, config, url_google_maps, journal=None, cache=None, usar_cache=True, anteriores=None,
+                     antecipado=None):
+    """
+    Distribui as categorias entre um pool de workers, cada um com a sua própria sessão do Chrome.
+
+    Args:
+        tarefas: lista de tuplas (establishment_type, qtd_results) na ordem da planilha
+        config: configuração carregada do config.toml
+        url_google_maps: url inicial dos navegadores
+        journal: diário em disco; categorias já concluídas nele não são coletadas novamente
+        cache: cache de buscas; categorias com resultado válido nele não abrem o navegador
+        usar_cache: se False o cache não é consultado (só atualizado), como no --refresh
+        anteriores: resultados da execução anterior (ResultadosAnteriores); lugares sem alterações não têm a janela aberta
+        antecipado: navegador já iniciado em segundo plano (NavegadorAntecipado), usado pelo primeiro worker
+    Returns:
+        dicionário com os resultados por tipo de estabelecimento, na ordem da planilha
+    """
+    fila = _FilaLocal()
+    resultados = {}
+    # As categorias entram na fila das maiores para as menores; o resultado continua na ordem da planilha
+    for posicao in ordem_de_coleta(tarefas):
+        establishment_type, qtd_results = tarefas[posicao]
+        if journal is not None and journal.categoria_concluida(establishment_type):
+            log_info("Categoria %s já concluída no diário, pulando", establishment_type)
+            continue
+        em_cache = atender_pelo_cache(establishment_type, qtd_results, journal, cache) if usar_cache else None
+        if em_cache is not None:
+            resultados[posicao] = (establishment_type, em_cache)
+            continue
+        fila.adicionar((posicao, establishment_type, qtd_results))
+
+    if fila.vazia():
+        log_info("Nenhuma categoria pendente para coletar no navegador")
+        qtd_workers = 0
+    else:
+        qtd_workers = max(1, min(int(config["base"].get("workers", 1)), len(fila)))
+        log_info("Iniciando %s worker(s) para %s categoria(s)", qtd_workers, len(fila))
+
+    resultados.update(_rodar_workers(qtd_workers, fila, config, url_google_maps, journal, cache, anteriores, antecipado))
+    if anteriores is not None:
+        resumo = anteriores.resumo()
+        log_info("Atualização incremental: %s lugar(es) sem alterações reaproveitado(s), %s alterado(s), %s novo(s)",
+                 resumo["reaproveitados"], resumo["alterados"], resumo["novos"])
+    if not fila.vazia():
+        log_error("%s categoria(s) não foram processadas, todos os workers foram encerrados", len(fila))
+
+    # Monta o resultado final na mesma ordem da planilha
+    full_result_research = {}
+    for posicao in sorted(resultados):
+        establishment_type, result_research = resultados[posicao]
+        full_result_research[establishment_type] = result_research
+    return full_result_research
+
+def executar_workers_distribuidos(fila_trabalhos, config, url_google_maps, cache=None):
+    """
+    Roda os workers deste nó contra a fila de trabalhos compartilhada (modo --worker).
+    Os workers pegam categorias até que não haja nenhuma pendente ou em andamento na fila,
+    e os estabelecimentos coletados são gravados na própria fila.
+
+    Args:
+        fila_trabalhos: fila de trabalhos compartilhada carregada pelo coordenador
+        config: configuração carregada do config.toml
+        url_google_maps: url inicial dos navegadores
+        cache: cache de buscas onde o resultado de cada categoria é salvo
+    """
+    distribuido = config.get("distribuido", {})
+    fila = _FilaDistribuida(fila_trabalhos, distribuido.get("no") or f"{socket.gethostname()}:{os.getpid()}",
+                            lease_segundos=distribuido.get("lease_segundos", 300),
+                            espera_segundos=distribuido.get("espera_segundos", 10))
+    qtd_workers = max(1, int(config["base"].get("workers", 1)))
+    log_info("Iniciando %s worker(s) na fila de trabalhos compartilhada", qtd_workers)
+    _rodar_workers(qtd_workers, fila, config, url_google_maps, fila_trabalhos, cache)
+
+def atender_pelo_cache(establishment_type, qtd_results, journal=None, cache=None):
+    """
+    Atende uma categoria pelo cache de buscas, sem abrir o navegador, gravando o resultado no journal.
+
+    Args:
+        establishment_type: tipo de estabelecimento
+        qtd_results: quantidade de resultados pedida
+        journal: diário (ou fila de trabalhos) onde o resultado é gravado e a categoria concluída
+        cache: cache de buscas
+    Returns:
+        dicionário com os resultados em cache, ou None se não houver resultado válido
+    """
+    em_cache = cache.buscar(establishment_type, qtd_results) if cache is not None else None
+    if em_cache is None:
+        return None
+    log_info("Categoria %s atendida pelo cache (%s resultado(s))", establishment_type, len(em_cache))
+    if journal is not None:
+        for indice, dados in em_cache.items():
+            journal.registrar_item(establishment_type, indice, dados)
+        journal.concluir_categoria(establishment_type)
+    return em_cache
+
+def _rodar_workers(qtd_workers, fila, config, url_google_maps, journal=None, cache=None, anteriores=None, antecipado=None):
+    """
+    Inicia os workers, cada um com a sua própria sessão do Chrome, e espera todos terminarem.
+
+    Args:
+        qtd_workers: quantidade de workers
+        fila: fila com as tarefas, local ou distribuída
+        config: configuração carregada do config.toml
+        url_google_maps: url inicial dos navegadores
+        journal: diário (ou fila de trabalhos) onde cada estabelecimento é gravado
+        cache: cache de buscas compartilhado entre os workers
+        anteriores: resultados da execução anterior, na atualização incremental
+        antecipado: navegador já iniciado em segundo plano, usado pelo worker 1
+    Returns:
+        dicionário {posicao: (establishment_type, resultado)} das categorias coletadas
+    """
+    resultados = {}
+    # Índice de lugares da execução: o mesmo lugar em várias categorias só tem a janela aberta uma vez
+    place_index = IndiceLugares() if config["base"].get("deduplicar_lugares", True) else None
+    # Controlador de vazão compartilhado: ajusta o ritmo das ações e quantas páginas carregam ao mesmo tempo
+    controlador = criar_controlador(config)
+
+    backend = config["base"].get("backend", "selenium")
+    if backend == "cdp" and isinstance(fila, _FilaLocal) and qtd_workers:
+        # Import tardio: o backend cdp depende do pacote opcional websockets
+        from functions.src.async_pool import executar_workers_async
+        log_info("Backend cdp: %s worker(s) como páginas de um único Chrome", qtd_workers)
+        resultados = executar_workers_async(qtd_workers, fila, config, url_google_maps, journal, cache, place_index,
+                                            controlador, anteriores)
+        _registrar_resumo(place_index, controlador)
+        return resultados
+    if backend == "cdp":
+        log_error("O backend cdp não suporta a fila de trabalhos distribuída, usando o selenium")
+
+    trava = threading.Lock()
+    threads = [
+        # daemon=True para que um Ctrl-C encerre a execução; o que já foi coletado está salvo no diário
+        threading.Thread(target=_worker, name=f"worker-{numero}", daemon=True,
+                         args=(numero, fila, resultados, trava, config, url_google_maps, journal, cache, place_index,
+                               controlador, anteriores, antecipado))
+        for numero in range(1, qtd_workers + 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    _registrar_resumo(place_index, controlador)
+    return resultados
+
+def _registrar_resumo(place_index, controlador):
+    if place_index is not None:
+        log_info("%s lugar(es) distintos coletados, %s reaproveitado(s) entre categorias", len(place_index), place_index.reaproveitados)
+    if controlador is not None:
+        estado = controlador.resumo()
+        log_info("Ritmo final: %.2f ações/s, %s página(s) ao mesmo tempo, %s bloqueio(s) detectado(s)",
+                 estado["taxa"], estado["concorrencia"], estado["bloqueios"])
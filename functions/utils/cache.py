@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import sqlite3
+import unicodedata
+from contextlib import contextmanager
+
+def normalizar_termo(termo):
+    """
+    Normaliza um termo de busca para ser usado como chave do cache:
+    minúsculo, sem acentos e com os espaços colapsados.
+
+    Args:
+        termo (str): Termo de busca.
+
+    Returns:
+        str: Termo normalizado.
+    """
+    sem_acento = unicodedata.normalize("NFKD", str(termo)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.lower().split())
+
+class CacheBuscas:
+    """
+    Cache em SQLite dos resultados de cada busca, com tempo de validade.
+
+    A chave é o termo de busca normalizado. Um resultado salvo com uma quantidade maior
+    também atende pedidos menores (são devolvidos apenas os primeiros resultados).
+    """
+
+    def __init__(self, filepath, ttl_horas=24):
+        """
+        Abre (ou cria) o banco do cache.
+
+        Args:
+            filepath (str): Caminho do arquivo SQLite.
+            ttl_horas (float): Validade dos resultados em horas.
+        """
+        self.__filepath = filepath
+        self.__ttl_segundos = float(ttl_horas) * 3600
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with self.__conectar() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS buscas ("
+                " termo TEXT PRIMARY KEY,"
+                " qtd_results INTEGER NOT NULL,"
+                " coletado_em REAL NOT NULL,"
+                " dados TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def __conectar(self):
+        # Uma conexão por operação, assim o cache pode ser usado por vários workers ao mesmo tempo
+        conexao = sqlite3.connect(self.__filepath, timeout=30)
+        try:
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    def buscar(self, termo, qtd_results):
+        """
+        Retorna os resultados em cache de uma busca, caso estejam dentro da validade
+        e cubram a quantidade pedida.
+
+        Args:
+            termo (str): Termo de busca.
+            qtd_results (int): Quantidade de resultados pedida.
+
+        Returns:
+            dict: {indice: dados} com os primeiros qtd_results resultados, ou None se não houver cache válido.
+        """
+        with self.__conectar() as conexao:
+            linha = conexao.execute(
+                "SELECT qtd_results, coletado_em, dados FROM buscas WHERE termo = ?",
+                (normalizar_termo(termo),),
+            ).fetchone()
+        if linha is None:
+            return None
+        qtd_salva, coletado_em, dados = linha
+        if time.time() - coletado_em > self.__ttl_segundos or qtd_salva < int(qtd_results):
+            return None
+        resultados = {int(indice): valor for indice, valor in json.loads(dados).items()}
+        return {indice: resultados[indice] for indice in sorted(resultados) if indice < int(qtd_results)}
+
+    def salvar(self, termo, qtd_results, resultados):
+        """
+        Salva os resultados de uma busca. Um resultado ainda válido com uma quantidade maior não é sobrescrito.
+
+        Args:
+            termo (str): Termo de busca.
+            qtd_results (int): Quantidade de resultados pedida na busca.
+            resultados (dict): {indice: dados} retornado pelo collect_data.
+        """
+        agora = time.time()
+        with self.__conectar() as conexao:
+            linha = conexao.execute(
+                "SELECT qtd_results, coletado_em FROM buscas WHERE termo = ?",
+                (normalizar_termo(termo),),
+            ).fetchone()
+            if linha is not None and agora - linha[1] <= self.__ttl_segundos and linha[0] > int(qtd_results):
+                return
+            conexao.execute(
+                "INSERT OR REPLACE INTO buscas (termo, qtd_results, coletado_em, dados) VALUES (?, ?, ?, ?)",
+                (normalizar_termo(termo), int(qtd_results), agora, json.dumps(resultados, ensure_ascii=False)),
+            )
@@ -0,0 +1,638 @@
+from functions.utils.selenium_web import WebAutomation
+from functions.utils.selector_registry import CamposExtraidos, Seletor, variantes_js, campos_js, registrar_extracao
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+# websockets é opcional: só é necessário com o backend "cdp"
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+class ErroCDP(RuntimeError):
+    """
+    Erro devolvido pelo Chrome para um comando do DevTools Protocol (ex: contexto da página destruído por uma navegação).
+    """
+
+class _ConexaoCDP:
+    """
+    Conexão websocket com o Chrome. Cada comando recebe um id e a resposta é entregue por uma tarefa de leitura,
+    então vários comandos (de várias páginas) podem estar em andamento ao mesmo tempo. Os eventos de cada sessão
+    são entregues à função registrada com ouvir().
+    """
+
+    def __init__(self, websocket):
+        self.__websocket = websocket
+        self.__ids = itertools.count(1)
+        self.__pendentes = {}
+        self.__ouvintes = {}
+        self.__leitura = asyncio.create_task(self.__ler())
+
+    @classmethod
+    async def conectar(cls, url):
+        if websockets is None:
+            raise ImportError("O backend cdp precisa do pacote websockets (pip install websockets)")
+        return cls(await websockets.connect(url, max_size=None, ping_interval=None))
+
+    async def __ler(self):
+        try:
+            async for mensagem in self.__websocket:
+                dados = json.loads(mensagem)
+                # Eventos não têm id: vão para o ouvinte da sessão, se houver
+                if "id" not in dados:
+                    ouvinte = self.__ouvintes.get(dados.get("sessionId"))
+                    if ouvinte is not None and "method" in dados:
+                        ouvinte(dados["method"], dados.get("params", {}))
+                    continue
+                futuro = self.__pendentes.pop(dados.get("id"), None)
+                if futuro is None or futuro.done():
+                    continue
+                if "error" in dados:
+                    futuro.set_exception(ErroCDP(dados["error"].get("message", "erro desconhecido")))
+                else:
+                    futuro.set_result(dados.get("result", {}))
+        finally:
+            for futuro in self.__pendentes.values():
+                if not futuro.done():
+                    futuro.set_exception(ConnectionError("Conexão com o Chrome encerrada"))
+            self.__pendentes.clear()
+
+    async def enviar(self, metodo, params=None, sessao=None, timeout=30):
+        """
+        Envia um comando e espera a resposta.
+
+        Args:
+            metodo (str): Comando do DevTools Protocol (ex: "Page.navigate").
+            params (dict): Parâmetros do comando.
+            sessao (str): Sessão da página; None envia para o navegador.
+            timeout (float): Tempo máximo de espera pela resposta, em segundos.
+        Returns:
+            dict: O resultado do comando.
+        """
+        id_comando = next(self.__ids)
+        mensagem = {"id": id_comando, "method": metodo, "params": params or {}}
+        if sessao is not None:
+            mensagem["sessionId"] = sessao
+        futuro = asyncio.get_running_loop().create_future()
+        self.__pendentes[id_comando] = futuro
+        try:
+            await self.__websocket.send(json.dumps(mensagem))
+            return await asyncio.wait_for(futuro, timeout)
+        finally:
+            self.__pendentes.pop(id_comando, None)
+
+    def ouvir(self, sessao, ouvinte):
+        """
+        Registra a função que recebe os eventos (metodo, params) de uma sessão. None remove o ouvinte.
+        """
+        if ouvinte is None:
+            self.__ouvintes.pop(sessao, None)
+        else:
+            self.__ouvintes[sessao] = ouvinte
+
+    async def fechar(self):
+        await self.__websocket.close()
+        self.__leitura.cancel()
+
+def _ler_json(url):
+    with urllib.request.urlopen(url, timeout=10) as resposta:
+        return json.loads(resposta.read().decode("utf-8"))
+
+def _encontrar_chrome():
+    """
+    Caminho do executável do Chrome: variável de ambiente CHROME_PATH, PATH ou o local padrão no Windows.
+    """
+    candidatos = [os.environ.get("CHROME_PATH")]
+    candidatos += [shutil.which(nome) for nome in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")]
+    candidatos += [os.path.join(os.environ.get(pasta, ""), "Google", "Chrome", "Application", "chrome.exe")
+                   for pasta in ("PROGRAMFILES", "PROGRAMFILES(X86)", "LOCALAPPDATA")]
+    for caminho in candidatos:
+        if caminho and os.path.isfile(caminho):
+            return caminho
+    raise FileNotFoundError("Chrome não encontrado, informe o caminho em caminho_chrome ou na variável CHROME_PATH")
+
+class AsyncWebAutomation:
+    """
+    Versão assíncrona do WebAutomation, falando direto com o Chrome pelo DevTools Protocol (websocket), sem chromedriver.
+
+    Tem a mesma superfície de navegação, elementos e esperas do WebAutomation (open_url, click_on_element, get_text,
+    wait_element, scroll_to_element, extract_fields...), com métodos async. Em vez de abas, cada página é um objeto
+    próprio (new_page), e várias páginas podem ser usadas ao mesmo tempo pelo mesmo event loop, sobre uma única conexão.
+    Os elementos são sempre resolvidos dentro da página pelos seletores, então os métodos não recebem nem devolvem WebElements.
+    """
+
+    # Intervalo entre as verificações das esperas, em segundos
+    POLL_FREQUENCY = 0.1
+
+    # Mesmos recursos bloqueados e scripts de busca do WebAutomation
+    LEAN_BLOCKED_URLS = WebAutomation.LEAN_BLOCKED_URLS
+    _EXTRACT_FIELDS_JS = WebAutomation._EXTRACT_FIELDS_JS
+
+    # Script que procura um seletor e executa uma ação no elemento encontrado, devolvendo o resultado da busca
+    _ACAO_JS = WebAutomation._LOCALIZAR_JS + """
+        const busca = localizar(arguments[0]);
+        const el = busca.elemento;
+        let valor = null;
+        if (el) {
+            if (arguments[1] === "texto") {
+                valor = (el.innerText || el.textContent || "").trim();
+            } else if (arguments[1] === "rolar") {
+                el.scrollIntoView();
+            } else if (arguments[1] === "centro") {
+                el.scrollIntoView({block: "center"});
+                const caixa = el.getBoundingClientRect();
+                valor = {x: caixa.left + caixa.width / 2, y: caixa.top + caixa.height / 2};
+            } else if (arguments[1] === "clicar") {
+                el.click();
+            } else if (arguments[1] === "limpar") {
+                el.focus();
+                if ("value" in el) { el.value = ""; el.dispatchEvent(new Event("input", {bubbles: true})); }
+            } else if (arguments[1] === "focar") {
+                el.focus();
+            } else if (arguments[1] === "visivel") {
+                valor = !!(el.offsetParent || el.getClientRects().length);
+            } else if (arguments[1] === "existe") {
+                // Só a busca: usado pelas esperas, que querem saber se o elemento já está na página
+            } else {
+                throw new Error("Ação desconhecida: " + arguments[1]);
+            }
+        }
+        return {encontrado: !!el, indice: busca.indice, tentativas: busca.tentativas, valor: valor};
+    """
+
+    def __init__(self):
+        self.__conexao = None
+        self.__processo = None
+        self.__pasta_temporaria = None
+        self.__contexto = None
+        self.__last_config = {}
+        # Página desta instância e as páginas abertas a partir dela com new_page()
+        self.__alvo = None
+        self.__sessao = None
+        self.__principal = self
+        self.__paginas_abertas = []
+        self.__inicio_sessao = time.monotonic()
+        self.__paginas = 0
+        # Bytes transferidos desde a última navegação, somados pelos eventos Network.loadingFinished
+        self.__bytes_transferidos = 0
+        self.__do_cache = set()
+
+    # ========================
+    # 1 - NAVEGAÇÃO
+    # ========================
+
+    async def startWebDriver(self, anonimo=False, mostra_janela_chrome=True, desativar_sandbox=False, user_data_dir=None,
+                             lean_mode=False, debugger_address=None, caminho_chrome=None):
+        """
+        Inicia o Chrome com a porta de depuração aberta (ou conecta a um Chrome já aberto) e abre a primeira página.
+
+        Args:
+            anonimo (bool): Se True, as páginas são abertas em um contexto anônimo.
+            mostra_janela_chrome (bool): Se True, mostra a janela do navegador.
+            desativar_sandbox (bool): Se True, desativa o sandbox.
+            user_data_dir (str): Pasta de perfil do Chrome. Sem ela é usada uma pasta temporária.
+            lean_mode (bool): Se True, bloqueia imagens, fontes, mídia e tiles do mapa e desativa GPU e animações.
+            debugger_address (str): Endereço de depuração ("host:porta") de um Chrome já aberto com
+                                    --remote-debugging-port. Se informado, as demais opções do navegador são ignoradas.
+            caminho_chrome (str): Executável do Chrome. Sem ele o Chrome é procurado no CHROME_PATH, no PATH e no local padrão.
+
+        Returns:
+            AsyncWebAutomation: A própria instância, já com uma página aberta.
+        """
+        self.__last_config = {
+            "anonimo": anonimo,
+            "mostra_janela_chrome": mostra_janela_chrome,
+            "desativar_sandbox": desativar_sandbox,
+            "user_data_dir": user_data_dir,
+            "lean_mode": lean_mode,
+            "debugger_address": debugger_address,
+            "caminho_chrome": caminho_chrome,
+        }
+        endereco = debugger_address or await self.__iniciar_chrome()
+        versao = await asyncio.to_thread(_ler_json, f"http://{endereco}/json/version")
+        self.__conexao = await _ConexaoCDP.conectar(versao["webSocketDebuggerUrl"])
+        if anonimo:
+            self.__contexto = (await self.__conexao.enviar("Target.createBrowserContext"))["browserContextId"]
+        await self.__abrir_alvo()
+        self.__inicio_sessao = time.monotonic()
+        self.__paginas = 0
+        return self
+
+    async def __iniciar_chrome(self):
+        """
+        Abre o Chrome com --remote-debugging-port=0 e lê a porta escolhida no arquivo DevToolsActivePort do perfil.
+
+        Returns:
+            str: O endereço de depuração ("127.0.0.1:porta").
+        """
+        config = self.__last_config
+        pasta = config["user_data_dir"]
+        if not pasta:
+            pasta = self.__pasta_temporaria = tempfile.mkdtemp(prefix="chrome_cdp_")
+        os.makedirs(pasta, exist_ok=True)
+        arquivo_porta = os.path.join(pasta, "DevToolsActivePort")
+        if os.path.exists(arquivo_porta):
+            os.remove(arquivo_porta)
+
+        argumentos = [config["caminho_chrome"] or _encontrar_chrome(), "--remote-debugging-port=0", f"--user-data-dir={pasta}",
+                      "--no-first-run", "--no-default-browser-check"]
+        if not config["mostra_janela_chrome"]:
+            argumentos.append("--headless=new")
+        if config["desativar_sandbox"]:
+            argumentos.append("--no-sandbox")
+        if config["lean_mode"]:
+            argumentos += ["--disable-gpu", "--force-prefers-reduced-motion", "--mute-audio", "--blink-settings=imagesEnabled=false"]
+        self.__processo = await asyncio.create_subprocess_exec(*argumentos, "about:blank", stdout=subprocess.DEVNULL,
+                                                               stderr=subprocess.DEVNULL)
+
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            if self.__processo.returncode is not None:
+                raise RuntimeError(f"O Chrome encerrou ao iniciar (código {self.__processo.returncode})")
+            if os.path.exists(arquivo_porta):
+                with open(arquivo_porta, encoding="utf-8") as f:
+                    porta = f.readline().strip()
+                if porta:
+                    return f"127.0.0.1:{porta}"
+            await asyncio.sleep(self.POLL_FREQUENCY)
+        raise TimeoutError("Timeout ao esperar a porta de depuração do Chrome")
+
+    async def __abrir_alvo(self):
+        """
+        Cria a página desta instância no navegador e aplica as configurações feitas pelo DevTools Protocol.
+        """
+        principal = self.__principal
+        params = {"url": "about:blank"}
+        if principal.__contexto:
+            params["browserContextId"] = principal.__contexto
+        self.__alvo = (await self.__conexao.enviar("Target.createTarget", params))["targetId"]
+        self.__sessao = (await self.__conexao.enviar("Target.attachToTarget", {"targetId": self.__alvo, "flatten": True}))["sessionId"]
+        # Os eventos de rede da página alimentam o page_transfer_bytes
+        self.__bytes_transferidos = 0
+        self.__do_cache = set()
+        self.__conexao.ouvir(self.__sessao, self.__evento_rede)
+        await self.__comando("Network.enable")
+        if principal.__last_config.get("lean_mode"):
+            await self.__comando("Network.setBlockedURLs", {"urls": list(self.LEAN_BLOCKED_URLS)})
+
+    def __evento_rede(self, metodo, params):
+        """
+        Mesma contagem do log de performance no WebAutomation, com os eventos de rede desta página.
+        """
+        if metodo == "Network.requestWillBeSent":
+            if params.get("type") == "Document" and params.get("frameId") == self.__alvo:
+                self.__bytes_transferidos = 0
+                self.__do_cache.clear()
+        elif metodo == "Network.requestServedFromCache":
+            self.__do_cache.add(params.get("requestId"))
+        elif metodo == "Network.responseReceived":
+            if params.get("response", {}).get("fromDiskCache"):
+                self.__do_cache.add(params.get("requestId"))
+        elif metodo == "Network.loadingFinished":
+            if params.get("requestId") in self.__do_cache:
+                self.__do_cache.discard(params.get("requestId"))
+            else:
+                self.__bytes_transferidos += params.get("encodedDataLength") or 0
+
+    async def __comando(self, metodo, params=None, timeout=30):
+        return await self.__conexao.enviar(metodo, params, self.__sessao, timeout)
+
+    async def new_page(self):
+        """
+        Abre uma nova página no mesmo navegador, que pode ser usada ao mesmo tempo que as demais.
+
+        Returns:
+            AsyncWebAutomation: A nova página.
+        """
+        principal = self.__principal
+        pagina = AsyncWebAutomation()
+        pagina.__principal = principal
+        pagina.__conexao = principal.__conexao
+        await pagina.__abrir_alvo()
+        principal.__paginas_abertas.append(pagina)
+        return pagina
+
+    async def close_page(self):
+        """
+        Fecha esta página. Na página principal, equivale ao closer_chrome().
+        """
+        if self.__principal is self:
+            return await self.closer_chrome()
+        if self.__alvo is not None:
+            self.__conexao.ouvir(self.__sessao, None)
+            try:
+                await self.__conexao.enviar("Target.closeTarget", {"targetId": self.__alvo})
+            except (ErroCDP, ConnectionError):
+                pass
+            self.__alvo = None
+        if self in self.__principal.__paginas_abertas:
+            self.__principal.__paginas_abertas.remove(self)
+
+    async def closer_chrome(self):
+        """
+        Fecha o navegador. Conectado a um Chrome já aberto (debugger_address), fecha só as páginas abertas pelo programa.
+        """
+        principal = self.__principal
+        if principal.__conexao is not None:
+            if principal.__last_config.get("debugger_address"):
+                for pagina in list(principal.__paginas_abertas):
+                    await pagina.close_page()
+                try:
+                    await principal.__conexao.enviar("Target.closeTarget", {"targetId": principal.__alvo})
+                except (ErroCDP, ConnectionError):
+                    pass
+            await principal.__conexao.fechar()
+            principal.__conexao = None
+        principal.__paginas_abertas = []
+        if principal.__processo is not None:
+            if principal.__processo.returncode is None:
+                principal.__processo.terminate()
+                try:
+                    await asyncio.wait_for(principal.__processo.wait(), 10)
+                except asyncio.TimeoutError:
+                    principal.__processo.kill()
+            principal.__processo = None
+        if principal.__pasta_temporaria:
+            shutil.rmtree(principal.__pasta_temporaria, ignore_errors=True)
+            principal.__pasta_temporaria = None
+
+    async def restart_browser(self):
+        """
+        Reinicia completamente o navegador com a última configuração usada no startWebDriver.
+
+        Chamado em uma página aberta com new_page(), reinicia o navegador da página principal e abre esta página de novo
+        no navegador novo. As demais páginas abertas com new_page() são fechadas junto com o navegador.
+        """
+        principal = self.__principal
+        if not principal.__last_config:
+            raise RuntimeError("Nenhuma configuração encontrada. Você precisa chamar startWebDriver() primeiro.")
+        await principal.closer_chrome()
+        await principal.startWebDriver(**principal.__last_config)
+        if principal is not self:
+            self.__conexao = principal.__conexao
+            await self.__abrir_alvo()
+            principal.__paginas_abertas.append(self)
+        return self
+
+    async def open_url(self, url, wait_load=True, timeout=30):
+        """
+        Abre uma URL na página.
+
+        Args:
+            url (str): URL a ser aberta.
+            wait_load (bool): Se True, espera o carregamento completo da página.
+            timeout (int): Tempo máximo de espera em segundos.
+        """
+        self.__principal.__paginas += 1
+        resposta = await self.__comando("Page.navigate", {"url": url}, timeout)
+        if resposta.get("errorText"):
+            raise RuntimeError(f"Erro ao abrir {url}: {resposta['errorText']}")
+        if wait_load:
+            await self.wait_page_load(timeout)
+
+    async def execute_script(self, script, *args):
+        """
+        Executa um script na página, no mesmo formato do execute_script do Selenium (arguments[i] e return).
+
+        Returns:
+            O valor retornado pelo script (serializado em JSON).
+        """
+        expressao = f"(function() {{ {script} }}).apply(null, {json.dumps(list(args))})"
+        resposta = await self.__comando("Runtime.evaluate", {"expression": expressao, "returnByValue": True, "awaitPromise": True})
+        if "exceptionDetails" in resposta:
+            detalhes = resposta["exceptionDetails"]
+            raise RuntimeError(f"Erro no script da página: {detalhes.get('exception', {}).get('description') or detalhes.get('text')}")
+        return resposta.get("result", {}).get("value")
+
+    async def wait_page_load(self, timeout=30):
+        """
+        Aguarda o carregamento completo da página.
+
+        Args:
+            timeout (int): Tempo máximo de espera em segundos.
+        """
+        async def carregada():
+            return await self.execute_script("return document.readyState") == "complete"
+        return await self.wait_condition(carregada, timeout=timeout)
+
+    async def page_transfer_bytes(self):
+        """
+        Retorna quantos bytes a página atual transferiu pela rede desde que foi carregada.
+        Recursos vindos do cache contam como 0.
+        """
+        return self.__bytes_transferidos
+
+    async def get_current_url(self):
+        """
+        Retorna a URL atual da página.
+        """
+        return await self.execute_script("return location.href")
+
+    # ========================
+    # 2 - ELEMENTOS
+    # ========================
+
+    def __resolver(self, by, value, seletor):
+        if seletor is not None:
+            return seletor
+        if by is not None and value is not None:
+            return Seletor(value, [(by, value)])
+        raise ValueError("É necessário fornecer 'by' e 'value' ou 'seletor'.")
+
+    async def __acao(self, seletor, acao):
+        return await self.execute_script(self._ACAO_JS, variantes_js(seletor), acao) or {}
+
+    async def click_on_element(self, by=None, value=None, simulate_click=True, timeout=30, seletor=None):
+        """
+        Clica em um elemento da página.
+
+        Args:
+            by (str): Seletor CSS ou XPath.
+            value (str): Valor do seletor.
+            simulate_click (bool): Se True, clica com eventos de mouse no centro do elemento; se False, clica pelo JavaScript.
+            timeout (int): Tempo máximo de espera em segundos.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
+        """
+        seletor = self.__resolver(by, value, seletor)
+        if await self.wait_element(seletor=seletor, timeout=timeout) is None:
+            raise ValueError(f"Elemento não encontrado para clicar: {seletor.nome}")
+        if not simulate_click:
+            await self.__acao(seletor, "clicar")
+            return
+        centro = (await self.__acao(seletor, "centro")).get("valor")
+        if not centro:
+            raise ValueError(f"Elemento não encontrado para clicar: {seletor.nome}")
+        for tipo in ("mouseMoved", "mousePressed", "mouseReleased"):
+            evento = {"type": tipo, "x": centro["x"], "y": centro["y"]}
+            if tipo != "mouseMoved":
+                evento.update(button="left", clickCount=1)
+            await self.__comando("Input.dispatchMouseEvent", evento)
+
+    async def type_into(self, by=None, value=None, txt=None, limpar=True, timeout=30, send_enter=False, time_sleep_enter=0,
+                        seletor=None):
+        """
+        Digita um texto em um campo da página.
+
+        Args:
+            by (str): Seletor CSS ou XPath.
+            value (str): Valor do seletor.
+            txt (str): Texto a ser digitado.
+            limpar (bool): Se True, limpa o campo antes de digitar.
+            timeout (int): Tempo máximo de espera em segundos.
+            send_enter (bool): Se True, envia um Enter após digitar.
+            time_sleep_enter (int): Tempo de espera em segundos após enviar o Enter.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
+        """
+        if txt is None:
+            raise ValueError("O texto para digitar não pode ser None.")
+        seletor = self.__resolver(by, value, seletor)
+        if await self.wait_element(seletor=seletor, timeout=timeout) is None:
+            raise ValueError(f"Campo não encontrado para digitar: {seletor.nome}")
+        await self.__acao(seletor, "limpar" if limpar else "focar")
+        await self.__comando("Input.insertText", {"text": txt})
+        if send_enter:
+            if time_sleep_enter > 0:
+                await asyncio.sleep(time_sleep_enter)
+            for tipo in ("keyDown", "keyUp"):
+                await self.__comando("Input.dispatchKeyEvent", {"type": tipo, "key": "Enter", "code": "Enter",
+                                                                "windowsVirtualKeyCode": 13, "nativeVirtualKeyCode": 13,
+                                                                "text": "\r" if tipo == "keyDown" else ""})
+
+    async def scroll_to_element(self, by=None, value=None, timeout=30, seletor=None):
+        """
+        Scrolla até um elemento da página.
+
+        Args:
+            by (str): Seletor CSS ou XPath.
+            value (str): Valor do seletor.
+            timeout (int): Tempo máximo de espera em segundos.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
+        """
+        seletor = self.__resolver(by, value, seletor)
+        if await self.wait_element(seletor=seletor, timeout=timeout) is not None:
+            await self.__acao(seletor, "rolar")
+
+    async def get_text(self, by=None, value=None, seletor=None):
+        """
+        Retorna o texto de um elemento da página, ou "" se ele não existir.
+
+        Args:
+            by (str): Seletor CSS ou XPath.
+            value (str): Valor do seletor.
+            seletor (Seletor): Seletor do registro, no lugar de by e value. Se nenhuma variante encontrar o
+                               elemento a falha é registrada (e um seletor obrigatório quebrado levanta SeletorNaoEncontrado).
+        """
+        seletor = self.__resolver(by, value, seletor)
+        busca = await self.__acao(seletor, "texto")
+        if seletor.registro is not None:
+            seletor.registro.registrar_resultado(seletor, busca.get("tentativas", []), busca.get("indice"))
+            if not busca.get("encontrado"):
+                seletor.registro.registrar_ausencia(seletor)
+        return busca.get("valor") or ""
+
+    async def extract_fields(self, selector_map, registrar=True):
+        """
+        Retorna o texto de vários elementos da página em uma única chamada ao navegador.
+
+        Args:
+            selector_map (dict): Mapa {nome_do_campo: (by, value) ou Seletor}.
+            registrar (bool): Se False, o resultado não entra nas estatísticas do registro (ver registrar_extracao).
+
+        Returns:
+            CamposExtraidos: {nome_do_campo: texto}. Campos cujo elemento não existe voltam como "".
+        """
+        resposta = await self.execute_script(self._EXTRACT_FIELDS_JS, campos_js(selector_map)) or {}
+        campos = CamposExtraidos(resposta.get("valores", {}), resposta.get("buscas", {}))
+        return registrar_extracao(selector_map, campos) if registrar else campos
+
+    # ========================
+    # 3 - ESPERAS
+    # ========================
+
+    async def wait_element(self, by=None, value=None, timeout=30, seletor=None):
+        """
+        Espera por um elemento da página.
+
+        Args:
+            by (str): Seletor CSS ou XPath.
+            value (str): Valor do seletor.
+            timeout (int): Tempo máximo de espera em segundos.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
+
+        Returns:
+            True se o elemento apareceu, ou None em caso de timeout.
+        """
+        seletor = self.__resolver(by, value, seletor)
+        registro = seletor.registro
+        ultima = {}
+
+        async def encontrado():
+            ultima.clear()
+            ultima.update(await self.__acao(seletor, "existe"))
+            return ultima.get("encontrado")
+
+        achou = await self.wait_condition(encontrado, timeout=registro.timeout(seletor, timeout) if registro else timeout)
+        if registro is not None:
+            registro.registrar_resultado(seletor, ultima.get("tentativas", []), ultima.get("indice"))
+            if not achou:
+                registro.registrar_ausencia(seletor)
+        return True if achou else None
+
+    async def wait_condition(self, condicao, timeout=30):
+        """
+        Espera até que uma condição seja verdadeira. A condição pode ser uma função comum ou async.
+        Erros do protocolo durante a espera (ex: a página navegou no meio da verificação) são ignorados.
+
+        Returns:
+            O valor retornado pela condição, ou False em caso de timeout.
+        """
+        limite = time.monotonic() + timeout
+        while True:
+            try:
+                resultado = condicao()
+                if inspect.isawaitable(resultado):
+                    resultado = await resultado
+            except ErroCDP:
+                resultado = False
+            if resultado:
+                return resultado
+            if time.monotonic() >= limite:
+                return False
+            await asyncio.sleep(self.POLL_FREQUENCY)
+
+    async def wait_element_gone(self, by=None, value=None, timeout=30, seletor=None):
+        """
+        Espera até que um elemento deixe de existir ou fique invisível na página.
+
+        Returns:
+            bool: True se o elemento sumiu antes do timeout.
+        """
+        seletor = self.__resolver(by, value, seletor)
+
+        async def sumiu():
+            busca = await self.__acao(seletor, "visivel")
+            return not busca.get("encontrado") or not busca.get("valor")
+        return bool(await self.wait_condition(sumiu, timeout=timeout))
+
+    # ========================
+    # 4 - RECURSOS
+    # ========================
+
+    def resource_usage(self):
+        """
+        Uso da sessão atual do navegador. A memória não é medida neste backend.
+
+        Returns:
+            dict: {"rss_mb", "paginas", "idade_minutos"}
+        """
+        principal = self.__principal
+        return {"rss_mb": None, "paginas": principal.__paginas,
+                "idade_minutos": (time.monotonic() - principal.__inicio_sessao) / 60}
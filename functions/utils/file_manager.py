@@ -1,6 +1,16 @@
 import os
 import json
-import pandas as pd
+from contextlib import contextmanager
+
+# Dicionário de mapeamento para traduzir nomes das colunas do Excel de resultados
+COLUMN_MAPPING = {
+    'categoria': 'Categoria',
+    'establishment_name': 'Nome do Estabelecimento',
+    'establishment_type': 'Tipo do Estabelecimento',
+    'establishment_rate': 'Avaliação',
+    'establishment_avaliation_count': 'Quantidade de Avaliações',
+    'establishment_address': 'Endereço'
+}
 
 def read_excel(filepath, header_row: int | None = None, sheet_name: str | int | None = None):
     """
@@ -15,6 +25,8 @@ def read_excel(filepath, header_row: int | None = None, sheet_name: str | int |
         pd.DataFrame: DataFrame com os dados da planilha.
     """
     try:
+        # O pandas só é importado quando uma planilha precisa dele (.xls), para não atrasar o início do programa
+        import pandas as pd
         ext = os.path.splitext(filepath)[1].lower()
         # Pandas usa índice baseado em 0 para header; config usa baseado em 1
         header_idx = (header_row - 1) if header_row and header_row > 0 else 0
@@ -42,52 +54,165 @@ def write_json(data, filepath):
     except Exception as e:
         raise ValueError(f"Erro ao escrever o arquivo JSON: {e}")
 
-def json_to_excel(data, filepath):
+def write_json_stream(categorias, filepath):
+    """
+    Escreve os resultados em um arquivo JSON uma categoria por vez, sem montar o dicionário inteiro na memória.
+    O arquivo fica igual ao do write_json com o dicionário completo.
+
+    Args:
+        categorias (Iterable[tuple]): Pares (categoria, {indice: dados}).
+        filepath (str): Caminho do arquivo JSON.
+    """
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("{")
+            separador = "\n"
+            for categoria, itens in categorias:
+                corpo = json.dumps(itens, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+                f.write(f"{separador}    {json.dumps(categoria, ensure_ascii=False)}: {corpo}")
+                separador = ",\n"
+            f.write("\n}" if separador != "\n" else "}")
+    except Exception as e:
+        raise ValueError(f"Erro ao escrever o arquivo JSON: {e}")
+
+def iter_excel_rows(filepath, header_row: int | None = None, sheet_name: str | int | None = None):
+    """
+    Lê um arquivo Excel linha a linha, sem carregar a planilha inteira na memória.
+
+    Args:
+        filepath (str): Caminho do arquivo Excel.
+        header_row (int): Número da linha que contém os cabeçalhos das colunas (baseado em 1).
+        sheet_name (str | int): Nome ou índice da planilha a ser lida.
+
+    Returns:
+        Generator de dicionários {cabeçalho: valor}, um por linha. Linhas totalmente vazias são ignoradas.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.xls':
+        # O openpyxl não lê .xls, então nesse caso a leitura continua pelo pandas
+        for _, row in read_excel(filepath, header_row=header_row, sheet_name=sheet_name).iterrows():
+            yield row.to_dict()
+        return
+    if ext != '.xlsx':
+        raise ValueError("Formato de Excel não suportado")
+
+    try:
+        from openpyxl import load_workbook
+        workbook = load_workbook(filepath, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"Erro ao ler a planilha: {e}")
+    try:
+        if sheet_name is None:
+            sheet = workbook.worksheets[0]
+        elif isinstance(sheet_name, int):
+            sheet = workbook.worksheets[sheet_name]
+        else:
+            sheet = workbook[sheet_name]
+        header_idx = header_row if header_row and header_row > 0 else 1
+        headers = None
+        for row in sheet.iter_rows(min_row=header_idx, values_only=True):
+            if headers is None:
+                headers = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(row)]
+                continue
+            if all(value is None for value in row):
+                continue
+            yield dict(zip(headers, row))
+    finally:
+        workbook.close()
+
+def flatten_results(data):
+    """
+    Transforma o dicionário de resultados {categoria: {indice: dados}} em linhas planas, uma por vez.
+
+    Args:
+        data (dict | Iterable[tuple]): Dicionário de resultados, ou pares (categoria, {indice: dados})
+                                       lidos aos poucos (ex: Journal.iter_resultados).
+
+    Returns:
+        Generator de dicionários {'categoria': ..., **dados_do_estabelecimento}.
+    """
+    for category, establishments in (data.items() if isinstance(data, dict) else data):
+        for idx, establishment_data in establishments.items():
+            yield {'categoria': category, **establishment_data}
+
+@contextmanager
+def excel_writer(filepath):
     """
-    Converte um dicionário em um DataFrame e salva em um arquivo Excel.
+    Abre um arquivo Excel em modo write-only do openpyxl, onde as linhas vão direto para o arquivo
+    em vez de ficarem todas na memória. As colunas seguem o nome e a ordem do COLUMN_MAPPING.
+
+    Exemplo:
+        with excel_writer(caminho) as escrever:
+            for linha in flatten_results(resultados):
+                escrever(linha)
 
     Args:
-        data (dict): Dicionário a ser convertido.
         filepath (str): Caminho do arquivo Excel.
     """
     try:
+        from openpyxl import Workbook
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        # Dicionário de mapeamento para traduzir nomes das colunas
-        column_mapping = {
-            'categoria': 'Categoria',
-            'establishment_name': 'Nome do Estabelecimento',
-            'establishment_type': 'Tipo do Estabelecimento',
-            'establishment_rate': 'Avaliação',
-            'establishment_avaliation_count': 'Quantidade de Avaliações',
-            'establishment_address': 'Endereço'
-        }
-        
-        # Transformar o dicionário aninhado em uma lista de dicionários planos
-        rows = []
-        for category, establishments in data.items():
-            for idx, establishment_data in establishments.items():
-                row = {
-                    'categoria': category,
-                    **establishment_data  # Desempacota os dados do estabelecimento (sem incluir 'indice')
-                }
-                rows.append(row)
-        
-        # Criar DataFrame
-        df = pd.DataFrame(rows)
-        
-        # Renomear as colunas usando o mapeamento
-        df = df.rename(columns=column_mapping)
-        
-        # Reordenar as colunas na ordem desejada (opcional)
-        desired_order = ['Categoria', 'Nome do Estabelecimento', 'Tipo do Estabelecimento', 
-                        'Avaliação', 'Quantidade de Avaliações', 'Endereço']
-        # Filtrar apenas as colunas que existem no DataFrame
-        desired_order = [col for col in desired_order if col in df.columns]
-        df = df[desired_order]
-        
-        # Salvar no Excel
-        df.to_excel(filepath, index=False, engine='openpyxl')
-        return True
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Sheet1")
+        sheet.append(list(COLUMN_MAPPING.values()))
     except Exception as e:
-        raise ValueError(f"Erro ao converter o JSON para Excel: {e}")
\ No newline at end of file
+        raise ValueError(f"Erro ao escrever o arquivo Excel: {e}")
+
+    def escrever(row):
+        sheet.append([row.get(key) for key in COLUMN_MAPPING])
+    yield escrever
+
+    try:
+        workbook.save(filepath)
+    except Exception as e:
+        raise ValueError(f"Erro ao escrever o arquivo Excel: {e}")
+
+def write_excel_stream(rows, filepath):
+    """
+    Escreve as linhas de um iterável em um arquivo Excel, uma de cada vez.
+
+    Args:
+        rows (Iterable[dict]): Linhas no formato gerado pelo flatten_results.
+        filepath (str): Caminho do arquivo Excel.
+    """
+    with excel_writer(filepath) as escrever:
+        for row in rows:
+            escrever(row)
+    return True
+
+@contextmanager
+def jsonl_writer(filepath):
+    """
+    Abre um arquivo JSON Lines para escrita em streaming.
+
+    Exemplo:
+        with jsonl_writer(caminho) as escrever:
+            for linha in linhas:
+                escrever(linha)
+
+    Args:
+        filepath (str): Caminho do arquivo JSONL.
+    """
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        f = open(filepath, 'w', encoding='utf-8')
+    except Exception as e:
+        raise ValueError(f"Erro ao escrever o arquivo JSONL: {e}")
+    with f:
+        def escrever(row):
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        yield escrever
+
+def write_jsonl_stream(rows, filepath):
+    """
+    Escreve as linhas de um iterável em um arquivo JSON Lines, uma de cada vez.
+
+    Args:
+        rows (Iterable[dict]): Linhas no formato gerado pelo flatten_results.
+        filepath (str): Caminho do arquivo JSONL.
+    """
+    with jsonl_writer(filepath) as escrever:
+        for row in rows:
+            escrever(row)
+    return True
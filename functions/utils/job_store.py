@@ -0,0 +1,448 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+# Estados de uma categoria na fila de trabalhos
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+
+class LeasePerdido(RuntimeError):
+    """
+    O lease da categoria expirou ou passou para outro worker; quem o perdeu precisa parar de coletar a categoria.
+    """
+
+class FilaTrabalhos(ABC):
+    """
+    Fila de categorias compartilhada entre processos (e máquinas), com leases de tempo limitado.
+
+    O coordenador carrega as linhas da planilha na fila. Cada worker reivindica uma categoria por vez,
+    recebendo um lease que precisa ser renovado enquanto a coleta roda. Se o worker cair, o lease expira
+    e a categoria volta para a fila automaticamente na próxima reivindicação de qualquer worker.
+
+    Os estabelecimentos coletados também ficam na fila, com os mesmos métodos do Journal
+    (registrar_item, concluir_categoria, indices_coletados...), então quem pega uma categoria que voltou
+    para a fila continua do que o worker anterior já tinha coletado.
+
+    Esta classe define a interface; FilaTrabalhosSQLite e FilaTrabalhosMemoria são as implementações.
+    """
+
+    @abstractmethod
+    def carregar(self, tarefas):
+        """
+        Adiciona as categorias na fila. Categorias que já estão na fila são mantidas como estão.
+
+        Args:
+            tarefas (list): Tuplas (categoria, qtd_results) na ordem da planilha.
+        Returns:
+            int: Quantidade de categorias novas.
+        """
+
+    @abstractmethod
+    def reenfileirar(self, tarefas):
+        """
+        Devolve para a fila as categorias que ficaram de uma execução anterior: concluídas, que falharam ou em
+        andamento com o lease expirado. Elas voltam como pendentes, com as tentativas zeradas, a quantidade da
+        planilha atual e sem os estabelecimentos já coletados. Categorias com lease válido são mantidas.
+
+        Args:
+            tarefas (list): Tuplas (categoria, qtd_results) na ordem da planilha.
+        Returns:
+            int: Quantidade de categorias devolvidas para a fila.
+        """
+
+    @abstractmethod
+    def reivindicar(self, no, lease_segundos):
+        """
+        Pega a próxima categoria pendente (ou com lease expirado) e a marca como em andamento para o nó.
+        As categorias com mais resultados pedidos saem primeiro; empates seguem a ordem em que foram carregadas.
+
+        Args:
+            no (str): Identificador do worker que reivindica (ex: "host:pid:worker-1").
+            lease_segundos (float): Validade do lease.
+        Returns:
+            dict: {"posicao", "categoria", "qtd_results"}, ou None se não há categoria disponível.
+        """
+
+    @abstractmethod
+    def renovar(self, categoria, no, lease_segundos):
+        """
+        Renova o lease de uma categoria em andamento.
+
+        Returns:
+            bool: False se o lease não pertence mais ao nó (expirou e outro worker pegou a categoria).
+        """
+
+    @abstractmethod
+    def liberar(self, categoria, no, erro=""):
+        """
+        Devolve uma categoria que falhou para a fila, ou a marca como falha se já atingiu o máximo de tentativas.
+        """
+
+    @abstractmethod
+    def registrar_item(self, categoria, indice, dados):
+        pass
+
+    @abstractmethod
+    def concluir_categoria(self, categoria, no=None):
+        """
+        Marca a categoria como concluída.
+
+        Args:
+            categoria (str): Categoria coletada.
+            no (str): Worker que coletou a categoria. Se informado, a categoria só é concluída se ainda está em
+                      andamento com o lease desse nó válido; sem ele (coordenador) a categoria é concluída sempre.
+        Raises:
+            LeasePerdido: se o lease não pertence mais ao nó
+        """
+
+    @abstractmethod
+    def categoria_concluida(self, categoria):
+        pass
+
+    @abstractmethod
+    def indices_coletados(self, categoria):
+        pass
+
+    @abstractmethod
+    def carregar_resultados(self, ordem_categorias=None):
+        pass
+
+    @abstractmethod
+    def ordem(self):
+        """
+        Categorias na ordem em que foram carregadas.
+        """
+
+    @abstractmethod
+    def situacao(self):
+        """
+        Quantidade de categorias em cada estado.
+
+        Returns:
+            dict: {"pendente": n, "em_andamento": n, "concluida": n, "falhou": n}
+        """
+
+    def finalizada(self):
+        """
+        Retorna True quando não há mais categorias pendentes ou em andamento.
+        """
+        situacao = self.situacao()
+        return situacao[PENDENTE] == 0 and situacao[EM_ANDAMENTO] == 0
+
+    def fechar(self):
+        pass
+
+class FilaTrabalhosSQLite(FilaTrabalhos):
+    """
+    Fila de trabalhos em um arquivo SQLite, que pode ficar em um volume compartilhado entre as máquinas.
+    """
+
+    def __init__(self, filepath, max_tentativas=3):
+        """
+        Abre (ou cria) o banco da fila.
+
+        Args:
+            filepath (str): Caminho do arquivo SQLite.
+            max_tentativas (int): Quantas vezes uma categoria pode ser reivindicada antes de ser marcada como falha.
+                                  Cada reivindicação ainda faz até tentativas_maximas coletas no worker.
+        """
+        self.__filepath = filepath
+        self.__max_tentativas = int(max_tentativas)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with self.__conectar() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS categorias ("
+                " categoria TEXT PRIMARY KEY,"
+                " posicao INTEGER NOT NULL,"
+                " qtd_results INTEGER NOT NULL,"
+                " estado TEXT NOT NULL,"
+                " dono TEXT,"
+                " lease_ate REAL,"
+                " tentativas INTEGER NOT NULL DEFAULT 0,"
+                " erro TEXT)"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS itens ("
+                " categoria TEXT NOT NULL,"
+                " indice INTEGER NOT NULL,"
+                " dados TEXT NOT NULL,"
+                " PRIMARY KEY (categoria, indice))"
+            )
+
+    @contextmanager
+    def __conectar(self):
+        # Uma conexão por operação, assim a fila pode ser usada por vários workers e processos ao mesmo tempo
+        conexao = sqlite3.connect(self.__filepath, timeout=60, isolation_level=None)
+        try:
+            # BEGIN IMMEDIATE trava o banco para escrita já no início, evitando que dois workers reivindiquem a mesma categoria
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexao
+                conexao.execute("COMMIT")
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+        finally:
+            conexao.close()
+
+    def carregar(self, tarefas):
+        novas = 0
+        with self.__conectar() as conexao:
+            posicao = conexao.execute("SELECT COALESCE(MAX(posicao) + 1, 0) FROM categorias").fetchone()[0]
+            for categoria, qtd_results in tarefas:
+                cursor = conexao.execute(
+                    "INSERT OR IGNORE INTO categorias (categoria, posicao, qtd_results, estado) VALUES (?, ?, ?, ?)",
+                    (categoria, posicao, int(qtd_results), PENDENTE),
+                )
+                if cursor.rowcount:
+                    novas += 1
+                    posicao += 1
+        return novas
+
+    def reenfileirar(self, tarefas):
+        reenfileiradas = 0
+        with self.__conectar() as conexao:
+            for categoria, qtd_results in tarefas:
+                cursor = conexao.execute(
+                    "UPDATE categorias SET estado = ?, qtd_results = ?, dono = NULL, lease_ate = NULL, tentativas = 0, erro = NULL"
+                    " WHERE categoria = ? AND (estado IN (?, ?) OR (estado = ? AND lease_ate < ?))",
+                    (PENDENTE, int(qtd_results), categoria, CONCLUIDA, FALHOU, EM_ANDAMENTO, time.time()),
+                )
+                if cursor.rowcount:
+                    conexao.execute("DELETE FROM itens WHERE categoria = ?", (categoria,))
+                    reenfileiradas += 1
+        return reenfileiradas
+
+    def reivindicar(self, no, lease_segundos):
+        agora = time.time()
+        with self.__conectar() as conexao:
+            self.__reenfileirar_expirados(conexao, agora)
+            linha = conexao.execute(
+                "SELECT categoria, posicao, qtd_results FROM categorias WHERE estado = ? ORDER BY qtd_results DESC, posicao LIMIT 1",
+                (PENDENTE,),
+            ).fetchone()
+            if linha is None:
+                return None
+            conexao.execute(
+                "UPDATE categorias SET estado = ?, dono = ?, lease_ate = ?, tentativas = tentativas + 1 WHERE categoria = ?",
+                (EM_ANDAMENTO, no, agora + lease_segundos, linha[0]),
+            )
+        return {"categoria": linha[0], "posicao": linha[1], "qtd_results": linha[2]}
+
+    def __reenfileirar_expirados(self, conexao, agora):
+        # Leases expirados voltam para a fila, a não ser que a categoria já tenha esgotado as tentativas
+        conexao.execute(
+            "UPDATE categorias SET estado = CASE WHEN tentativas >= ? THEN ? ELSE ? END, dono = NULL, lease_ate = NULL,"
+            " erro = 'lease expirado' WHERE estado = ? AND lease_ate < ?",
+            (self.__max_tentativas, FALHOU, PENDENTE, EM_ANDAMENTO, agora),
+        )
+
+    def renovar(self, categoria, no, lease_segundos):
+        with self.__conectar() as conexao:
+            cursor = conexao.execute(
+                "UPDATE categorias SET lease_ate = ? WHERE categoria = ? AND dono = ? AND estado = ?",
+                (time.time() + lease_segundos, categoria, no, EM_ANDAMENTO),
+            )
+            return cursor.rowcount > 0
+
+    def liberar(self, categoria, no, erro=""):
+        with self.__conectar() as conexao:
+            conexao.execute(
+                "UPDATE categorias SET estado = CASE WHEN tentativas >= ? THEN ? ELSE ? END, dono = NULL, lease_ate = NULL,"
+                " erro = ? WHERE categoria = ? AND dono = ? AND estado = ?",
+                (self.__max_tentativas, FALHOU, PENDENTE, erro, categoria, no, EM_ANDAMENTO),
+            )
+
+    def registrar_item(self, categoria, indice, dados):
+        with self.__conectar() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO itens (categoria, indice, dados) VALUES (?, ?, ?)",
+                (categoria, int(indice), json.dumps(dados, ensure_ascii=False)),
+            )
+
+    def concluir_categoria(self, categoria, no=None):
+        with self.__conectar() as conexao:
+            if no is None:
+                conexao.execute(
+                    "UPDATE categorias SET estado = ?, dono = NULL, lease_ate = NULL, erro = NULL WHERE categoria = ?",
+                    (CONCLUIDA, categoria),
+                )
+                return
+            cursor = conexao.execute(
+                "UPDATE categorias SET estado = ?, dono = NULL, lease_ate = NULL, erro = NULL"
+                " WHERE categoria = ? AND dono = ? AND estado = ? AND lease_ate >= ?",
+                (CONCLUIDA, categoria, no, EM_ANDAMENTO, time.time()),
+            )
+            if cursor.rowcount == 0:
+                raise LeasePerdido(f"O lease da categoria {categoria} não pertence mais a {no}")
+
+    def categoria_concluida(self, categoria):
+        with self.__conectar() as conexao:
+            linha = conexao.execute("SELECT estado FROM categorias WHERE categoria = ?", (categoria,)).fetchone()
+        return linha is not None and linha[0] == CONCLUIDA
+
+    def indices_coletados(self, categoria):
+        with self.__conectar() as conexao:
+            linhas = conexao.execute("SELECT indice FROM itens WHERE categoria = ?", (categoria,)).fetchall()
+        return {linha[0] for linha in linhas}
+
+    def carregar_resultados(self, ordem_categorias=None):
+        with self.__conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT itens.categoria, itens.indice, itens.dados FROM itens"
+                " LEFT JOIN categorias ON categorias.categoria = itens.categoria"
+                " ORDER BY categorias.posicao, itens.indice"
+            ).fetchall()
+        resultados = {}
+        for categoria, indice, dados in linhas:
+            resultados.setdefault(categoria, {})[indice] = json.loads(dados)
+        ordem = list(ordem_categorias or []) + [c for c in resultados if c not in (ordem_categorias or [])]
+        return {categoria: resultados[categoria] for categoria in dict.fromkeys(ordem) if categoria in resultados}
+
+    def ordem(self):
+        with self.__conectar() as conexao:
+            return [linha[0] for linha in conexao.execute("SELECT categoria FROM categorias ORDER BY posicao")]
+
+    def situacao(self):
+        with self.__conectar() as conexao:
+            self.__reenfileirar_expirados(conexao, time.time())
+            contagem = dict(conexao.execute("SELECT estado, COUNT(*) FROM categorias GROUP BY estado").fetchall())
+        return {estado: contagem.get(estado, 0) for estado in (PENDENTE, EM_ANDAMENTO, CONCLUIDA, FALHOU)}
+
+class FilaTrabalhosMemoria(FilaTrabalhos):
+    """
+    Fila de trabalhos em memória, com o mesmo comportamento da FilaTrabalhosSQLite.
+    Serve para rodar coordenador e workers no mesmo processo (ex: benchmark) sem um arquivo compartilhado.
+    """
+
+    def __init__(self, max_tentativas=3):
+        self.__lock = threading.Lock()
+        self.__max_tentativas = int(max_tentativas)
+        self.__categorias = {}
+        self.__itens = {}
+
+    def carregar(self, tarefas):
+        novas = 0
+        with self.__lock:
+            for categoria, qtd_results in tarefas:
+                if categoria in self.__categorias:
+                    continue
+                self.__categorias[categoria] = {"posicao": len(self.__categorias), "qtd_results": int(qtd_results),
+                                                "estado": PENDENTE, "dono": None, "lease_ate": None,
+                                                "tentativas": 0, "erro": None}
+                novas += 1
+        return novas
+
+    def reenfileirar(self, tarefas):
+        reenfileiradas = 0
+        agora = time.time()
+        with self.__lock:
+            for categoria, qtd_results in tarefas:
+                registro = self.__categorias.get(categoria)
+                if registro is None or registro["estado"] == PENDENTE or (
+                        registro["estado"] == EM_ANDAMENTO and registro["lease_ate"] >= agora):
+                    continue
+                registro.update(estado=PENDENTE, qtd_results=int(qtd_results), dono=None, lease_ate=None, tentativas=0, erro=None)
+                self.__itens.pop(categoria, None)
+                reenfileiradas += 1
+        return reenfileiradas
+
+    def __reenfileirar_expirados(self, agora):
+        for registro in self.__categorias.values():
+            if registro["estado"] == EM_ANDAMENTO and registro["lease_ate"] < agora:
+                self.__devolver(registro, "lease expirado")
+
+    def __devolver(self, registro, erro):
+        registro.update(estado=FALHOU if registro["tentativas"] >= self.__max_tentativas else PENDENTE,
+                        dono=None, lease_ate=None, erro=erro)
+
+    def reivindicar(self, no, lease_segundos):
+        agora = time.time()
+        with self.__lock:
+            self.__reenfileirar_expirados(agora)
+            pendentes = [(-registro["qtd_results"], registro["posicao"], categoria)
+                         for categoria, registro in self.__categorias.items() if registro["estado"] == PENDENTE]
+            if not pendentes:
+                return None
+            _, posicao, categoria = min(pendentes)
+            registro = self.__categorias[categoria]
+            registro.update(estado=EM_ANDAMENTO, dono=no, lease_ate=agora + lease_segundos,
+                            tentativas=registro["tentativas"] + 1)
+            return {"categoria": categoria, "posicao": posicao, "qtd_results": registro["qtd_results"]}
+
+    def renovar(self, categoria, no, lease_segundos):
+        with self.__lock:
+            registro = self.__categorias.get(categoria)
+            if registro is None or registro["dono"] != no or registro["estado"] != EM_ANDAMENTO:
+                return False
+            registro["lease_ate"] = time.time() + lease_segundos
+            return True
+
+    def liberar(self, categoria, no, erro=""):
+        with self.__lock:
+            registro = self.__categorias.get(categoria)
+            if registro is not None and registro["dono"] == no and registro["estado"] == EM_ANDAMENTO:
+                self.__devolver(registro, erro)
+
+    def registrar_item(self, categoria, indice, dados):
+        with self.__lock:
+            self.__itens.setdefault(categoria, {})[int(indice)] = dict(dados)
+
+    def concluir_categoria(self, categoria, no=None):
+        with self.__lock:
+            registro = self.__categorias.get(categoria)
+            if registro is None:
+                return
+            if no is not None and (registro["dono"] != no or registro["estado"] != EM_ANDAMENTO
+                                   or registro["lease_ate"] < time.time()):
+                raise LeasePerdido(f"O lease da categoria {categoria} não pertence mais a {no}")
+            registro.update(estado=CONCLUIDA, dono=None, lease_ate=None, erro=None)
+
+    def categoria_concluida(self, categoria):
+        with self.__lock:
+            return self.__categorias.get(categoria, {}).get("estado") == CONCLUIDA
+
+    def indices_coletados(self, categoria):
+        with self.__lock:
+            return set(self.__itens.get(categoria, {}))
+
+    def carregar_resultados(self, ordem_categorias=None):
+        with self.__lock:
+            resultados = {categoria: dict(sorted(itens.items())) for categoria, itens in self.__itens.items()}
+        ordem = list(ordem_categorias or []) + self.ordem() + list(resultados)
+        return {categoria: resultados[categoria] for categoria in dict.fromkeys(ordem) if categoria in resultados}
+
+    def ordem(self):
+        with self.__lock:
+            return sorted(self.__categorias, key=lambda categoria: self.__categorias[categoria]["posicao"])
+
+    def situacao(self):
+        with self.__lock:
+            self.__reenfileirar_expirados(time.time())
+            estados = [registro["estado"] for registro in self.__categorias.values()]
+        return {estado: estados.count(estado) for estado in (PENDENTE, EM_ANDAMENTO, CONCLUIDA, FALHOU)}
+
+def abrir_fila_trabalhos(config):
+    """
+    Abre a fila de trabalhos configurada na seção [distribuido] do config.toml.
+
+    Args:
+        config: configuração carregada do config.toml
+    Returns:
+        FilaTrabalhos
+    """
+    distribuido = config.get("distribuido", {})
+    backend = distribuido.get("backend", "sqlite")
+    # Reivindicações por categoria na fila; independente do tentativas_maximas, que são as coletas dentro de cada reivindicação
+    max_tentativas = distribuido.get("max_tentativas", 3)
+    if backend == "sqlite":
+        return FilaTrabalhosSQLite(distribuido["fila"], max_tentativas=max_tentativas)
+    if backend == "memoria":
+        return FilaTrabalhosMemoria(max_tentativas=max_tentativas)
+    raise ValueError(f"Backend de fila de trabalhos desconhecido: {backend}")
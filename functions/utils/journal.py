@@ -0,0 +1,152 @@
+import os
+import json
+import threading
+
+class Journal:
+    """
+    Diário em disco (JSON Lines) com cada estabelecimento coletado.
+
+    Cada linha é um registro independente, gravado assim que o dado é extraído, então uma
+    queda do programa perde no máximo o estabelecimento que estava sendo coletado.
+    Tipos de registro:
+        {"categoria": ..., "indice": ..., "dados": {...}}  -> estabelecimento coletado
+        {"categoria": ..., "concluida": true}               -> categoria finalizada
+    """
+
+    def __init__(self, filepath, resume=False):
+        """
+        Abre o diário.
+
+        Args:
+            filepath (str): Caminho do arquivo JSONL.
+            resume (bool): Se True, mantém o conteúdo existente e carrega o que já foi coletado.
+                           Se False, o diário é zerado para uma nova execução.
+        """
+        self.__filepath = filepath
+        self.__lock = threading.Lock()
+        self.__indices = {}
+        self.__concluidas = set()
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        if resume and os.path.exists(filepath):
+            for registro in self.ler():
+                self.__registrar_em_memoria(registro)
+        self.__file = open(filepath, 'a' if resume else 'w', encoding='utf-8')
+
+    def __registrar_em_memoria(self, registro):
+        categoria = registro["categoria"]
+        if registro.get("concluida"):
+            self.__concluidas.add(categoria)
+        else:
+            self.__indices.setdefault(categoria, set()).add(registro["indice"])
+
+    def __gravar(self, registro):
+        linha = json.dumps(registro, ensure_ascii=False)
+        with self.__lock:
+            self.__file.write(linha + "\n")
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__registrar_em_memoria(registro)
+
+    def registrar_item(self, categoria, indice, dados):
+        """
+        Grava um estabelecimento coletado.
+
+        Args:
+            categoria (str): Tipo de estabelecimento pesquisado.
+            indice (int): Posição do estabelecimento nos resultados da busca.
+            dados (dict): Dados extraídos do estabelecimento.
+        """
+        self.__gravar({"categoria": categoria, "indice": indice, "dados": dados})
+
+    def concluir_categoria(self, categoria):
+        """
+        Marca uma categoria como finalizada.
+        """
+        self.__gravar({"categoria": categoria, "concluida": True})
+
+    def categoria_concluida(self, categoria):
+        """
+        Retorna True se a categoria já foi finalizada.
+        """
+        with self.__lock:
+            return categoria in self.__concluidas
+
+    def indices_coletados(self, categoria):
+        """
+        Retorna o conjunto de índices já coletados para uma categoria.
+        """
+        with self.__lock:
+            return set(self.__indices.get(categoria, ()))
+
+    def ler(self):
+        """
+        Lê o diário registro por registro, ignorando uma última linha incompleta
+        (caso o programa tenha caído no meio da escrita).
+
+        Returns:
+            Generator com os registros do diário.
+        """
+        with open(self.__filepath, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+
+    def iter_resultados(self, ordem_categorias=None):
+        """
+        Percorre os resultados do diário uma categoria por vez, sem montar o dicionário inteiro.
+        A primeira passada guarda só a posição de cada registro no arquivo; os dados de cada
+        categoria são lidos do disco quando chega a vez dela.
+
+        Args:
+            ordem_categorias (list): Ordem desejada das categorias no resultado (ex: a ordem da planilha).
+        Returns:
+            Generator de pares (categoria, {indice: dados}), com os índices em ordem crescente
+        """
+        posicoes = {}
+        with open(self.__filepath, 'rb') as f:
+            while True:
+                posicao = f.tell()
+                linha = f.readline()
+                if not linha:
+                    break
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if registro.get("concluida"):
+                    continue
+                # Um índice gravado de novo (ex: retomada) fica com o último registro, como no dicionário
+                posicoes.setdefault(registro["categoria"], {})[registro["indice"]] = posicao
+
+        ordem = list(ordem_categorias or []) + [c for c in posicoes if c not in (ordem_categorias or [])]
+        with open(self.__filepath, 'rb') as f:
+            for categoria in dict.fromkeys(ordem):
+                if categoria not in posicoes:
+                    continue
+                itens = {}
+                for indice, posicao in sorted(posicoes[categoria].items()):
+                    f.seek(posicao)
+                    itens[indice] = json.loads(f.readline())["dados"]
+                yield categoria, itens
+
+    def carregar_resultados(self, ordem_categorias=None):
+        """
+        Monta o dicionário de resultados a partir do diário.
+
+        Args:
+            ordem_categorias (list): Ordem desejada das categorias no resultado (ex: a ordem da planilha).
+        Returns:
+            dicionário {categoria: {indice: dados}} no mesmo formato retornado pelo collect_data
+        """
+        return dict(self.iter_resultados(ordem_categorias))
+
+    def fechar(self):
+        """
+        Fecha o arquivo do diário.
+        """
+        with self.__lock:
+            if not self.__file.closed:
+                self.__file.close()
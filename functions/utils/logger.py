@@ -1,34 +1,124 @@
+import copy
 import logging
+import logging.handlers
 import os
+import sys
+import json
+import queue
 from datetime import datetime
 
-def setup_logging(dir_path="logs"):
+# Listener que escreve os logs em uma thread separada, para não travar a coleta, e o handler que alimenta a fila dele
+_listener = None
+_queue_handler = None
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que monta a mensagem (argumentos no estilo %) e o traceback na thread de quem chamou o log,
+    porque os objetos dos argumentos podem mudar antes de o listener escrever. O restante da formatação (data, nível,
+    JSON) fica na thread do listener. Registros abaixo do nível do logger nem chegam aqui, então nada é formatado à toa.
+    """
+
+    _formatador = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._formatador.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON.
+    """
+
+    def format(self, record):
+        registro = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info or record.exc_text:
+            registro["exception"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False)
+
+def setup_logging(dir_path="logs", level="INFO", module_levels=None, json_format=False):
     """
     Configura o logger para registrar mensagens em um arquivo e no console.
     O arquivo de log é nomeado com a data atual.
+
+    As mensagens vão para uma fila e são escritas por uma thread separada (QueueListener),
+    então o log não adiciona latência a quem chama o log_info/log_error.
+
+    Args:
+        dir_path (str): Pasta dos arquivos de log.
+        level (str): Nível mínimo (DEBUG, INFO, WARNING, ERROR, CRITICAL).
+        module_levels (dict): Nível por módulo, ex: {"functions.src.google_map": "WARNING"}.
+        json_format (bool): Se True, o arquivo de log é escrito em JSON Lines (um objeto por linha).
     """
+    global _listener, _queue_handler
+
     # Criar pasta de logs (se não existir)
     os.makedirs(dir_path, exist_ok=True)
 
     # Nome do arquivo de log com data
-    log_file = os.path.join(dir_path, f"log_{datetime.now().strftime('%Y%m%d')}.log")
+    extensao = "jsonl" if json_format else "log"
+    log_file = os.path.join(dir_path, f"log_{datetime.now().strftime('%Y%m%d')}.{extensao}")
+
+    formato_texto = logging.Formatter("%(asctime)s [%(levelname)s] [%(threadName)s] %(message)s")
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")  # salva em arquivo
+    file_handler.setFormatter(JsonLinesFormatter() if json_format else formato_texto)
+    console_handler = logging.StreamHandler()  # mostra no console também
+    console_handler.setFormatter(formato_texto)
+
+    stop_logging()
+    fila = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(fila, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _queue_handler = _LazyQueueHandler(fila)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    for modulo, nivel in (module_levels or {}).items():
+        logging.getLogger(modulo).setLevel(nivel)
+
+def stop_logging():
+    """
+    Tira o handler da fila do logger raiz, escreve o que ainda está na fila de logs e para a thread de escrita.
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _caller_logger():
+    # Logger com o nome do módulo que chamou log_*, permitindo configurar o nível por módulo
+    nome = sys._getframe(2).f_globals.get("__name__", "main")
+    return get_logger("main" if nome == "__main__" else nome)
+
+def log_debug(msg, *args):
+    _caller_logger().debug(msg, *args)
 
-    # Configuração básica
-    logging.basicConfig(
-        level=logging.INFO,  # Nível mínimo (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.FileHandler(log_file, encoding="utf-8"),  # salva em arquivo
-            logging.StreamHandler()  # mostra no console também
-        ]
-    )
+def log_info(msg, *args):
+    _caller_logger().info(msg, *args)
 
-def log_info(msg):
-    get_logger().info(msg)
+def log_warning(msg, *args):
+    _caller_logger().warning(msg, *args)
 
-def log_error(msg):
-    get_logger().error(msg)
+def log_error(msg, *args):
+    _caller_logger().error(msg, *args)
 
 # Função para obter logger em qualquer lugar
 def get_logger(name="main"):
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
@@ -0,0 +1,235 @@
+import os
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager
+from functions.utils.logger import log_info
+
+# Durações registradas por fase, compartilhadas entre todos os workers
+_lock = threading.Lock()
+_duracoes = {}
+_itens = {"total": 0, "resumo_a_cada": 0}
+# Maior valor observado de cada recurso (ex: memória do navegador), compartilhado entre os workers
+_recursos = {}
+# Avaliações de cada variante dos seletores da página: (seletor, variante) -> [avaliações, acertos, segundos]
+_seletores = {}
+# Bytes transferidos por página, por tipo de página (ex: "busca", "estabelecimento")
+_bytes = {}
+
+def configurar_metricas(resumo_a_cada=0):
+    """
+    Zera as métricas e configura o resumo periódico no log.
+
+    Args:
+        resumo_a_cada (int): A cada quantos estabelecimentos coletados um resumo é escrito no log (0 desativa).
+    """
+    with _lock:
+        _duracoes.clear()
+        _recursos.clear()
+        _seletores.clear()
+        _bytes.clear()
+        _itens["total"] = 0
+        _itens["resumo_a_cada"] = resumo_a_cada
+
+def registrar_duracao(fase, segundos):
+    """
+    Registra a duração de uma execução de uma fase.
+
+    Args:
+        fase (str): Nome da fase (ex: "open_url", "card_open").
+        segundos (float): Duração em segundos.
+    """
+    with _lock:
+        _duracoes.setdefault(fase, []).append(segundos)
+
+def registrar_recurso(nome, valor):
+    """
+    Registra um valor de uso de recurso, guardando o maior valor observado.
+
+    Args:
+        nome (str): Nome do recurso (ex: "browser_rss_mb").
+        valor (float): Valor observado.
+    """
+    if valor is None:
+        return
+    with _lock:
+        _recursos[nome] = max(_recursos.get(nome, valor), valor)
+
+def registrar_bytes(pagina, valor):
+    """
+    Registra quantos bytes uma página transferiu pela rede.
+
+    Args:
+        pagina (str): Tipo da página (ex: "busca", "estabelecimento").
+        valor (int): Bytes transferidos.
+    """
+    with _lock:
+        _bytes.setdefault(pagina, []).append(valor)
+
+def resumo_bytes():
+    """
+    Agrega os bytes transferidos por tipo de página.
+
+    Returns:
+        dict: {pagina: {"count", "total", "p50", "p95", "max"}} em bytes.
+    """
+    with _lock:
+        copia = {pagina: sorted(valores) for pagina, valores in _bytes.items()}
+    return {pagina: {"count": len(valores), "total": sum(valores), "p50": _percentil(valores, 50),
+                     "p95": _percentil(valores, 95), "max": valores[-1] if valores else 0}
+            for pagina, valores in copia.items()}
+
+def registrar_seletor(nome, variante, acerto, segundos):
+    """
+    Registra a avaliação de uma variante de um seletor da página.
+
+    Args:
+        nome (str): Nome lógico do seletor (ex: "establishment_name").
+        variante (str): Identificação da variante (ex: "0:css").
+        acerto (bool): Se a variante encontrou o elemento.
+        segundos (float): Tempo de avaliação da variante dentro do navegador.
+    """
+    with _lock:
+        contadores = _seletores.setdefault((nome, variante), [0, 0, 0.0])
+        contadores[0] += 1
+        contadores[1] += 1 if acerto else 0
+        contadores[2] += segundos
+
+def resumo_seletores():
+    """
+    Agrega as avaliações de cada variante dos seletores.
+
+    Returns:
+        dict: {seletor: {variante: {"avaliacoes", "acertos", "taxa_acerto", "tempo_medio"}}}, com o tempo em segundos.
+    """
+    with _lock:
+        copia = dict(_seletores)
+    estatisticas = {}
+    for (nome, variante), (avaliacoes, acertos, segundos) in sorted(copia.items()):
+        estatisticas.setdefault(nome, {})[variante] = {
+            "avaliacoes": avaliacoes,
+            "acertos": acertos,
+            "taxa_acerto": acertos / avaliacoes if avaliacoes else 0.0,
+            "tempo_medio": segundos / avaliacoes if avaliacoes else 0.0,
+        }
+    return estatisticas
+
+@contextmanager
+def medir(fase):
+    """
+    Mede o tempo do bloco e registra na fase informada, mesmo se o bloco levantar um erro.
+
+    Exemplo:
+        with medir("write_json"):
+            write_json(dados, caminho)
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_duracao(fase, time.perf_counter() - inicio)
+
+def contar_item():
+    """
+    Conta um estabelecimento coletado e escreve o resumo no log quando atinge o intervalo configurado.
+    """
+    with _lock:
+        _itens["total"] += 1
+        total = _itens["total"]
+        resumo_a_cada = _itens["resumo_a_cada"]
+    if resumo_a_cada and total % resumo_a_cada == 0:
+        log_info("Resumo de tempos após %s estabelecimentos:", total)
+        for fase, estatisticas in resumo().items():
+            log_info("  %s: n=%d p50=%.3fs p95=%.3fs max=%.3fs", fase, estatisticas["count"],
+                     estatisticas["p50"], estatisticas["p95"], estatisticas["max"])
+
+def _percentil(valores_ordenados, percentil):
+    """
+    Percentil pelo método do rank mais próximo.
+    """
+    if not valores_ordenados:
+        return 0.0
+    posicao = max(0, min(len(valores_ordenados) - 1, math.ceil(percentil / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[posicao]
+
+def resumo():
+    """
+    Agrega as durações de cada fase.
+
+    Returns:
+        dict: {fase: {"count", "total", "p50", "p95", "max"}} com os tempos em segundos.
+    """
+    with _lock:
+        copia = {fase: sorted(valores) for fase, valores in _duracoes.items()}
+    return {
+        fase: {
+            "count": len(valores),
+            "total": sum(valores),
+            "p50": _percentil(valores, 50),
+            "p95": _percentil(valores, 95),
+            "max": valores[-1] if valores else 0.0,
+        }
+        for fase, valores in copia.items()
+    }
+
+def exportar_metricas(filepath):
+    """
+    Escreve as métricas agregadas em JSON e, ao lado, no formato texto do Prometheus (mesmo nome com extensão .prom).
+
+    Args:
+        filepath (str): Caminho do arquivo JSON de métricas.
+    """
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        estatisticas = resumo()
+        seletores = resumo_seletores()
+        bytes_paginas = resumo_bytes()
+        with _lock:
+            itens = _itens["total"]
+            recursos = dict(_recursos)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump({"itens_coletados": itens, "fases": estatisticas, "recursos_max": recursos, "seletores": seletores,
+                       "bytes_por_pagina": bytes_paginas}, f, indent=4, ensure_ascii=False)
+
+        linhas = [
+            "# HELP scraper_items_total Estabelecimentos coletados.",
+            "# TYPE scraper_items_total counter",
+            f"scraper_items_total {itens}",
+            "# HELP scraper_phase_seconds Duração de cada fase da coleta.",
+            "# TYPE scraper_phase_seconds summary",
+        ]
+        for fase, valores in estatisticas.items():
+            linhas.append(f'scraper_phase_seconds{{phase="{fase}",quantile="0.5"}} {valores["p50"]}')
+            linhas.append(f'scraper_phase_seconds{{phase="{fase}",quantile="0.95"}} {valores["p95"]}')
+            linhas.append(f'scraper_phase_seconds_sum{{phase="{fase}"}} {valores["total"]}')
+            linhas.append(f'scraper_phase_seconds_count{{phase="{fase}"}} {valores["count"]}')
+        linhas.append("# HELP scraper_phase_seconds_max Maior duração de cada fase.")
+        linhas.append("# TYPE scraper_phase_seconds_max gauge")
+        for fase, valores in estatisticas.items():
+            linhas.append(f'scraper_phase_seconds_max{{phase="{fase}"}} {valores["max"]}')
+        linhas.append("# HELP scraper_resource_max Maior valor observado de cada recurso.")
+        linhas.append("# TYPE scraper_resource_max gauge")
+        for nome, valor in recursos.items():
+            linhas.append(f'scraper_resource_max{{resource="{nome}"}} {valor}')
+        linhas.append("# HELP scraper_page_bytes Bytes transferidos pela rede por página.")
+        linhas.append("# TYPE scraper_page_bytes summary")
+        for pagina, valores in bytes_paginas.items():
+            linhas.append(f'scraper_page_bytes{{page="{pagina}",quantile="0.5"}} {valores["p50"]}')
+            linhas.append(f'scraper_page_bytes{{page="{pagina}",quantile="0.95"}} {valores["p95"]}')
+            linhas.append(f'scraper_page_bytes_sum{{page="{pagina}"}} {valores["total"]}')
+            linhas.append(f'scraper_page_bytes_count{{page="{pagina}"}} {valores["count"]}')
+        linhas.append("# HELP scraper_selector_evaluations_total Avaliações de cada variante dos seletores da página.")
+        linhas.append("# TYPE scraper_selector_evaluations_total counter")
+        for nome, variantes in seletores.items():
+            for variante, valores in variantes.items():
+                linhas.append(f'scraper_selector_evaluations_total{{selector="{nome}",variant="{variante}"}} {valores["avaliacoes"]}')
+        linhas.append("# HELP scraper_selector_hits_total Avaliações em que a variante encontrou o elemento.")
+        linhas.append("# TYPE scraper_selector_hits_total counter")
+        for nome, variantes in seletores.items():
+            for variante, valores in variantes.items():
+                linhas.append(f'scraper_selector_hits_total{{selector="{nome}",variant="{variante}"}} {valores["acertos"]}')
+        with open(os.path.splitext(filepath)[0] + ".prom", 'w', encoding='utf-8') as f:
+            f.write("\n".join(linhas) + "\n")
+    except Exception as e:
+        raise ValueError(f"Erro ao escrever o arquivo de métricas: {e}")
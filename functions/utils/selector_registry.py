@@ -0,0 +1,214 @@
+from functions.utils.logger import log_error, log_info
+from functions.utils.metrics import registrar_seletor
+import threading
+
+# Tipos de variante, com os mesmos valores do By do Selenium
+XPATH = "xpath"
+CSS_SELECTOR = "css selector"
+
+class SeletorNaoEncontrado(ValueError):
+    """
+    Nenhuma variante de um seletor obrigatório encontrou o elemento em várias buscas seguidas
+    (provável mudança no layout da página).
+    """
+
+class Seletor:
+    """
+    Campo lógico da página com uma cadeia ordenada de variantes (by, value): primeiro as mais curtas e rápidas
+    (CSS, aria-label) e por último os XPaths absolutos.
+
+    As variantes podem ter campos de formatação (ex: "{index}"), preenchidos por formatar(). O seletor formatado
+    compartilha a ordem e as estatísticas com o original.
+    """
+
+    def __init__(self, nome, variantes, obrigatorio=False, registro=None, parametros=None):
+        self.nome = nome
+        self.variantes = list(variantes)
+        self.obrigatorio = obrigatorio
+        self.registro = registro
+        self.parametros = dict(parametros or {})
+
+    def formatar(self, **parametros):
+        """
+        Retorna o mesmo seletor com os campos de formatação das variantes preenchidos.
+        """
+        return Seletor(self.nome, self.variantes, self.obrigatorio, self.registro, parametros)
+
+    def ordenadas(self):
+        """
+        Variantes na ordem em que devem ser tentadas: a última que funcionou primeiro, depois as demais na ordem original.
+
+        Returns:
+            list: Tuplas (indice, by, value) com o value já formatado.
+        """
+        ordem = self.registro.ordem(self) if self.registro is not None else range(len(self.variantes))
+        return [(indice, self.variantes[indice][0], self.variantes[indice][1].format(**self.parametros)
+                 if self.parametros else self.variantes[indice][1]) for indice in ordem]
+
+    def __repr__(self):
+        return f"Seletor({self.nome!r})"
+
+class RegistroSeletores:
+    """
+    Registro central dos seletores da página, compartilhado entre os workers.
+
+    Para cada seletor o registro lembra a variante que funcionou por último (tentada primeiro na próxima busca),
+    registra nas métricas os acertos e o tempo de avaliação de cada variante e conta as buscas seguidas em que
+    nenhuma variante encontrou o elemento. Um seletor obrigatório que falha limite_falhas vezes seguidas é
+    considerado quebrado: as esperas por ele passam a durar no máximo timeout_quebrado segundos e terminam
+    com SeletorNaoEncontrado, em vez de esperar o timeout inteiro a cada estabelecimento.
+    """
+
+    def __init__(self, limite_falhas=3, timeout_quebrado=2):
+        self.__lock = threading.Lock()
+        self.__limite_falhas = int(limite_falhas)
+        self.__timeout_quebrado = float(timeout_quebrado)
+        self.__seletores = {}
+        self.__preferida = {}
+        self.__falhas = {}
+
+    def registrar(self, nome, *variantes, obrigatorio=False):
+        """
+        Registra um seletor.
+
+        Args:
+            nome (str): Nome lógico do campo (ex: "establishment_name").
+            variantes: Tuplas (by, value) em ordem de preferência.
+            obrigatorio (bool): Se True, o seletor sempre deve existir quando é procurado e a falha de todas as
+                                variantes em buscas seguidas interrompe a coleta.
+        Returns:
+            Seletor
+        """
+        seletor = Seletor(nome, variantes, obrigatorio, self)
+        with self.__lock:
+            self.__seletores[nome] = seletor
+        return seletor
+
+    def ordem(self, seletor):
+        """
+        Índices das variantes na ordem de tentativa.
+        """
+        with self.__lock:
+            preferida = self.__preferida.get(seletor.nome, 0)
+        return [preferida] + [indice for indice in range(len(seletor.variantes)) if indice != preferida]
+
+    def registrar_resultado(self, seletor, tentativas, indice_acerto):
+        """
+        Registra o resultado de uma busca do seletor na página.
+
+        Args:
+            seletor (Seletor): Seletor procurado.
+            tentativas (list): Pares (indice, segundos) das variantes avaliadas, na ordem.
+            indice_acerto (int): Variante que encontrou o elemento, ou None se nenhuma encontrou.
+        """
+        for indice, segundos in tentativas:
+            by = seletor.variantes[indice][0]
+            registrar_seletor(seletor.nome, f"{indice}:{'xpath' if by == XPATH else 'css'}", indice == indice_acerto,
+                              segundos)
+        if indice_acerto is None:
+            return
+        with self.__lock:
+            if self.__preferida.get(seletor.nome, 0) != indice_acerto:
+                log_info("Seletor %s: usando a variante %s", seletor.nome, indice_acerto)
+            self.__preferida[seletor.nome] = indice_acerto
+            self.__falhas[seletor.nome] = 0
+
+    def registrar_ausencia(self, seletor):
+        """
+        Registra uma busca em que nenhuma variante encontrou o elemento.
+
+        Raises:
+            SeletorNaoEncontrado: se o seletor é obrigatório e está quebrado
+        """
+        with self.__lock:
+            falhas = self.__falhas.get(seletor.nome, 0) + 1
+            self.__falhas[seletor.nome] = falhas
+        if falhas == self.__limite_falhas:
+            log_error("Seletor %s não encontrado em %s buscas seguidas com nenhuma das %s variantes, o layout da página pode ter mudado",
+                      seletor.nome, falhas, len(seletor.variantes))
+        if seletor.obrigatorio and falhas >= self.__limite_falhas:
+            raise SeletorNaoEncontrado(f"Seletor {seletor.nome} não encontrado na página com nenhuma das variantes")
+
+    def quebrado(self, seletor):
+        """
+        Retorna True se o seletor falhou em todas as variantes nas últimas limite_falhas buscas.
+        """
+        with self.__lock:
+            return self.__falhas.get(seletor.nome, 0) >= self.__limite_falhas
+
+    def timeout(self, seletor, timeout):
+        """
+        Tempo máximo de espera pelo seletor: o timeout pedido, ou timeout_quebrado se o seletor está quebrado.
+        """
+        return min(timeout, self.__timeout_quebrado) if self.quebrado(seletor) else timeout
+
+    def situacao(self):
+        """
+        Situação de cada seletor registrado.
+
+        Returns:
+            dict: {nome: {"variante_preferida", "falhas_seguidas"}}
+        """
+        with self.__lock:
+            return {nome: {"variante_preferida": self.__preferida.get(nome, 0), "falhas_seguidas": self.__falhas.get(nome, 0)}
+                    for nome in self.__seletores}
+
+def variantes_js(seletor):
+    """
+    Variantes de um Seletor no formato dos scripts de busca na página: [indice, "xpath" ou "css", valor].
+    """
+    variantes = []
+    for indice, by, value in seletor.ordenadas():
+        if by == XPATH:
+            variantes.append([indice, "xpath", value])
+        elif by == CSS_SELECTOR:
+            variantes.append([indice, "css", value])
+        else:
+            raise ValueError(f"Seletor não suportado: {by}")
+    return variantes
+
+def campos_js(selector_map):
+    """
+    Campos de um extract_fields no formato do script da página: [nome, variantes]. Aceita Seletor ou (by, value).
+    """
+    return [[nome, variantes_js(valor if isinstance(valor, Seletor) else Seletor(nome, [valor]))]
+            for nome, valor in selector_map.items()]
+
+class CamposExtraidos(dict):
+    """
+    Textos lidos por um extract_fields ({nome_do_campo: texto}), junto com a busca de cada seletor ("buscas"),
+    para que o resultado possa ser registrado depois, uma única vez, com registrar_extracao.
+    """
+
+    def __init__(self, valores, buscas=None):
+        super().__init__(valores)
+        self.buscas = dict(buscas or {})
+
+def registrar_extracao(selector_map, campos):
+    """
+    Registra no registro de cada Seletor o resultado de um extract_fields.
+
+    Quem espera os campos aparecerem lê a página várias vezes com extract_fields(registrar=False) e registra só a
+    última leitura, quando a espera termina: um campo que ainda está carregando não conta como ausente a cada verificação.
+
+    Args:
+        selector_map (dict): Mapa {nome_do_campo: (by, value) ou Seletor} usado na extração.
+        campos (CamposExtraidos): Retorno do extract_fields.
+    Returns:
+        dict: {nome_do_campo: texto}
+    Raises:
+        SeletorNaoEncontrado: se um seletor obrigatório do registro está quebrado
+    """
+    buscas = getattr(campos, "buscas", {})
+    # Um campo só conta como ausente quando pelo menos dois outros campos foram encontrados, ou seja, a página já carregou
+    pagina_carregada = sum(1 for texto in campos.values() if texto) >= 2
+    for nome, valor in selector_map.items():
+        if not isinstance(valor, Seletor) or valor.registro is None or nome not in buscas:
+            continue
+        valor.registro.registrar_resultado(valor, buscas[nome]["tentativas"], buscas[nome]["indice"])
+        if buscas[nome]["indice"] is None and pagina_carregada:
+            valor.registro.registrar_ausencia(valor)
+    return campos
+
+# Registro padrão, onde o google_map.py registra os seletores do Google Maps
+SELETORES = RegistroSeletores()
@@ -1,7 +1,15 @@
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
+# O selenium só é importado quando o navegador é usado (ex: um --plan ou uma execução atendida pelo cache não abre o Chrome)
+from functions.utils.selector_registry import CamposExtraidos, variantes_js, campos_js, registrar_extracao
 import os
+import json
 import time
+import threading
+
+# psutil é opcional: sem ele a memória do navegador não é medida
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 
 class WebAutomation:
@@ -9,11 +17,78 @@ class WebAutomation:
     Framework padrão para automação web com Selenium.
     """
 
+    # Intervalo entre as verificações das esperas, em segundos
+    POLL_FREQUENCY = 0.1
+
+    # Recursos bloqueados no lean_mode: imagens, fontes, mídia, tiles do mapa e fotos dos lugares
+    LEAN_BLOCKED_URLS = [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.otf",
+        "*.mp4", "*.webm", "*.mp3",
+        "*/maps/vt?*", "*/maps/vt/*", "*/kh/v=*", "*googleusercontent.com/*", "*gstatic.com/images/*",
+    ]
+
+    # Função da página que tenta as variantes de um seletor em ordem e devolve o primeiro elemento encontrado,
+    # com o tempo de cada variante avaliada. Os XPaths são compilados uma vez por página e reaproveitados
+    _LOCALIZAR_JS = """
+        const localizar = (variantes) => {
+            const compilados = window.__xpathsCompilados || (window.__xpathsCompilados = new Map());
+            const tentativas = [];
+            for (const [indice, tipo, seletor] of variantes) {
+                const inicio = performance.now();
+                let el = null;
+                try {
+                    if (tipo === "xpath") {
+                        let expressao = compilados.get(seletor);
+                        if (!expressao) {
+                            expressao = document.createExpression(seletor, null);
+                            compilados.set(seletor, expressao);
+                        }
+                        el = expressao.evaluate(document, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+                    } else {
+                        el = document.querySelector(seletor);
+                    }
+                } catch (e) {
+                    el = null;
+                }
+                tentativas.push([indice, (performance.now() - inicio) / 1000]);
+                if (el) { return {elemento: el, indice: indice, tentativas: tentativas}; }
+            }
+            return {elemento: null, indice: null, tentativas: tentativas};
+        };
+    """
+
+    # Script que procura um seletor (cadeia de variantes) na página
+    _FIND_SELECTOR_JS = _LOCALIZAR_JS + "return localizar(arguments[0]);"
+
+    # Script que resolve vários seletores de uma vez dentro da página e devolve o texto de cada um
+    _EXTRACT_FIELDS_JS = _LOCALIZAR_JS + """
+        const resultado = {};
+        const buscas = {};
+        for (const [nome, variantes] of arguments[0]) {
+            const busca = localizar(variantes);
+            const el = busca.elemento;
+            resultado[nome] = el ? (el.innerText || el.textContent || "").trim() : "";
+            buscas[nome] = {indice: busca.indice, tentativas: busca.tentativas};
+        }
+        return {valores: resultado, buscas: buscas};
+    """
+
     def __init__(self):
         self.__webDriver = None
-        self.__chrome_options = webdriver.ChromeOptions()
+        self.__chrome_options = None
         self.__last_config = {}
         self.__download_path = None
+        # Navegador reserva, iniciado em segundo plano para o restart_browser() só trocar de sessão
+        self.__opcoes_reserva = None
+        self.__reserva = None
+        self.__thread_reserva = None
+        # Uso da sessão atual, usado para decidir quando reciclar o navegador
+        self.__inicio_sessao = time.monotonic()
+        self.__paginas = 0
+        # Bytes transferidos por aba desde a última navegação, somados pelos eventos de rede do log de performance
+        self.__bytes_por_aba = {}
+        self.__do_cache = set()
 
     # ========================
     # 1 - NAVEGAÇÃO
@@ -22,7 +97,8 @@ class WebAutomation:
     def startWebDriver(self, anonimo=False, iniciar_maximizado=True, mostra_janela_chrome=True,
                        bloquear_popup=False, bloquear_notificacoes=False, desativar_extensoes=False,
                        desativar_infobar=False, desativar_sandbox=False, sistema_linux=False,
-                       chrome_log_message=True, chrome_driver_path=os.getcwd()+"\\chromedriver.exe",page_load_strategy="normal"):
+                       chrome_log_message=True, chrome_driver_path=os.getcwd()+"\\chromedriver.exe",page_load_strategy="normal",
+                       user_data_dir=None, lean_mode=False, debugger_address=None, navegador_reserva=False):
         """
         Inicia o navegador Chrome com as configurações especificadas.
 
@@ -39,6 +115,15 @@ class WebAutomation:
             chrome_log_message (bool): Se True, exibe as mensagens do Chrome.
             chrome_driver_path (str): Caminho do driver do Chrome.
             page_load_strategy (str): Estratégia de carregamento da página.
+            user_data_dir (str): Pasta de perfil do Chrome. Necessária para rodar vários navegadores em paralelo sem conflito.
+            lean_mode (bool): Se True, bloqueia imagens, fontes, mídia e tiles do mapa e desativa GPU e animações,
+                              reduzindo banda, memória e tempo de carregamento.
+            debugger_address (str): Endereço de depuração ("host:porta") de um Chrome já aberto com
+                                    --remote-debugging-port. Se informado, o driver se conecta a esse Chrome
+                                    em vez de abrir um novo, e as demais opções do navegador são ignoradas.
+            navegador_reserva (bool): Se True, mantém um segundo navegador iniciado em segundo plano
+                                      (com o perfil user_data_dir + "_reserva"), para o restart_browser()
+                                      só trocar de sessão em vez de abrir o Chrome do zero.
             
         Returns:
             webdriver.Chrome: O driver do Chrome.
@@ -58,46 +143,211 @@ class WebAutomation:
             "chrome_log_message": chrome_log_message,
             "chrome_driver_path": chrome_driver_path,
             "page_load_strategy": page_load_strategy,
+            "user_data_dir": user_data_dir,
+            "lean_mode": lean_mode,
+            "debugger_address": debugger_address,
+            "navegador_reserva": navegador_reserva,
         }
 
-        # configurações do Chrome
-        self.__chrome_options = webdriver.ChromeOptions()
-        self.__chrome_options.page_load_strategy = page_load_strategy
-
-        if anonimo:
-            self.__chrome_options.add_argument("--incognito")
-        if iniciar_maximizado:
-            self.__chrome_options.add_argument("--start-maximized")
-        if not mostra_janela_chrome:
-            self.__chrome_options.add_argument("--headless=new")
-        if bloquear_popup:
-            self.__chrome_options.add_argument("--disable-popup-blocking")
-        if bloquear_notificacoes:
-            self.__chrome_options.add_argument("--disable-notifications")
-        if desativar_extensoes:
-            self.__chrome_options.add_argument("--disable-extensions")
-        if desativar_infobar:
-            self.__chrome_options.add_argument("--disable-infobars")
-        if desativar_sandbox:
-            self.__chrome_options.add_argument("--no-sandbox")
-        if sistema_linux:
-            self.__chrome_options.add_argument("--disable-dev-shm-usage")
-        if chrome_log_message:
-            self.__chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-            self.__chrome_options.add_argument("--log-level=3")
+        # As opções são montadas uma vez e reaproveitadas pelo navegador reserva
+        self.__chrome_options = self.__montar_opcoes(user_data_dir)
+        self.__webDriver = self.__iniciar_chrome(self.__chrome_options)
+        self.__nova_sessao()
+        if navegador_reserva and not debugger_address:
+            self.__opcoes_reserva = self.__montar_opcoes(f"{user_data_dir}_reserva" if user_data_dir else None)
+            self.__preparar_reserva()
+        return self.__webDriver
 
+    def __montar_opcoes(self, user_data_dir):
+        """
+        Monta as opções do Chrome a partir da última configuração do startWebDriver().
+
+        Args:
+            user_data_dir (str): Pasta de perfil do Chrome. Mantida entre execuções, guarda o cache de disco do Google Maps.
+
+        Returns:
+            webdriver.ChromeOptions: As opções do Chrome.
+        """
+        from selenium import webdriver
+
+        config = self.__last_config
+        opcoes = webdriver.ChromeOptions()
+        opcoes.page_load_strategy = config["page_load_strategy"]
+        # Eventos de rede do DevTools Protocol no log de performance, lidos pelo page_transfer_bytes
+        opcoes.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        opcoes.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+        # Conectando a um Chrome já aberto, as opções de inicialização não se aplicam
+        if config["debugger_address"]:
+            opcoes.add_experimental_option("debuggerAddress", config["debugger_address"])
+            return opcoes
+
+        if config["anonimo"]:
+            opcoes.add_argument("--incognito")
+        if config["iniciar_maximizado"]:
+            opcoes.add_argument("--start-maximized")
+        if not config["mostra_janela_chrome"]:
+            opcoes.add_argument("--headless=new")
+        if config["bloquear_popup"]:
+            opcoes.add_argument("--disable-popup-blocking")
+        if config["bloquear_notificacoes"]:
+            opcoes.add_argument("--disable-notifications")
+        if config["desativar_extensoes"]:
+            opcoes.add_argument("--disable-extensions")
+        if config["desativar_infobar"]:
+            opcoes.add_argument("--disable-infobars")
+        if config["desativar_sandbox"]:
+            opcoes.add_argument("--no-sandbox")
+        if config["sistema_linux"]:
+            opcoes.add_argument("--disable-dev-shm-usage")
+        if config["chrome_log_message"]:
+            opcoes.add_experimental_option('excludeSwitches', ['enable-logging'])
+            opcoes.add_argument("--log-level=3")
+        if user_data_dir:
+            os.makedirs(user_data_dir, exist_ok=True)
+            opcoes.add_argument(f"--user-data-dir={user_data_dir}")
+
+        prefs = {}
         if self.__download_path:
-            prefs = {
+            prefs.update({
                 "download.default_directory": self.__download_path,
                 "download.prompt_for_download": False,
                 "download.directory_upgrade": True,
                 "safebrowsing.enabled": True
-            }
-            self.__chrome_options.add_experimental_option("prefs", prefs)
+            })
+        if config["lean_mode"]:
+            opcoes.add_argument("--disable-gpu")
+            opcoes.add_argument("--force-prefers-reduced-motion")
+            opcoes.add_argument("--mute-audio")
+            opcoes.add_argument("--blink-settings=imagesEnabled=false")
+            # Bloqueio por content settings vale para todas as abas, inclusive as abertas depois
+            prefs.update({
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.media_stream": 2,
+            })
+        if prefs:
+            opcoes.add_experimental_option("prefs", prefs)
+        return opcoes
+
+    def __iniciar_chrome(self, opcoes):
+        """
+        Inicia (ou conecta a) um Chrome com as opções informadas e aplica as configurações feitas pelo DevTools Protocol.
 
-        # inicia webdriver
-        self.__webDriver = webdriver.Chrome(options=self.__chrome_options)
-        return self.__webDriver
+        Args:
+            opcoes (webdriver.ChromeOptions): Opções montadas pelo __montar_opcoes().
+
+        Returns:
+            webdriver.Chrome: O driver do Chrome.
+        """
+        from selenium import webdriver
+
+        driver = webdriver.Chrome(options=opcoes)
+        self.__configurar_aba(driver)
+        return driver
+
+    def __configurar_aba(self, driver):
+        """
+        Aplica na aba atual do driver as configurações feitas pelo DevTools Protocol, que valem só para a aba
+        em que foram enviadas: por isso são aplicadas na primeira aba e em cada aba aberta pelo open_tab.
+        """
+        if self.__last_config["lean_mode"]:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(self.LEAN_BLOCKED_URLS)})
+
+    def __preparar_reserva(self, processos_anteriores=()):
+        """
+        Inicia o navegador reserva em segundo plano.
+
+        Args:
+            processos_anteriores (list): Processos do navegador que usava o mesmo perfil, esperados antes de abrir a reserva.
+        """
+        opcoes = self.__opcoes_reserva
+
+        def iniciar():
+            try:
+                self.__esperar_perfil_livre(opcoes, processos_anteriores)
+                self.__reserva = self.__iniciar_chrome(opcoes)
+            except Exception:
+                # Sem reserva, o próximo restart_browser() abre o Chrome do zero
+                self.__reserva = None
+
+        self.__reserva = None
+        self.__thread_reserva = threading.Thread(target=iniciar, name="navegador-reserva", daemon=True)
+        self.__thread_reserva.start()
+
+    def __processos_do_navegador(self):
+        """
+        Processos do Chrome aberto pelo driver atual (filhos do chromedriver), ou lista vazia sem o psutil.
+        """
+        if psutil is None or not self.__webDriver:
+            return []
+        try:
+            return psutil.Process(self.__webDriver.service.process.pid).children(recursive=True)
+        except (AttributeError, psutil.Error):
+            return []
+
+    def __esperar_perfil_livre(self, opcoes, processos, timeout=30):
+        """
+        Espera o Chrome que usava o perfil das opções sair: o quit() retorna antes de todos os processos do Chrome
+        terminarem, e um Chrome novo no mesmo perfil encontraria a trava do perfil ainda ativa.
+        Com o psutil espera os processos do navegador fechado; sem ele, espera o arquivo de trava do perfil sumir.
+        """
+        if processos:
+            psutil.wait_procs(processos, timeout=timeout)
+            return
+        pastas = [argumento.split("=", 1)[1] for argumento in opcoes.arguments if argumento.startswith("--user-data-dir=")]
+        if not pastas:
+            return
+        limite = time.monotonic() + timeout
+        while os.path.lexists(os.path.join(pastas[0], "SingletonLock")) and time.monotonic() < limite:
+            time.sleep(self.POLL_FREQUENCY)
+
+    def __pegar_reserva(self):
+        """
+        Retorna o navegador reserva (esperando ele terminar de iniciar), ou None se não houver.
+        """
+        if self.__thread_reserva is None:
+            return None
+        self.__thread_reserva.join()
+        reserva = self.__reserva
+        self.__reserva = None
+        self.__thread_reserva = None
+        return reserva
+
+    def page_transfer_bytes(self):
+        """
+        Retorna quantos bytes a página atual transferiu pela rede desde que foi carregada.
+        Recursos vindos do cache contam como 0.
+        """
+        self.__ler_eventos_rede()
+        return self.__bytes_por_aba.get(self.__webDriver.current_window_handle, 0)
+
+    def __ler_eventos_rede(self):
+        """
+        Lê os eventos de rede acumulados no log de performance e soma o encodedDataLength de cada requisição
+        terminada na aba em que ela aconteceu. Ao contrário do transferSize da Resource Timing API, ele vale
+        também para recursos de outras origens sem Timing-Allow-Origin (tiles, fotos, fontes).
+        Uma nova navegação do frame principal (o id do frame principal é o id da aba) zera a contagem da aba,
+        e requisições atendidas pelo cache não contam.
+        """
+        for entrada in self.__webDriver.get_log("performance"):
+            mensagem = json.loads(entrada["message"])
+            aba = mensagem.get("webview")
+            metodo = mensagem.get("message", {}).get("method")
+            params = mensagem.get("message", {}).get("params", {})
+            if metodo == "Network.requestWillBeSent":
+                if params.get("type") == "Document" and params.get("frameId") == aba:
+                    self.__bytes_por_aba[aba] = 0
+            elif metodo == "Network.requestServedFromCache":
+                self.__do_cache.add(params.get("requestId"))
+            elif metodo == "Network.responseReceived":
+                if params.get("response", {}).get("fromDiskCache"):
+                    self.__do_cache.add(params.get("requestId"))
+            elif metodo == "Network.loadingFinished":
+                if params.get("requestId") in self.__do_cache:
+                    self.__do_cache.discard(params.get("requestId"))
+                else:
+                    self.__bytes_por_aba[aba] = self.__bytes_por_aba.get(aba, 0) + (params.get("encodedDataLength") or 0)
 
     def wait_page_load(self, timeout=30):
         """
@@ -106,32 +356,48 @@ class WebAutomation:
         Args:
             timeout (int): Tempo máximo de espera em segundos.
         """
-        hora_inicio = time.time()
-        while time.time() - hora_inicio < timeout:
-            page_state = self.__webDriver.execute_script("return document.readyState")
-            if page_state == "complete":
-                return True
-            time.sleep(0.5)
-        return False
+        return self.wait_condition(
+            lambda: self.__webDriver.execute_script("return document.readyState") == "complete",
+            timeout=timeout,
+        )
 
     def closer_chrome(self):
         """
         Fecha o navegador Chrome.
         """
         if self.__webDriver:
+            # Conectado a um Chrome já aberto (debugger_address), o quit() encerra só a sessão do driver
             self.__webDriver.quit()
             self.__webDriver = None
+        reserva = self.__pegar_reserva()
+        if reserva:
+            reserva.quit()
 
     def restart_browser(self):
         """
         Reinicia completamente o navegador com a última configuração usada no startWebDriver.
+        Se houver um navegador reserva pronto, a sessão atual é trocada por ele e uma nova reserva é
+        iniciada em segundo plano, sem esperar o Chrome abrir do zero.
         """
 
         if not self.__last_config:
             raise RuntimeError("Nenhuma configuração encontrada. Você precisa chamar startWebDriver() primeiro.")
-        self.closer_chrome()
-
-        return self.startWebDriver(**self.__last_config)    
+        reserva = self.__pegar_reserva()
+        if reserva is None:
+            self.closer_chrome()
+            return self.startWebDriver(**self.__last_config)
+        processos = self.__processos_do_navegador()
+        try:
+            self.__webDriver.quit()
+        except Exception:
+            pass
+        self.__webDriver = reserva
+        self.__nova_sessao()
+        # O perfil do navegador que foi fechado passa a ser o da nova reserva, que só abre depois que o Chrome
+        # antigo terminar de sair e liberar o perfil
+        self.__chrome_options, self.__opcoes_reserva = self.__opcoes_reserva, self.__chrome_options
+        self.__preparar_reserva(processos)
+        return self.__webDriver
 
     def open_url(self, url, wait_load=True, timeout=30):
         """
@@ -143,9 +409,79 @@ class WebAutomation:
             timeout (int): Tempo máximo de espera em segundos.
         """
         self.__webDriver.get(url)
+        self.__paginas += 1
         if wait_load:
             self.wait_page_load(timeout)
 
+    def execute_script(self, script, *args):
+        """
+        Executa um JavaScript na página atual.
+
+        Args:
+            script (str): Código JavaScript a ser executado.
+            args: Argumentos disponíveis no script como arguments[0], arguments[1], ...
+
+        Returns:
+            O valor retornado pelo script.
+        """
+        return self.__webDriver.execute_script(script, *args)
+
+    # ========================
+    # 1.1 - ABAS
+    # ========================
+
+    def current_tab(self):
+        """
+        Retorna o identificador da aba atual.
+        """
+        return self.__webDriver.current_window_handle
+
+    def open_tab(self, url):
+        """
+        Abre uma URL em uma nova aba, sem esperar o carregamento e sem trocar de aba.
+        A aba é aberta em branco e recebe as configurações do DevTools Protocol (bloqueios do lean_mode) antes da URL.
+
+        Args:
+            url (str): URL a ser aberta.
+
+        Returns:
+            str: Identificador da nova aba.
+        """
+        aba_atual = self.__webDriver.current_window_handle
+        abas_antes = set(self.__webDriver.window_handles)
+        self.__webDriver.execute_script("window.open('about:blank', '_blank');")
+        novas = [aba for aba in self.__webDriver.window_handles if aba not in abas_antes]
+        if not novas:
+            raise RuntimeError(f"Não foi possível abrir uma nova aba para: {url}")
+        self.__webDriver.switch_to.window(novas[0])
+        try:
+            self.__configurar_aba(self.__webDriver)
+            self.__webDriver.execute_script("window.location.href = arguments[0];", url)
+        finally:
+            self.__webDriver.switch_to.window(aba_atual)
+        self.__paginas += 1
+        return novas[0]
+
+    def switch_to_tab(self, handle):
+        """
+        Troca o foco do driver para a aba informada.
+        """
+        self.__webDriver.switch_to.window(handle)
+
+    def navigate_tab(self, url):
+        """
+        Navega a aba atual para outra URL sem esperar o carregamento, para reaproveitar a aba.
+        """
+        self.__webDriver.execute_script("window.location.href = arguments[0];", url)
+        self.__paginas += 1
+
+    def close_tab(self, handle):
+        """
+        Fecha a aba informada. O foco precisa ser trocado para outra aba depois.
+        """
+        self.__webDriver.switch_to.window(handle)
+        self.__webDriver.close()
+
     def get_current_url(self):
         """
         Retorna a URL atual do navegador Chrome.
@@ -156,7 +492,7 @@ class WebAutomation:
     # 2 - ELEMENTOS
     # ========================
 
-    def click_on_element(self, by=None, value=None, element=None, simulate_click=True, timeout=30):
+    def click_on_element(self, by=None, value=None, element=None, simulate_click=True, timeout=30, seletor=None):
         """
         Clica em um elemento da página.
 
@@ -166,8 +502,11 @@ class WebAutomation:
             element (WebElement): Elemento da página.
             simulate_click (bool): Se True, simula o clique com o mouse.
             timeout (int): Tempo máximo de espera em segundos.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
         """
-        if by is not None and value is not None:
+        if seletor is not None:
+            element = self.wait_element(seletor=seletor, timeout=timeout)
+        elif by is not None and value is not None:
             element = self.wait_element(by, value, timeout)            
         if simulate_click and element is not None:
             element.click()
@@ -176,7 +515,8 @@ class WebAutomation:
         else:
             raise ValueError("É necessário fornecer 'by' e 'value' ou 'element'.")
 
-    def type_into(self, by=None, value=None, element=None, txt=None, limpar=True, timeout=30, send_enter=False, time_sleep_enter = 0):
+    def type_into(self, by=None, value=None, element=None, txt=None, limpar=True, timeout=30, send_enter=False, time_sleep_enter = 0,
+                  seletor=None):
         """
         Digita um texto em um campo da página.
 
@@ -189,15 +529,20 @@ class WebAutomation:
             timeout (int): Tempo máximo de espera em segundos.
             send_enter (bool): Se True, envia um Enter após digitar.
             time_sleep_enter (int): Tempo de espera em segundos após enviar o Enter.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
         """
         if txt is None:
             raise ValueError("O texto para digitar não pode ser None.")
-        if by is not None and value is not None:
+        if seletor is not None:
+            campo = self.wait_element(seletor=seletor, timeout=timeout)
+        elif by is not None and value is not None:
             campo = self.wait_element(by=by, value=value,timeout=timeout)
         elif element is not None:
             campo = element
         else:
             raise ValueError("É necessário fornecer 'by' e 'value' ou 'element'.")
+        from selenium.webdriver.common.keys import Keys
+
         if limpar:
             # campo.clear()
             campo.send_keys(Keys.CONTROL + "a")
@@ -208,7 +553,7 @@ class WebAutomation:
                 time.sleep(time_sleep_enter)
             campo.send_keys(Keys.ENTER)
 
-    def scroll_to_element(self, by=None, value=None, element=None, timeout=30):
+    def scroll_to_element(self, by=None, value=None, element=None, timeout=30, seletor=None):
         """
         Scrolla até um elemento da página.
 
@@ -217,12 +562,15 @@ class WebAutomation:
             value (str): Valor do seletor.
             element (WebElement): Elemento da página.
             timeout (int): Tempo máximo de espera em segundos.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
         """
-        if by is not None and value is not None:
+        if seletor is not None:
+            element = self.wait_element(seletor=seletor, timeout=timeout)
+        elif by is not None and value is not None:
             element = self.wait_element(by=by, value=value,timeout=timeout)
         self.__webDriver.execute_script("arguments[0].scrollIntoView();", element)
 
-    def get_text(self, by=None, value=None, element=None):
+    def get_text(self, by=None, value=None, element=None, seletor=None):
         """
         Retorna o texto de um elemento da página.
 
@@ -230,7 +578,15 @@ class WebAutomation:
             by (str): Seletor CSS ou XPath.
             value (str): Valor do seletor.
             element (WebElement): Elemento da página.
+            seletor (Seletor): Seletor do registro, no lugar de by e value. Se nenhuma variante encontrar o
+                               elemento a falha é registrada (e um seletor obrigatório quebrado levanta SeletorNaoEncontrado).
         """
+        if seletor is not None:
+            element = self.find_selector(seletor)
+            if element is None:
+                if seletor.registro is not None:
+                    seletor.registro.registrar_ausencia(seletor)
+                return ""
         try:
             if by is not None and value is not None:
                 el = self.__webDriver.find_element(by=by, value=value)
@@ -242,11 +598,54 @@ class WebAutomation:
             return ""
         return ""
 
+    def extract_fields(self, selector_map, registrar=True):
+        """
+        Retorna o texto de vários elementos da página em uma única chamada ao navegador.
+
+        Args:
+            selector_map (dict): Mapa {nome_do_campo: (by, value) ou Seletor}, onde by é By.XPATH ou By.CSS_SELECTOR.
+            registrar (bool): Se False, o resultado não entra nas estatísticas do registro; usado nas esperas, que
+                              registram só a última leitura com registrar_extracao.
+
+        Returns:
+            CamposExtraidos: {nome_do_campo: texto}. Campos cujo elemento não existe voltam como "".
+
+        Raises:
+            SeletorNaoEncontrado: se um seletor obrigatório do registro está quebrado
+        """
+        resposta = self.__webDriver.execute_script(self._EXTRACT_FIELDS_JS, campos_js(selector_map)) or {}
+        campos = CamposExtraidos(resposta.get("valores", {}), resposta.get("buscas", {}))
+        return registrar_extracao(selector_map, campos) if registrar else campos
+
+    def __localizar(self, seletor):
+        """
+        Procura um Seletor na página em uma única chamada ao navegador, tentando as variantes em ordem.
+
+        Returns:
+            dict: {"elemento", "indice", "tentativas"}
+        """
+        return self.__webDriver.execute_script(self._FIND_SELECTOR_JS, variantes_js(seletor)) or {}
+
+    def find_selector(self, seletor):
+        """
+        Procura um Seletor do registro na página, sem esperar, e registra o resultado nas estatísticas do registro.
+
+        Args:
+            seletor (Seletor): Seletor a procurar.
+
+        Returns:
+            WebElement: O elemento da primeira variante encontrada, ou None.
+        """
+        busca = self.__localizar(seletor)
+        if seletor.registro is not None:
+            seletor.registro.registrar_resultado(seletor, busca.get("tentativas", []), busca.get("indice"))
+        return busca.get("elemento")
+
     # ========================
     # 3 - ESPERAS
     # ========================
 
-    def wait_element(self, by, value, timeout=30):
+    def wait_element(self, by=None, value=None, timeout=30, seletor=None):
         """
         Espera por um elemento da página.
 
@@ -254,11 +653,174 @@ class WebAutomation:
             by (str): Seletor CSS ou XPath.
             value (str): Valor do seletor.
             timeout (int): Tempo máximo de espera em segundos.
+            seletor (Seletor): Seletor do registro, no lugar de by e value. As variantes são tentadas em ordem a cada
+                               verificação; se o seletor está quebrado a espera é encurtada.
+
+        Raises:
+            SeletorNaoEncontrado: se o seletor do registro é obrigatório e nenhuma variante o encontrou em várias esperas seguidas
         """
-        hora_comeco = time.time()
-        while (time.time() - hora_comeco) < timeout:
-            try:
-                return self.__webDriver.find_element(by=by, value=value)
-            except:
-                time.sleep(0.5)
+        if seletor is not None:
+            return self.__esperar_seletor(seletor, timeout)
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        try:
+            return self.__wait(timeout).until(EC.presence_of_element_located((by, value)))
+        except TimeoutException:
+            return None
+
+    def __esperar_seletor(self, seletor, timeout):
+        """
+        Espera um Seletor do registro. Só o resultado da última verificação entra nas estatísticas.
+        """
+        registro = seletor.registro
+        ultima = {}
+
+        def encontrado():
+            ultima.clear()
+            ultima.update(self.__localizar(seletor))
+            return ultima.get("elemento")
+
+        elemento = self.wait_condition(encontrado, timeout=registro.timeout(seletor, timeout) if registro else timeout)
+        if registro is not None:
+            registro.registrar_resultado(seletor, ultima.get("tentativas", []), ultima.get("indice"))
+            if not elemento:
+                registro.registrar_ausencia(seletor)
+        return elemento or None
+
+    def __wait(self, timeout):
+        """
+        Cria um WebDriverWait que ignora elementos ainda não existentes ou recriados pela página.
+        """
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+
+        return WebDriverWait(self.__webDriver, timeout, poll_frequency=self.POLL_FREQUENCY,
+                             ignored_exceptions=(NoSuchElementException, StaleElementReferenceException))
+
+    def wait_condition(self, condicao, timeout=30):
+        """
+        Espera até que uma condição seja verdadeira, verificando assim que possível em vez de usar esperas fixas.
+
+        Args:
+            condicao (callable): Função sem argumentos que retorna um valor verdadeiro quando a condição é atendida.
+            timeout (int): Tempo máximo de espera em segundos.
+
+        Returns:
+            O valor retornado pela condição, ou False em caso de timeout.
+        """
+        from selenium.common.exceptions import TimeoutException
+        try:
+            return self.__wait(timeout).until(lambda _: condicao())
+        except TimeoutException:
+            return False
+
+    def is_stale(self, element):
+        """
+        Verifica se um elemento encontrado antes saiu da página (foi removido ou recriado).
+
+        Args:
+            element (WebElement): Elemento a verificar.
+
+        Returns:
+            bool: True se o elemento não está mais na página.
+        """
+        from selenium.common.exceptions import StaleElementReferenceException
+        try:
+            element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+
+    def wait_element_gone(self, by=None, value=None, timeout=30, seletor=None):
+        """
+        Espera até que um elemento deixe de existir ou fique invisível na página.
+
+        Args:
+            by (str): Seletor CSS ou XPath.
+            value (str): Valor do seletor.
+            timeout (int): Tempo máximo de espera em segundos.
+            seletor (Seletor): Seletor do registro, no lugar de by e value.
+
+        Returns:
+            bool: True se o elemento sumiu antes do timeout.
+        """
+        if seletor is not None:
+            def sumiu():
+                elemento = self.__localizar(seletor).get("elemento")
+                return elemento is None or not elemento.is_displayed()
+            return bool(self.wait_condition(sumiu, timeout=timeout))
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        try:
+            self.__wait(timeout).until(EC.invisibility_of_element_located((by, value)))
+            return True
+        except TimeoutException:
+            return False
+
+    # ========================
+    # 4 - RECURSOS
+    # ========================
+
+    def __nova_sessao(self):
+        """
+        Zera os contadores de uso ao iniciar ou trocar a sessão do navegador.
+        """
+        self.__inicio_sessao = time.monotonic()
+        self.__paginas = 0
+        self.__bytes_por_aba = {}
+        self.__do_cache = set()
+
+    def browser_rss_mb(self):
+        """
+        Memória residente (RSS) da árvore de processos do navegador: chromedriver, Chrome e seus subprocessos.
+
+        Returns:
+            float: Memória em MB, ou None se o psutil não estiver instalado ou o Chrome não foi aberto pelo driver.
+        """
+        if psutil is None or not self.__webDriver or self.__last_config.get("debugger_address"):
+            return None
+        try:
+            processo = psutil.Process(self.__webDriver.service.process.pid)
+            total = 0
+            for p in [processo] + processo.children(recursive=True):
+                try:
+                    total += p.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            return total / (1024 * 1024)
+        except (AttributeError, psutil.Error):
+            return None
+
+    def resource_usage(self):
+        """
+        Uso da sessão atual do navegador.
+
+        Returns:
+            dict: {"rss_mb", "paginas", "idade_minutos"}. "rss_mb" é None quando não pode ser medido.
+        """
+        return {
+            "rss_mb": self.browser_rss_mb(),
+            "paginas": self.__paginas,
+            "idade_minutos": (time.monotonic() - self.__inicio_sessao) / 60,
+        }
+
+    def recycle_reason(self, max_rss_mb=0, max_paginas=0, max_idade_minutos=0):
+        """
+        Verifica se a sessão passou de algum limite e o navegador deve ser reciclado. Limites 0 ficam desativados.
+
+        Args:
+            max_rss_mb (float): Memória máxima da árvore de processos, em MB.
+            max_paginas (int): Quantidade máxima de páginas abertas na sessão.
+            max_idade_minutos (float): Tempo máximo da sessão, em minutos.
+
+        Returns:
+            str: O motivo da reciclagem, ou None se nenhum limite foi atingido.
+        """
+        uso = self.resource_usage()
+        if max_rss_mb and uso["rss_mb"] is not None and uso["rss_mb"] >= max_rss_mb:
+            return f"memória {uso['rss_mb']:.0f} MB >= {max_rss_mb} MB"
+        if max_paginas and uso["paginas"] >= max_paginas:
+            return f"{uso['paginas']} páginas >= {max_paginas}"
+        if max_idade_minutos and uso["idade_minutos"] >= max_idade_minutos:
+            return f"sessão com {uso['idade_minutos']:.0f} min >= {max_idade_minutos} min"
         return None
\ No newline at end of file
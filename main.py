@@ -1,9 +1,16 @@
-from functions.utils import selenium_web
-from functions.src.google_map import collect_data
-from functions.utils.logger import log_info, log_error, setup_logging
-from functions.utils.file_manager import read_excel, write_json, json_to_excel
-import time
+from functions.src.worker_pool import executar_workers, executar_workers_distribuidos, atender_pelo_cache, NavegadorAntecipado
+from functions.src.planner import deduplicar_tarefas, montar_plano, formatar_plano
+from functions.utils.logger import log_info, log_warning, log_error, setup_logging, stop_logging
+from functions.utils.file_manager import iter_excel_rows, write_json, write_json_stream, write_excel_stream, write_jsonl_stream, flatten_results
+from functions.utils.journal import Journal
+from functions.utils.cache import CacheBuscas
+from functions.utils.job_store import abrir_fila_trabalhos, FALHOU
+from functions.src.post_processing import write_typed_results
+from functions.src.incremental import ResultadosAnteriores, carregar_resultados_anteriores, calcular_alteracoes
+from functions.utils.metrics import configurar_metricas, medir, exportar_metricas
+import argparse
 import os
+import time
 import tomllib
 
 def _substituir_diretorios(obj, base_dir: str):
@@ -33,72 +40,309 @@ def carregar_config():
     else:
         raise FileNotFoundError("Arquivo config.toml não encontrado")
 
-def main():
+def ler_argumentos(argv=None):
+    """
+    Lê os argumentos da linha de comando
+    @param argv: lista de argumentos (None usa sys.argv)
+    @return: argumentos
+    """
+    parser = argparse.ArgumentParser(description="Consulta estabelecimentos no Google Maps")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continua uma execução interrompida a partir do diário em disco")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignora o cache de buscas e coleta tudo novamente (o cache é atualizado). "
+                             "No --coordenador, devolve para a fila as categorias concluídas ou que falharam")
+    parser.add_argument("--max-age", type=float, default=None, metavar="HORAS",
+                        help="Validade do cache em horas, substitui o cache_ttl_horas do config.toml")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Atualiza os resultados anteriores: só abre a janela dos lugares novos ou alterados "
+                             "e escreve o arquivo de alterações (o cache não é consultado)")
+    parser.add_argument("--coordenador", action="store_true",
+                        help="Carrega a planilha na fila de trabalhos compartilhada ([distribuido]), espera os workers "
+                             "terminarem e escreve os resultados")
+    parser.add_argument("--worker", action="store_true",
+                        help="Coleta as categorias da fila de trabalhos compartilhada; junto com --coordenador, "
+                             "roda os workers no mesmo processo")
+    parser.add_argument("--plan", action="store_true",
+                        help="Só mostra a ordem de coleta das categorias e a duração estimada, sem abrir o navegador")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = ler_argumentos(argv)
     config = carregar_config()
-    url_google_maps = "https://www.google.com/maps"
+    url_google_maps = config["base"].get("url_google_maps") or "https://www.google.com/maps"
 
     # Aqui é configurado o logger e criado o arquivo de log
-    setup_logging()
+    config_log = config.get("log", {})
+    setup_logging(level=config_log.get("nivel", "INFO"), module_levels=config_log.get("modulos"),
+                  json_format=config_log.get("formato", "texto") == "json")
+    try:
+        if args.plan:
+            _planejar(args, config)
+        elif args.coordenador:
+            _coordenar(args, config, url_google_maps)
+        elif args.worker:
+            _executar_worker(args, config, url_google_maps)
+        else:
+            _executar(args, config, url_google_maps)
+    finally:
+        # Garante que as mensagens que ainda estão na fila sejam escritas
+        stop_logging()
 
+def _executar(args, config, url_google_maps):
+    """
+    Fluxo principal: lê a planilha, coleta os dados e escreve os resultados
+    @param args: argumentos da linha de comando
+    @param config: configuração carregada
+    @param url_google_maps: url do Google Maps
+    """
     log_info("=============== Iniciando o programa ===============")
-    log_info("Iniciando a leitura da planilha")
+    configurar_metricas(resumo_a_cada=config["base"].get("resumo_metricas_a_cada", 0))
+
+    # O navegador do primeiro worker abre em segundo plano enquanto a planilha é lida e o cache é consultado
+    antecipado = None
+    if config["base"].get("navegador_antecipado", True) and config["base"].get("backend", "selenium") == "selenium":
+        antecipado = NavegadorAntecipado(config, url_google_maps)
+    try:
+        resultados, anteriores = _coletar(args, config, url_google_maps, antecipado)
+    finally:
+        # Se todas as categorias vieram do cache ou do diário, o navegador antecipado não foi usado
+        if antecipado is not None:
+            antecipado.descartar()
+
+    # Arquivo com o que mudou desde a execução anterior (lugares adicionados, alterados e removidos)
+    if anteriores is not None:
+        alteracoes = calcular_alteracoes(anteriores, dict(resultados()))
+        caminho_alteracoes = config["arquivos"].get("alteracoes") or os.path.join(
+            os.path.dirname(config["arquivos"]["resultados_json"]), "alteracoes.json")
+        write_json(alteracoes, caminho_alteracoes)
+        log_info("Alterações desde a execução anterior: %s adicionado(s), %s alterado(s), %s removido(s)",
+                 len(alteracoes["adicionados"]), len(alteracoes["alterados"]), len(alteracoes["removidos"]))
+    _escrever_resultados(config, resultados)
+
+def _coletar(args, config, url_google_maps, antecipado=None):
+    """
+    Lê a planilha e coleta as categorias pelo diário, pelo cache ou pelos workers
+    @param args: argumentos da linha de comando
+    @param config: configuração carregada
+    @param url_google_maps: url do Google Maps
+    @param antecipado: navegador já iniciado em segundo plano, entregue ao primeiro worker
+    @return: tupla (função que percorre os resultados do diário na ordem da planilha, resultados anteriores do --incremental)
+    """
+    tarefas = _ler_tarefas(config)
+
+    # Cada estabelecimento coletado é gravado no diário em disco na hora, assim uma queda não perde o que já foi feito
+    # Com --resume o diário anterior é mantido e as categorias/índices que já estão nele são pulados
+    journal = Journal(config["arquivos"]["journal"], resume=args.resume)
+    if args.resume:
+        log_info("Retomando a execução a partir do diário")
+
+    # Buscas coletadas recentemente ficam em cache e não precisam abrir o navegador de novo
+    cache = _abrir_cache(args, config)
+
+    # Na atualização incremental os resultados da execução anterior são lidos antes de serem sobrescritos
+    anteriores = carregar_resultados_anteriores(config["arquivos"]["resultados_json"]) if args.incremental else None
+    if anteriores is not None:
+        log_info("Atualização incremental a partir de %s categoria(s) da execução anterior", len(anteriores))
+
+    # Cada worker abre o seu próprio navegador e consome as categorias de uma fila compartilhada
+    try:
+        executar_workers(tarefas, config, url_google_maps, journal, cache, usar_cache=not (args.refresh or args.incremental),
+                         anteriores=ResultadosAnteriores(anteriores) if anteriores is not None else None,
+                         antecipado=antecipado)
+    finally:
+        journal.fechar()
+
+    # Os resultados finais são lidos do diário na ordem da planilha, uma categoria por vez, a cada arquivo escrito
+    ordem = [establishment_type for establishment_type, _ in tarefas]
+    return lambda: journal.iter_resultados(ordem), anteriores
+
+def _planejar(args, config):
+    """
+    Modo --plan: mostra a ordem de coleta e a duração estimada, sem abrir o navegador e sem escrever nenhum arquivo
+    @param args: argumentos da linha de comando
+    @param config: configuração carregada
+    """
+    tarefas, removidas = deduplicar_tarefas(_ler_planilha(config))
+
+    # Categorias que não abrem o navegador: concluídas no diário (--resume) ou com resultado válido no cache
+    atendidas = {}
+    if args.resume and os.path.exists(config["arquivos"]["journal"]):
+        journal = Journal(config["arquivos"]["journal"], resume=True)
+        try:
+            atendidas.update({establishment_type: "diário" for establishment_type, _ in tarefas
+                              if journal.categoria_concluida(establishment_type)})
+        finally:
+            journal.fechar()
+    if not (args.refresh or args.incremental) and os.path.exists(config["arquivos"]["cache"]):
+        cache = _abrir_cache(args, config)
+        for establishment_type, qtd_results in tarefas:
+            if establishment_type not in atendidas and cache.buscar(establishment_type, qtd_results) is not None:
+                atendidas[establishment_type] = "cache"
+
+    print(formatar_plano(montar_plano(tarefas, config, atendidas), removidas))
+
+def _coordenar(args, config, url_google_maps):
+    """
+    Modo coordenador: carrega a planilha na fila de trabalhos compartilhada, espera os workers
+    (deste ou de outros nós) coletarem todas as categorias e escreve os resultados a partir da fila
+    @param args: argumentos da linha de comando
+    @param config: configuração carregada
+    @param url_google_maps: url do Google Maps
+    """
+    log_info("=============== Iniciando o coordenador ===============")
+    configurar_metricas(resumo_a_cada=config["base"].get("resumo_metricas_a_cada", 0))
+    if config.get("distribuido", {}).get("backend") == "memoria" and not args.worker:
+        raise ValueError("A fila de trabalhos em memória só é compartilhada dentro do processo, use --coordenador --worker")
+    tarefas = _ler_tarefas(config)
+    cache = _abrir_cache(args, config)
+
+    # Categorias que já estavam na fila (execução anterior do coordenador) são mantidas, com o que já foi coletado,
+    # a não ser com --refresh
+    fila_trabalhos = abrir_fila_trabalhos(config)
+    try:
+        novas = fila_trabalhos.carregar(tarefas)
+        log_info("%s categoria(s) nova(s) carregada(s) na fila de trabalhos", novas)
+        if args.refresh:
+            # Categorias concluídas, que falharam ou abandonadas em uma execução anterior são coletadas de novo
+            reenfileiradas = fila_trabalhos.reenfileirar(tarefas)
+            log_info("%s categoria(s) de uma execução anterior devolvida(s) para a fila", reenfileiradas)
+        else:
+            for establishment_type, qtd_results in tarefas:
+                if not fila_trabalhos.categoria_concluida(establishment_type):
+                    atender_pelo_cache(establishment_type, qtd_results, fila_trabalhos, cache)
 
-    # Faz leitura da planilha de casos
-    planilha = read_excel(filepath = config["planilha_atuacao"]["caminho_planilha"], header_row = 1, sheet_name = config["planilha_atuacao"]["nome_aba"])    
-    log_info(f"Planilha lida com sucesso")
-
-    log_info(f"Inicinado o driver")
-    driver = selenium_web.WebAutomation()
-    driver.startWebDriver()
-
-    log_info(f"Abrindo o Google Maps")
-    driver.open_url(url_google_maps)    
-    log_info(f"Google Maps aberto")
-    
-    # Variaveis de controle
-    tentativas = 0 # Essa variável é usada para contar as tentativas de coleta de dados
-    tentativas_maximas = config["base"]["tentativas_maximas"] # Essa variável é usada para definir o número máximo de tentativas de coleta de dados
-    full_result_research = {} # Essa variável é usada para armazenar os resultados da coleta de dados
-
-    # Loop principal
-    # Nessa parte eu faço um loop para coletar os dados de cada estabelecimento da planilha
-    for index, row in planilha.iterrows():
-        # Resetando as variáveis de controle para cada iteração
-        tentativas = 0
-        while tentativas < tentativas_maximas:
-            try:
-                # Aqui eu coleto as informações da linha atual da planilha
-                establishment_type = row[config["planilha_atuacao"]["coluna_estabeleciomento"]]
-                qtd_results = row[config["planilha_atuacao"]["coluna_qtd"]]
-
-                # Aqui eu chamo a função collect_data para coletar os dados do estabelecimento
-                result_research = collect_data(driver, establishment_type, qtd_results)
-                # Armazeno os resultados da coleta de dados em um dicionário para cada tipo de estabelecimento, para armazenar eles futuramente em um arquivo JSON e Excel.
-                full_result_research[establishment_type] = result_research
-                log_info(f"Dados coletados para o estabelecimento do tipo: {establishment_type}")
-                log_info(f"Dados coletados: {result_research}")
-                # Caso tudo tenha ocorrido bem, eu quero o loop do while e voltar para o loop principal para coletar os dados do próximo estabelecimento.
+        if args.worker:
+            # Os workers deste processo também consomem a fila, junto com os workers dos outros nós
+            executar_workers_distribuidos(fila_trabalhos, config, url_google_maps, cache)
+
+        # Espera até não haver categorias pendentes ou em andamento; leases expirados voltam para a fila
+        intervalo = config.get("distribuido", {}).get("intervalo_progresso", 30)
+        while True:
+            situacao = fila_trabalhos.situacao()
+            log_info("Fila de trabalhos: %s", situacao)
+            if fila_trabalhos.finalizada():
                 break
-            except Exception as e:
-                    log_error(f"Erro ao coletar dados: {e}")
-                    # Caso ocorra qualquer erro durante o fluxo de coleta de dados, eu incremento a variável tentativas e reinicio o navegador para tentar coletar os dados novamente.
-                    tentativas += 1
-                    log_info("Reiniciando o navegador")
-                    driver.restart_browser()
-                    driver.open_url(url_google_maps)
-                    time.sleep(1)
-    
-    # Após todas as iterações, eu escrevo os resultados em um arquivo JSON e Excel.
-    log_info(f"Todos os dados coletados: {full_result_research}")
-    write_json(full_result_research, config["arquivos"]["resultados_json"])
-    log_info(f"Arquivo JSON escrito com sucesso")
-    json_to_excel(full_result_research, config["arquivos"]["resultados_excel"])
-    log_info(f"Arquivo Excel escrito com sucesso")
-
-    # E finalizo o processo fechando o navegador utilizado pela automação
-    log_info(f"Fechando o driver")
-    driver.closer_chrome()
-    log_info(f"=============== Fim do programa ===============")
+            time.sleep(intervalo)
+        if situacao[FALHOU]:
+            log_error("%s categoria(s) falharam em todas as tentativas (use --refresh para coletá-las de novo)", situacao[FALHOU])
+
+        full_result_research = fila_trabalhos.carregar_resultados(fila_trabalhos.ordem())
+    finally:
+        fila_trabalhos.fechar()
+    _escrever_resultados(config, full_result_research.items)
+
+def _executar_worker(args, config, url_google_maps):
+    """
+    Modo worker: coleta as categorias da fila de trabalhos compartilhada até ela terminar
+    @param args: argumentos da linha de comando
+    @param config: configuração carregada
+    @param url_google_maps: url do Google Maps
+    """
+    log_info("=============== Iniciando o worker ===============")
+    configurar_metricas(resumo_a_cada=config["base"].get("resumo_metricas_a_cada", 0))
+    fila_trabalhos = abrir_fila_trabalhos(config)
+    try:
+        executar_workers_distribuidos(fila_trabalhos, config, url_google_maps, _abrir_cache(args, config))
+    finally:
+        fila_trabalhos.fechar()
+    exportar_metricas(config["arquivos"]["metricas"])
+    log_info("=============== Fim do worker ===============")
+
+def _ler_tarefas(config):
+    """
+    Lê a planilha de casos e monta a lista de categorias a coletar, sem categorias repetidas
+    @param config: configuração carregada
+    @return: lista de tuplas (establishment_type, qtd_results) na ordem da planilha
+    """
+    tarefas, removidas = deduplicar_tarefas(_ler_planilha(config))
+    for establishment_type, qtd_results in removidas:
+        log_info("Categoria %s repetida na planilha, coletada uma vez só com a maior quantidade", establishment_type)
+    return tarefas
+
+def _ler_planilha(config):
+    """
+    Lê a planilha de casos
+    @param config: configuração carregada
+    @return: lista de tuplas (establishment_type, qtd_results) de todas as linhas, na ordem da planilha
+    """
+    log_info("Iniciando a leitura da planilha")
+
+    # Faz leitura da planilha de casos linha a linha, sem carregar a planilha inteira em um DataFrame
+    planilha = iter_excel_rows(filepath = config["planilha_atuacao"]["caminho_planilha"], header_row = 1, sheet_name = config["planilha_atuacao"]["nome_aba"])
+
+    # Monto a lista de categorias a coletar a partir da planilha
+    tarefas = []
+    for row in planilha:
+        establishment_type = row[config["planilha_atuacao"]["coluna_estabeleciomento"]]
+        valor = row[config["planilha_atuacao"]["coluna_qtd"]]
+        qtd_results = _quantidade(valor)
+        if qtd_results is None:
+            log_warning("Linha da categoria %s ignorada: quantidade inválida (%r)", establishment_type, valor)
+            continue
+        tarefas.append((establishment_type, qtd_results))
+    log_info("Planilha lida com sucesso")
+    return tarefas
+
+def _quantidade(valor):
+    """
+    Converte a quantidade de uma linha da planilha (10, 10.0, "10") para inteiro
+    @return: a quantidade, ou None se estiver vazia, não for um número inteiro ou não for positiva
+    """
+    try:
+        numero = float(str(valor).strip().replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    if not numero.is_integer() or numero <= 0:
+        return None
+    return int(numero)
+
+def _abrir_cache(args, config):
+    """
+    Abre o cache de buscas com a validade do --max-age ou do config.toml
+    @param args: argumentos da linha de comando
+    @param config: configuração carregada
+    @return: cache de buscas
+    """
+    ttl_horas = args.max_age if args.max_age is not None else config["base"].get("cache_ttl_horas", 24)
+    return CacheBuscas(config["arquivos"]["cache"], ttl_horas=ttl_horas)
+
+def _escrever_resultados(config, resultados):
+    """
+    Escreve os resultados em JSON, Excel, JSON Lines e Parquet, e as métricas da execução
+    @param config: configuração carregada
+    @param resultados: função que devolve, a cada chamada, um novo iterável de pares (categoria, {indice: dados})
+    """
+    # Cada arquivo é escrito percorrendo os resultados uma categoria por vez, sem juntar tudo na memória
+    with medir("write_json"):
+        write_json_stream(resultados(), config["arquivos"]["resultados_json"])
+    log_info("Arquivo JSON escrito com sucesso")
+    with medir("write_excel"):
+        # O Excel é escrito em modo streaming, linha a linha
+        write_excel_stream(flatten_results(resultados()), config["arquivos"]["resultados_excel"])
+    log_info("Arquivo Excel escrito com sucesso")
+
+    # Uma linha JSON por estabelecimento, com as mesmas colunas do Excel
+    caminho_jsonl = config["arquivos"].get("resultados_jsonl")
+    if caminho_jsonl:
+        with medir("write_jsonl"):
+            write_jsonl_stream(flatten_results(resultados()), caminho_jsonl)
+        log_info("Arquivo JSON Lines escrito com sucesso")
+
+    # Versão tipada dos resultados (nota e avaliações numéricas, endereço separado) em Parquet, para análise
+    caminho_parquet = config["arquivos"].get("resultados_parquet")
+    if caminho_parquet:
+        try:
+            with medir("write_parquet"):
+                write_typed_results(resultados(), caminho_parquet)
+            log_info("Arquivo Parquet escrito com sucesso")
+        except ValueError as e:
+            log_error(str(e))
+
+    # Métricas de tempo de cada fase da execução (JSON e formato Prometheus)
+    exportar_metricas(config["arquivos"]["metricas"])
+    log_info("Arquivo de métricas escrito com sucesso")
+    log_info("=============== Fim do programa ===============")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
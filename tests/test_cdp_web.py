@@ -0,0 +1,173 @@
+"""
+Testes do backend cdp (functions/utils/cdp_web.py) contra um Chrome falso: um servidor websocket que responde aos
+comandos do DevTools Protocol com as páginas do FakeAsyncWebAutomation do benchmark.
+"""
+from benchmark.fake_driver import FakeAsyncWebAutomation
+from benchmark.maps_stub import CenarioMaps
+from functions.src import google_map
+from functions.src.google_map_async import collect_data_async
+from functions.utils.cdp_web import AsyncWebAutomation
+from functions.utils.selector_registry import Seletor
+import asyncio
+import http
+import itertools
+import json
+import re
+import pytest
+
+pytest.importorskip("websockets")
+from websockets.asyncio.server import serve
+
+# Ações que o script de ação da página sabe executar
+_ACOES = set(re.findall(r'arguments\[1\] === "(\w+)"', AsyncWebAutomation._ACAO_JS))
+# Scripts do google_map que a página falsa executa
+_SCRIPTS = {script: script for script in (google_map._SCROLL_FEED_JS, google_map._HARVEST_CARDS_JS, google_map._BLOQUEIO_JS)}
+# Seletor do google_map de cada variante, para a página falsa saber qual campo está sendo procurado
+_SELETORES = {value: seletor for seletor in vars(google_map).values() if isinstance(seletor, Seletor)
+              for _, value in seletor.variantes}
+
+class ChromeFalso:
+    """
+    Responde aos comandos do DevTools Protocol usados pelo AsyncWebAutomation. Cada alvo (página) é uma página do
+    FakeAsyncWebAutomation, e os scripts são reconhecidos pelo texto em vez de executados.
+    """
+
+    def __init__(self, cenario):
+        self.navegador = FakeAsyncWebAutomation(cenario)
+        self.paginas = {}
+        self.comandos = []
+        self.eventos = []
+        self.__ids = itertools.count(1)
+
+    async def responder(self, websocket):
+        async for mensagem in websocket:
+            comando = json.loads(mensagem)
+            self.comandos.append((comando["method"], comando.get("sessionId")))
+            resposta = {"id": comando["id"]}
+            try:
+                resposta["result"] = await self.__executar(comando["method"], comando["params"], comando.get("sessionId"))
+            except LookupError as e:
+                resposta["error"] = {"code": -32000, "message": str(e)}
+            # Eventos gerados pelo comando chegam antes da resposta, como no Chrome
+            while self.eventos:
+                await websocket.send(json.dumps(self.eventos.pop(0)))
+            await websocket.send(json.dumps(resposta))
+
+    async def __executar(self, metodo, params, sessao):
+        if metodo == "Target.createTarget":
+            alvo = f"alvo-{next(self.__ids)}"
+            self.paginas[alvo] = await self.navegador.new_page()
+            return {"targetId": alvo}
+        if metodo == "Target.attachToTarget":
+            return {"sessionId": params["targetId"]}
+        if metodo == "Target.closeTarget":
+            self.paginas.pop(params["targetId"], None)
+            return {"success": True}
+        pagina = self.paginas.get(sessao)
+        if pagina is None:
+            raise LookupError(f"Sessão não encontrada: {sessao}")
+        if metodo == "Page.navigate":
+            await pagina.open_url(params["url"], wait_load=False)
+            self.eventos += [_evento(sessao, "Network.requestWillBeSent", requestId="documento", type="Document", frameId=sessao),
+                             _evento(sessao, "Network.loadingFinished", requestId="documento", encodedDataLength=1000),
+                             _evento(sessao, "Network.requestServedFromCache", requestId="cache"),
+                             _evento(sessao, "Network.loadingFinished", requestId="cache", encodedDataLength=500),
+                             _evento(sessao, "Network.loadingFinished", requestId="tile", encodedDataLength=234)]
+            return {"frameId": sessao}
+        if metodo == "Runtime.evaluate":
+            return await self.__avaliar(pagina, params["expression"])
+        return {}
+
+    async def __avaliar(self, pagina, expressao):
+        script, argumentos = re.fullmatch(r"\(function\(\) \{ (.*) \}\)\.apply\(null, (.*)\)", expressao, re.S).groups()
+        argumentos = json.loads(argumentos)
+        if script == "return document.readyState":
+            valor = "complete"
+        elif script == "return location.href":
+            valor = await pagina.get_current_url()
+        elif script == AsyncWebAutomation._EXTRACT_FIELDS_JS:
+            campos = await pagina.extract_fields({nome: None for nome, _ in argumentos[0]})
+            valor = {"valores": campos,
+                     "buscas": {nome: {"tentativas": [[variantes[0][0], 0.0]], "indice": variantes[0][0] if campos[nome] else None}
+                                for nome, variantes in argumentos[0]}}
+        elif script == AsyncWebAutomation._ACAO_JS:
+            valor = await self.__acao(pagina, *argumentos)
+        elif script in _SCRIPTS:
+            valor = await pagina.execute_script(_SCRIPTS[script], *argumentos)
+        else:
+            raise LookupError("Script não reconhecido pela página falsa")
+        if isinstance(valor, dict) and "erro" in valor:
+            return {"result": {}, "exceptionDetails": {"text": valor["erro"]}}
+        return {"result": {"type": "object", "value": valor}}
+
+    async def __acao(self, pagina, variantes, acao):
+        seletor = _SELETORES[variantes[0][2]]
+        encontrado = await pagina.wait_element(seletor=seletor, timeout=0) is not None
+        if encontrado and acao not in _ACOES:
+            return {"erro": f"Error: Ação desconhecida: {acao}"}
+        return {"encontrado": encontrado, "indice": variantes[0][0] if encontrado else None,
+                "tentativas": [[variantes[0][0], 0.0]], "valor": None}
+
+def _evento(sessao, metodo, **params):
+    return {"method": metodo, "params": params, "sessionId": sessao}
+
+async def _com_chrome_falso(teste):
+    chrome = ChromeFalso(CenarioMaps(resultados=12, latencia_busca=0.05, latencia_lote=0.05, latencia_painel=0.05))
+
+    def versao(conexao, requisicao):
+        if requisicao.path == "/json/version":
+            porta = conexao.local_address[1]
+            return conexao.respond(http.HTTPStatus.OK, json.dumps({"webSocketDebuggerUrl": f"ws://127.0.0.1:{porta}/devtools/browser"}))
+
+    async with serve(chrome.responder, "127.0.0.1", 0, process_request=versao) as servidor:
+        endereco = f"127.0.0.1:{servidor.sockets[0].getsockname()[1]}"
+        navegador = await AsyncWebAutomation().startWebDriver(debugger_address=endereco, lean_mode=True)
+        try:
+            await teste(chrome, navegador)
+        finally:
+            await navegador.closer_chrome()
+
+def test_collect_data_async_no_backend_cdp():
+    async def teste(chrome, navegador):
+        pagina = await navegador.new_page()
+        resultado = await collect_data_async(pagina, "restaurante", 5, mode="tabs", janela_abas=2)
+        esperados = [lugar["nome"] for lugar in chrome.navegador.cenario.lugares("restaurante")[:5]]
+        assert [dados["establishment_name"] for dados in resultado.values()] == esperados
+        # O modo lean bloqueia os recursos em todas as páginas, inclusive nas abertas para os estabelecimentos
+        sessoes = {sessao for metodo, sessao in chrome.comandos if metodo == "Page.navigate"}
+        bloqueadas = {sessao for metodo, sessao in chrome.comandos if metodo == "Network.setBlockedURLs"}
+        assert sessoes <= bloqueadas
+
+    asyncio.run(_com_chrome_falso(teste))
+
+def test_wait_element_espera_o_elemento_aparecer():
+    async def teste(chrome, navegador):
+        await navegador.open_url(google_map.montar_url_busca("padaria"), wait_load=False)
+        assert await navegador.wait_element(seletor=google_map.RESULTS_FEED, timeout=2) is not None
+        assert await navegador.wait_element(seletor=google_map.ESTABLISHMENT_NAME, timeout=0.2) is None
+
+    asyncio.run(_com_chrome_falso(teste))
+
+def test_restart_browser_em_pagina_de_new_page():
+    async def teste(chrome, navegador):
+        pagina = await navegador.new_page()
+        await pagina.restart_browser()
+        url = google_map.montar_url_busca("farmacia")
+        await pagina.open_url(url, wait_load=False)
+        assert await pagina.get_current_url() == url
+        assert pagina in navegador._AsyncWebAutomation__paginas_abertas
+
+    asyncio.run(_com_chrome_falso(teste))
+
+def test_page_transfer_bytes_soma_os_eventos_de_rede_da_pagina():
+    async def teste(chrome, navegador):
+        pagina = await navegador.new_page()
+        await pagina.open_url(google_map.montar_url_busca("padaria"), wait_load=False)
+        # O recurso atendido pelo cache não conta
+        assert await pagina.page_transfer_bytes() == 1234
+        # Uma nova navegação zera a contagem, e os eventos das outras páginas não entram
+        await navegador.open_url(google_map.montar_url_busca("farmacia"), wait_load=False)
+        await pagina.open_url(google_map.montar_url_busca("farmacia"), wait_load=False)
+        assert await pagina.page_transfer_bytes() == 1234
+
+    asyncio.run(_com_chrome_falso(teste))
@@ -0,0 +1,38 @@
+"""
+Testes da separação do endereço em partes no build_typed_frame (functions/src/post_processing.py).
+"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+from functions.src.post_processing import build_typed_frame
+
+COLUNAS = ["address_street", "address_number", "address_district", "address_city", "address_state", "address_postal_code"]
+
+def _partes(endereco):
+    dados = {"Categoria": {"0": {"establishment_name": "Lugar", "establishment_type": "Tipo", "establishment_rate": "4,5",
+                                 "establishment_avaliation_count": "(1.234)", "establishment_address": endereco}}}
+    linha = build_typed_frame(dados).iloc[0]
+    return {coluna: (None if pd.isna(linha[coluna]) else linha[coluna]) for coluna in COLUNAS}
+
+@pytest.mark.parametrize("endereco, esperado", [
+    ("Av. Mutinga, 3725 - Jardim Santo Elias, São Paulo - SP, 05110-000",
+     ["Av. Mutinga", "3725", "Jardim Santo Elias", "São Paulo", "SP", "05110-000"]),
+    # Endereço que começa com o nome do shopping
+    ("Shopping São Francisco - Av. Dr. Cândido Motta Filho, 545 - Vila Sao Francisco, São Paulo - SP, 05351-000",
+     ["Av. Dr. Cândido Motta Filho", "545", "Vila Sao Francisco", "São Paulo", "SP", "05351-000"]),
+    # Trecho extra (loja) entre o número e o bairro
+    ("Rod. Raposo Tavares, 366 - Loja 4 - Km 18, Osasco - SP, 06000-000",
+     ["Rod. Raposo Tavares", "366", "Km 18", "Osasco", "SP", "06000-000"]),
+    # Endereço sem número
+    ("Av. Paulista - Bela Vista, São Paulo - SP, 01310-100",
+     ["Av. Paulista", None, "Bela Vista", "São Paulo", "SP", "01310-100"]),
+])
+def test_build_typed_frame_separa_o_endereco(endereco, esperado):
+    assert _partes(endereco) == dict(zip(COLUNAS, esperado))
+
+def test_build_typed_frame_converte_nota_e_avaliacoes():
+    dados = {"Categoria": {"0": {"establishment_name": "Lugar", "establishment_type": "Tipo", "establishment_rate": "4,5",
+                                 "establishment_avaliation_count": "(1.234)", "establishment_address": ""}}}
+    linha = build_typed_frame(dados).iloc[0]
+    assert linha["rate"] == 4.5
+    assert linha["avaliation_count"] == 1234